@@ -0,0 +1,195 @@
+import os
+import json
+import random
+
+
+# StreamSpot node and edge types are single characters
+STREAMSPOT_NODE_TYPES = "abc"
+STREAMSPOT_EDGE_TYPES = "pqrstuvw"
+# CamFlow node and edge types, with the relation each edge type belongs to
+CAMFLOW_ACTIVITY_TYPES = ["task", "machine"]
+CAMFLOW_ENTITY_TYPES = ["file", "inode_file", "socket", "path", "address", "argv", "envp"]
+CAMFLOW_RELATIONS = [
+    # relation, source field, destination field, source is an activity, destination is an activity, edge types
+    ("used", "prov:entity", "prov:activity", False, True, ["read", "open", "exec", "mmap_read"]),
+    ("wasGeneratedBy", "prov:entity", "prov:activity", False, True, ["write", "create", "mmap_write"]),
+    ("wasInformedBy", "prov:informant", "prov:informed", True, True, ["clone", "terminate_task"]),
+    ("wasDerivedFrom", "prov:usedEntity", "prov:generatedEntity", False, False, ["version_entity", "named"]),
+    ("wasAssociatedWith", "prov:agent", "prov:activity", True, True, ["ran_on"]),
+]
+# CDM record type prefixes and UUID keys of each flavor read by ProvParser
+CDM_FLAVORS = {
+    "cdm18": ("com.bbn.tc.schema.avro.cdm18.", "com.bbn.tc.schema.avro.cdm18.UUID"),
+    "cdm19": ("com.bbn.tc.schema.avro.cdm19.", "com.bbn.tc.schema.avro.cdm19.UUID"),
+    "cadets2": ("", "UUID"),
+}
+CDM_OBJECT_TYPES = [
+    # record type, "type" field of the record
+    ("FileObject", "FILE_OBJECT_FILE"),
+    ("FileObject", "FILE_OBJECT_DIR"),
+    ("NetFlowObject", None),
+    ("UnnamedPipeObject", None),
+    ("MemoryObject", None),
+]
+CDM_EVENT_TYPES = ["EVENT_READ", "EVENT_WRITE", "EVENT_OPEN", "EVENT_CLOSE", "EVENT_EXECUTE",
+                   "EVENT_MMAP", "EVENT_CONNECT", "EVENT_RECVFROM", "EVENT_SENDTO", "EVENT_RENAME"]
+# libpvm node labels and edge types
+LIBPVM_NODE_LABELS = [("Process", "proc"), ("File", "file"), ("Socket", "socket"), ("Pipe", "pipe")]
+LIBPVM_EDGE_TYPES = [("INF", "read"), ("INF", "write"), ("INF", "connect"), ("INF", "exec"), ("NAMED", "open")]
+
+
+def uuid(rng):
+    """A random UUID-like string."""
+    return "%032x" % rng.getrandbits(128)
+
+
+def streamspot_tsv(path, n, seed=0, graphs=10):
+    """StreamSpot TSV read by streamspot/*.py: @n edges of @graphs graphs
+    (IDs 0 to @graphs - 1), interleaved as in the original dataset."""
+    rng = random.Random(seed)
+    nodes = max(2, n // (4 * graphs))                   # nodes per graph grow with the number of edges
+    with open(path, "w") as f:
+        for _ in range(n):
+            src = rng.randrange(nodes)
+            dst = rng.randrange(nodes)
+            f.write("{}\t{}\t{}\t{}\t{}\t{}\n".format(
+                src, STREAMSPOT_NODE_TYPES[src % len(STREAMSPOT_NODE_TYPES)],
+                dst, STREAMSPOT_NODE_TYPES[dst % len(STREAMSPOT_NODE_TYPES)],
+                rng.choice(STREAMSPOT_EDGE_TYPES), rng.randrange(graphs)))
+    f.close()
+    return n
+
+
+def edgelist(path, n, seed=0):
+    """Edge list read by camflow/parse.py and up.py (i.e., the output of
+    camflow/prepare.py -t): @n edges in logical timestamp order."""
+    rng = random.Random(seed)
+    nodes = [rng.getrandbits(63) for _ in range(max(2, n // 4))]
+    types = [rng.getrandbits(63) for _ in range(20)]
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(rng.choice(nodes), rng.choice(nodes), rng.choice(types),
+                                                      rng.choice(types), rng.choice(types), i + 1, 1000 + 3 * i))
+    f.close()
+    return n
+
+
+def camflow_json(path, n, seed=0):
+    """CamFlow W3C-PROV JSON read by camflow/prepare.py and ProvParser:
+    @n JSON records, one per line. About a third of the records declare
+    new nodes; the others hold edges between nodes declared before."""
+    rng = random.Random(seed)
+    activities = list()
+    entities = list()
+    edge_id = 0
+    with open(path, "w") as f:
+        for i in range(n):
+            record = {"prefix": {"prov": "http://www.w3.org/ns/prov", "cf": "http://www.camflow.org"}}
+            if i % 3 == 0 or not activities or not entities:
+                activity = uuid(rng)
+                record["activity"] = {activity: {"prov:type": rng.choice(CAMFLOW_ACTIVITY_TYPES),
+                                                 "cf:secctx": "system_u:system_r:kernel_t:s0",
+                                                 "cf:mode": "0x%x" % rng.randrange(1 << 16)}}
+                record["entity"] = dict()
+                for _ in range(2):
+                    entity = uuid(rng)
+                    record["entity"][entity] = {"prov:type": rng.choice(CAMFLOW_ENTITY_TYPES),
+                                                "cf:mode": "0x%x" % rng.randrange(1 << 16)}
+                    if rng.random() < 0.5:
+                        record["entity"][entity]["cf:name"] = "/tmp/file-%d" % rng.randrange(1000)
+                    entities.append(entity)
+                activities.append(activity)
+            else:
+                for _ in range(rng.randint(1, 3)):
+                    relation, src_field, dst_field, src_activity, dst_activity, edge_types = rng.choice(CAMFLOW_RELATIONS)
+                    edge_id += 1
+                    record.setdefault(relation, dict())[uuid(rng)] = {
+                        "prov:type": rng.choice(edge_types),
+                        "cf:id": str(edge_id),
+                        "cf:date": "2019:05:%02dT%02d:%02d:%02d" % (1 + edge_id // 86400 % 28, edge_id // 3600 % 24,
+                                                                    edge_id // 60 % 60, edge_id % 60),
+                        "cf:jiffies": str(4294667296 + 4 * edge_id),
+                        "cf:flags": "O_RDONLY" if rng.random() < 0.5 else "O_RDWR",
+                        src_field: rng.choice(activities if src_activity else entities),
+                        dst_field: rng.choice(activities if dst_activity else entities),
+                    }
+            f.write(json.dumps(record) + "\n")
+    f.close()
+    return n
+
+
+def cdm_json(path, n, seed=0, flavor="cdm18"):
+    """CDM JSON read by ProvParser (jparse.py): @n records, one per line,
+    of the given @flavor ("cdm18", "cdm19" or "cadets2"). About a quarter
+    of the records are subjects and objects; the others are events."""
+    prefix, uuid_key = CDM_FLAVORS[flavor]
+    rng = random.Random(seed)
+    subjects = list()
+    objects = list()
+    timestamp = 1522000000000000000
+    with open(path, "w") as f:
+        for i in range(n):
+            if i % 4 == 0 or not subjects or not objects:
+                if i % 8 == 0 or not subjects:
+                    record_type, value = "Subject", {"uuid": uuid(rng), "type": "SUBJECT_PROCESS", "cid": rng.randrange(1 << 15)}
+                    subjects.append(value["uuid"])
+                else:
+                    record_type, object_type = rng.choice(CDM_OBJECT_TYPES)
+                    value = {"uuid": uuid(rng)}
+                    if object_type is not None:
+                        value["type"] = object_type
+                    objects.append(value["uuid"])
+            else:
+                timestamp += rng.randrange(1, 1000000)
+                event_type = rng.choice(CDM_EVENT_TYPES)
+                record_type, value = "Event", {"uuid": uuid(rng), "type": event_type, "timestampNanos": timestamp,
+                                               "subject": {uuid_key: rng.choice(subjects)},
+                                               "predicateObject": {uuid_key: rng.choice(objects)},
+                                               "predicateObject2": None}
+                if event_type == "EVENT_RENAME":
+                    value["predicateObject2"] = {uuid_key: rng.choice(objects)}
+            record = {"datum": {prefix + record_type: value}, "CDMVersion": flavor[3:] if flavor != "cadets2" else "18",
+                      "source": "SOURCE_SYNTHETIC"}
+            f.write(json.dumps(record) + "\n")
+    f.close()
+    return n
+
+
+def libpvm_csv(path, n, seed=0):
+    """libpvm CSV read by cadets/prepare.py: a directory @path whose db/
+    subdirectory holds a node file and an edge file with @n edges in
+    total. Edges are written out of order, as libpvm does."""
+    rng = random.Random(seed)
+    db = os.path.join(path, "db")
+    if not os.path.exists(db):
+        os.makedirs(db)
+    num_nodes = max(2, n // 4)
+    with open(os.path.join(db, "nodes.csv"), "w") as f:
+        f.write("db_id:ID,:LABEL,ty\n")
+        for node_id in range(num_nodes):
+            label, ty = rng.choice(LIBPVM_NODE_LABELS)
+            f.write("{},{},{}\n".format(node_id, label, ty))
+    f.close()
+    edge_ids = list(range(num_nodes, num_nodes + n))
+    rng.shuffle(edge_ids)
+    with open(os.path.join(db, "edges.csv"), "w") as f:
+        f.write("db_id,:START_ID,:END_ID,:TYPE,generating_call\n")
+        for edge_id in edge_ids:
+            edge_type, call = rng.choice(LIBPVM_EDGE_TYPES)
+            f.write("{},{},{},{},{}\n".format(edge_id, rng.randrange(num_nodes), rng.randrange(num_nodes), edge_type, call))
+    f.close()
+    return n
+
+
+# input formats of the benchmarks: name -> (generator, file name). Each generator
+# writes n records to a path and returns the number of records written; the
+# same seed always gives the same data.
+FORMATS = {
+    "streamspot": (streamspot_tsv, "streamspot.tsv"),
+    "edgelist": (edgelist, "edgelist.txt"),
+    "camflow": (camflow_json, "camflow.json"),
+    "cdm18": (lambda path, n, seed=0: cdm_json(path, n, seed, "cdm18"), "cdm18.json"),
+    "cdm19": (lambda path, n, seed=0: cdm_json(path, n, seed, "cdm19"), "cdm19.json"),
+    "cadets2": (lambda path, n, seed=0: cdm_json(path, n, seed, "cadets2"), "cadets2.json"),
+    "libpvm": (libpvm_csv, "libpvm"),
+}
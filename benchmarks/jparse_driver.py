@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+import provparser.partool.jparse as ptj
+import provparser.partool.decoder as ptd
+
+
+class MemoryStore(object):
+    """In-memory node database with the put/get interface of RocksDB,
+    so that ProvParser runs without setting up a database (cf. up.py -m)."""
+    def __init__(self):
+        self.data = dict()
+
+    def put(self, key, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+
+def records(file_name):
+    """Generate the JSON records of the file @file_name, decoded as provparser does."""
+    with open(file_name, "r") as f:
+        for record in ptd.items(f):
+            yield record
+    f.close()
+
+
+# node parsing and output generation functions of each trace
+TRACES = {
+    "camflow": (ptj.parsecf, ptj.cgencf),
+    "darpa": (ptj.parsedp, ptj.cgendp),
+    "spade": (ptj.parsesp, ptj.cgensp),
+    "cadets2": (ptj.parsecd, ptj.cgencd),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the two ProvParser passes (jparse.py) over a single JSON file')
+    parser.add_argument('-t', '--trace', help='tracing system of the input', choices=sorted(TRACES), required=True)
+    parser.add_argument('-i', '--input', help='input JSON file path', required=True)
+    parser.add_argument('-o', '--output', help='output edgelist file path', required=True)
+    parser.add_argument('-d', '--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + ptd.BACKENDS, default='auto')
+    args = parser.parse_args()
+
+    ptd.use(args.decoder)
+
+    parse, generate = TRACES[args.trace]
+    db = MemoryStore()
+    parse(records(args.input), db, os.path.basename(args.input))
+    out = open(args.output, "w")
+    generate(records(args.input), db, out)
+    out.close()
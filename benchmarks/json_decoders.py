@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+from generators import FORMATS
+from provparser.partool import decoder
+
+# malformed lines of the check (see check_malformed), each followed by many good records
+MALFORMED = [b'{"b": tru\n', b'{"b": {"c": \n', b'{"b": "trunc\n']
+GOOD = b'{"a": 1}\n'
+
+
+def check_malformed():
+    """Check that decoder.items stops at a malformed line instead of reading
+    (and keeping) the rest of the input. Return the list of the malformed
+    lines that it does not stop at, which is empty if the check passes."""
+    failed = list()
+    for line in MALFORMED:
+        decoded = 0
+        stopped = False
+        try:
+            for _ in decoder.items(BytesIO(GOOD * 10 + line + GOOD * 8000)):
+                decoded += 1
+        except Exception as e:
+            # an error at the end of the input means that the rest was read
+            stopped = "end of the input" not in str(e)
+        if not stopped or decoded != 10:
+            failed.append(line)
+    return failed
+
+
+def time_loads(path):
+    """Decode the file @path line by line with decoder.loads and return the elapsed time in seconds."""
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    f.close()
+    start = time.time()
+    for line in lines:
+        decoder.loads(line)
+    return time.time() - start
+
+
+def time_items(path):
+    """Decode the file @path as a stream with decoder.items and return the elapsed time in seconds."""
+    start = time.time()
+    with open(path, "rb") as f:
+        for _ in decoder.items(f):
+            pass
+    f.close()
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the installed JSON decoder backends (cdm/ProvParser/provparser/partool/decoder.py) on synthetic data')
+    parser.add_argument('-n', '--size', help='number of records of each input (default is 100000)', type=int, default=100000)
+    parser.add_argument('-f', '--formats', help='comma-separated input formats (default is camflow,cdm18)', default='camflow,cdm18')
+    parser.add_argument('-r', '--seed', help='random seed of the generated inputs (default is 0)', type=int, default=0)
+    parser.add_argument('-C', '--check-only', help='only check that every backend stops at malformed lines', action='store_true')
+    args = parser.parse_args()
+
+    failed = False
+    for backend in decoder.available():
+        decoder.use(backend)
+        lines = check_malformed()
+        if lines:
+            failed = True
+            print("\x1b[6;30;41m[ERROR]\x1b[0m Backend {} does not stop at malformed lines: {}".format(backend, b", ".join(line.strip() for line in lines)))
+    if failed:
+        sys.exit(1)
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Every backend stops at malformed lines")
+    if args.check_only:
+        sys.exit(0)
+
+    work_dir = tempfile.mkdtemp(prefix="json-decoders-")
+    print("{:<10} {:<12} {:>14} {:>14}".format("format", "backend", "loads rec/s", "items rec/s"))
+    for fmt in args.formats.split(","):
+        generator, file_name = FORMATS[fmt]
+        path = os.path.join(work_dir, file_name)
+        records = generator(path, args.size, args.seed)
+        for backend in decoder.available():
+            decoder.use(backend)
+            loads = time_loads(path)
+            items = time_items(path)
+            print("{:<10} {:<12} {:>14.0f} {:>14.0f}".format(fmt, backend, records / loads, records / items))
+    shutil.rmtree(work_dir, ignore_errors=True)
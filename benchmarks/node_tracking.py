@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamspot"))
+from parse import parse_edges
+
+
+class NullProgress(object):
+    """Stands in for a tqdm progress bar so that it does not add to the timings."""
+    def update(self, n=1):
+        pass
+
+
+def list_edges(lines, graph_id):
+    """Node-seen tracking with a Python list, as parse.py used to do; kept only as a baseline."""
+    node_id_seen = list()
+    cnt = 1
+    for line in lines:
+        edge = line.strip().split("\t")
+        if edge[5] == graph_id:
+            for node_id in (edge[0], edge[2]):
+                if node_id in node_id_seen:
+                    edge.append("0")
+                else:
+                    edge.append("1")
+                    node_id_seen.append(node_id)
+            edge.append(cnt)
+            cnt = cnt + 1
+            yield edge
+
+
+def generate_graph(num_edges, seed):
+    """Generate the lines of a random StreamSpot graph (ID 0) of @num_edges
+    edges, in which the number of nodes grows with the number of edges."""
+    rng = random.Random(seed)
+    num_nodes = max(2, num_edges // 4)
+    lines = list()
+    for _ in range(num_edges):
+        lines.append("{}\t{}\t{}\t{}\t{}\t0\n".format(rng.randrange(num_nodes), rng.choice("abc"),
+                                                      rng.randrange(num_nodes), rng.choice("abc"), rng.choice("pqrs")))
+    return lines
+
+
+def run(edges):
+    """Consume the generator @edges and return the elapsed time in seconds."""
+    start = time.time()
+    for _ in edges:
+        pass
+    return time.time() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark node-seen tracking of streamspot/parse.py on graphs of increasing size')
+    parser.add_argument('-n', '--sizes', help='comma-separated graph sizes in number of edges (default is 250000,500000,1000000,2000000,4000000)', default='250000,500000,1000000,2000000,4000000')
+    parser.add_argument('-a', '--arrange', help='also rearrange node IDs', action='store_true')
+    parser.add_argument('-l', '--baseline', help='also time the list-based baseline on graphs up to this size (it is quadratic; default is 20000)', type=int, default=20000)
+    parser.add_argument('-r', '--seed', help='random seed of the generated graphs (default is 0)', type=int, default=0)
+    args = parser.parse_args()
+
+    print("{:>10} {:>12} {:>10} {:>14} {:>14}".format("edges", "tracker", "us/edge", "list baseline", "us/edge"))
+    for num_edges in [int(n) for n in args.sizes.split(",")]:
+        lines = generate_graph(num_edges, args.seed)
+        elapsed = run(parse_edges(lines, "0", NullProgress(), args.arrange))
+        row = "{:>10} {:>11.2f}s {:>10.3f}".format(num_edges, elapsed, elapsed * 1e6 / num_edges)
+        if num_edges <= args.baseline:
+            baseline = run(list_edges(lines, "0"))
+            row += " {:>13.2f}s {:>14.3f}".format(baseline, baseline * 1e6 / num_edges)
+        print(row)
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generators import FORMATS
+
+# root directory of this repository; entry points are given relative to it
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# interpreters of the entry points: the StreamSpot parsers run on Python 3, the others on Python 2
+PY3 = "python3"
+PY2 = "python2"
+
+# benchmarked entry points: (name, interpreter, input format, command). In a
+# command, {input} is replaced by the input path and {out} by the directory
+# of the outputs, which is also the working directory of the run.
+ENTRY_POINTS = [
+    ("streamspot/parse.py", PY3, "streamspot",
+     ["streamspot/parse.py", "-g", "0", "-i", "{input}", "-b", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("streamspot/parse.py -l -x", PY3, "streamspot",
+     ["streamspot/parse.py", "-l", "-x", "-g", "0", "-i", "{input}", "-b", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("streamspot/parse.py batch", PY3, "streamspot",
+     ["streamspot/parse.py", "-g", "0-9", "-i", "{input}", "-b", "{out}/base-{graph}.txt", "-S", "{out}/stream-{graph}.txt"]),
+    ("streamspot/parse_fast.py", PY3, "streamspot",
+     ["streamspot/parse_fast.py", "-g", "0", "-i", "{input}", "-b", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("streamspot/parse_all.py", PY3, "streamspot",
+     ["streamspot/parse_all.py", "-g", "0-9", "-i", "{input}", "-b", "{out}/base-{graph}.txt", "-S", "{out}/stream-{graph}.txt"]),
+    ("camflow/prepare.py", PY2, "camflow",
+     ["camflow/prepare.py", "-i", "{input}", "-o", "{out}/prepared.txt"]),
+    ("camflow/prepare.py -w 4", PY2, "camflow",
+     ["camflow/prepare.py", "-w", "4", "-i", "{input}", "-o", "{out}/prepared.txt"]),
+    ("camflow/live.py", PY2, "camflow",
+     ["camflow/live.py", "-i", "{input}", "-b", "1000", "-B", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("camflow/pipeline.py", PY2, "camflow",
+     ["camflow/pipeline.py", "-i", "{input}", "-b", "1000", "-B", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("camflow/parse.py", PY2, "edgelist",
+     ["camflow/parse.py", "-i", "{input}", "-B", "{out}/base.txt", "-S", "{out}/stream.txt"]),
+    ("cdm/ProvParser/provparser/up.py", PY2, "edgelist",
+     ["cdm/ProvParser/provparser/up.py", "-m", "-i", "{input}", "-b", "{out}/base.txt", "-s", "{out}/stream.txt"]),
+    ("jparse.py camflow", PY2, "camflow",
+     ["benchmarks/jparse_driver.py", "-t", "camflow", "-i", "{input}", "-o", "{out}/out.txt"]),
+    ("jparse.py cdm18", PY2, "cdm18",
+     ["benchmarks/jparse_driver.py", "-t", "darpa", "-i", "{input}", "-o", "{out}/out.txt"]),
+    ("jparse.py cdm19", PY2, "cdm19",
+     ["benchmarks/jparse_driver.py", "-t", "spade", "-i", "{input}", "-o", "{out}/out.txt"]),
+    ("jparse.py cadets2", PY2, "cadets2",
+     ["benchmarks/jparse_driver.py", "-t", "cadets2", "-i", "{input}", "-o", "{out}/out.txt"]),
+    ("cadets/prepare.py", PY2, "libpvm",
+     ["cadets/prepare.py", "{input}", "{out}/edgelist.txt"]),
+]
+
+
+def git_commit():
+    """Commit of the benchmarked tree, if it is a git repository."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO, stderr=subprocess.STDOUT).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_once(interpreter, command, input_path, out_dir, timeout):
+    """Run an entry point once. Return (wall time in seconds, peak RSS in KB,
+    exit status, the tail of its stderr). Peak RSS is that of the child
+    process alone, as reported by wait4."""
+    args = [interpreter]
+    for arg in command:
+        arg = arg.replace("{input}", input_path).replace("{out}", out_dir)
+        if not arg.startswith("-") and os.path.exists(os.path.join(REPO, arg)):
+            arg = os.path.join(REPO, arg)                   # scripts are given relative to the repository
+        args.append(arg)
+    stdout = open(os.path.join(out_dir, "stdout.txt"), "w")
+    stderr = open(os.path.join(out_dir, "stderr.txt"), "w")
+    start = time.time()
+    process = subprocess.Popen(args, cwd=out_dir, stdout=stdout, stderr=stderr)
+    status = None
+    while status is None:
+        pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        if pid == 0:
+            status = None
+            if time.time() - start > timeout:
+                process.kill()
+            time.sleep(0.01)
+    wall = time.time() - start
+    status = os.waitstatus_to_exitcode(status)
+    process.returncode = status                             # wait4 reaped the process already
+    stdout.close()
+    stderr.close()
+    with open(os.path.join(out_dir, "stderr.txt"), "r") as f:
+        error = f.read()[-2000:]
+    f.close()
+    if wall > timeout and status != 0:
+        error += "\nkilled after {} seconds".format(timeout)
+    return wall, rusage.ru_maxrss, status, error
+
+
+def run(entry_points, sizes, work_dir, seed, repeat, timeout, interpreters):
+    """Run every entry point in @entry_points on generated inputs of every
+    size in @sizes and return the list of results. Inputs are generated
+    once per format and size in @work_dir."""
+    results = list()
+    inputs = dict()
+    for size in sizes:
+        for name, interpreter, fmt, command in entry_points:
+            result = {"name": name, "format": fmt, "size": size, "interpreter": interpreters[interpreter]}
+            results.append(result)
+            if shutil.which(interpreters[interpreter]) is None:
+                result["status"] = "skipped"
+                result["error"] = "interpreter {} not found".format(interpreters[interpreter])
+                print("\x1b[6;30;43m[INFO]\x1b[0m {} ({} records): skipped, {}".format(name, size, result["error"]))
+                continue
+            if (fmt, size) not in inputs:
+                generator, file_name = FORMATS[fmt]
+                input_path = os.path.join(work_dir, "{}-{}".format(size, file_name))
+                print("\x1b[6;30;42m[STATUS]\x1b[0m Generating {} records of {} data at {}".format(size, fmt, input_path))
+                inputs[(fmt, size)] = (input_path, generator(input_path, size, seed))
+            input_path, records = inputs[(fmt, size)]
+            result["records"] = records
+
+            walls = list()
+            rss = 0
+            for _ in range(repeat):
+                out_dir = tempfile.mkdtemp(prefix="run-", dir=work_dir)
+                wall, peak, status, error = run_once(interpreters[interpreter], command, input_path, out_dir, timeout)
+                shutil.rmtree(out_dir, ignore_errors=True)
+                if status != 0:
+                    result["status"] = "failed"
+                    result["error"] = error
+                    break
+                walls.append(wall)
+                rss = max(rss, peak)
+            if walls and "status" not in result:
+                result["status"] = "ok"
+                result["wall_s"] = min(walls)
+                result["records_per_s"] = records / min(walls) if min(walls) > 0 else None
+                result["peak_rss_kb"] = rss
+                print("\x1b[6;30;42m[SUCCESS]\x1b[0m {} ({} records): {:.2f}s, {:.0f} records/s, peak RSS {} KB".format(
+                    name, size, result["wall_s"], result["records_per_s"] or 0, rss))
+            else:
+                print("\x1b[6;30;41m[ERROR]\x1b[0m {} ({} records) failed: {}".format(name, size, result["error"].strip().split("\n")[-1]))
+    return results
+
+
+def compare(baseline_path, results_path):
+    """Print the throughput of the results at @results_path relative
+    to those at @baseline_path, matching entry points and sizes."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    f.close()
+    with open(results_path, "r") as f:
+        current = json.load(f)
+    f.close()
+    before = dict(((r["name"], r["size"]), r) for r in baseline["results"] if r.get("status") == "ok")
+    print("{:<36} {:>10} {:>14} {:>14} {:>8} {:>12}".format("entry point", "records", "before rec/s", "after rec/s", "speedup", "RSS ratio"))
+    for r in current["results"]:
+        old = before.get((r["name"], r["size"]))
+        if old is None or r.get("status") != "ok":
+            continue
+        print("{:<36} {:>10} {:>14.0f} {:>14.0f} {:>7.2f}x {:>11.2f}x".format(
+            r["name"], r["size"], old["records_per_s"], r["records_per_s"],
+            r["records_per_s"] / old["records_per_s"], float(r["peak_rss_kb"]) / old["peak_rss_kb"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark every parser entry point on synthetic data')
+    parser.add_argument('-n', '--sizes', help='comma-separated input sizes in number of records (default is 10000,100000)', default='10000,100000')
+    parser.add_argument('-e', '--entry-points', help='run only the entry points whose name contains one of these comma-separated strings')
+    parser.add_argument('-o', '--output', help='output file path of the machine-readable (JSON) results (default is benchmark-results.json)', default='benchmark-results.json')
+    parser.add_argument('-w', '--work-dir', help='directory of generated inputs and outputs (default is a temporary directory, removed afterwards)')
+    parser.add_argument('-r', '--repeat', help='number of runs of each entry point; the fastest run is reported (default is 1)', type=int, default=1)
+    parser.add_argument('-s', '--seed', help='random seed of the generated inputs (default is 0)', type=int, default=0)
+    parser.add_argument('-t', '--timeout', help='seconds after which a run is killed (default is 3600)', type=int, default=3600)
+    parser.add_argument('--python3', help='Python 3 interpreter (default is the one running this script)', default=sys.executable)
+    parser.add_argument('--python2', help='Python 2 interpreter (default is python2)', default='python2')
+    parser.add_argument('-c', '--compare', help='instead of running, compare the results file given by -o against this baseline results file')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare, args.output)
+        sys.exit(0)
+
+    entry_points = ENTRY_POINTS
+    if args.entry_points:
+        patterns = args.entry_points.split(",")
+        entry_points = [e for e in ENTRY_POINTS if any(p in e[0] for p in patterns)]
+    sizes = [int(n) for n in args.sizes.split(",")]
+    interpreters = {PY3: args.python3, PY2: args.python2}
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="benchmarks-")
+    if not os.path.exists(work_dir):
+        os.makedirs(work_dir)
+    results = run(entry_points, sizes, os.path.abspath(work_dir), args.seed, args.repeat, args.timeout, interpreters)
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count()},
+        "interpreters": interpreters,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    f.close()
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Results are located at {}".format(args.output))
@@ -0,0 +1,321 @@
+import os
+import sys
+import signal
+import socket
+import argparse
+import logging
+import threading
+import collections
+import Queue
+import tqdm
+
+import prepare
+import telemetry
+from prepare import decoder
+from nodestore import NODE_STORES, new_node_map, memory_report
+
+
+# make argparse arguments global
+CONSOLE_ARGUMENTS = None
+
+
+class PendingEdges(object):
+    """Edges whose source or destination node has not been seen yet,
+    indexed by the UUID of a node they are waiting for. Unlike
+    prepare.DeferredEdges, the input never ends, so at most @capacity
+    edges are kept: once full, the oldest pending edge is dropped."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.edges = collections.OrderedDict()  # maps a sequence number to (uuid, edge), oldest first
+        self.waiting = dict()                   # maps a missing node UUID to the sequence numbers of its edges
+        self.seq = 0
+        self.dropped = 0
+
+    def add(self, edge, uuid):
+        """Defer @edge until the node @uuid is seen."""
+        if len(self.edges) >= self.capacity:
+            _, (old_uuid, old_edge) = self.edges.popitem(last=False)
+            self.remove(old_uuid, old_edge)
+            self.dropped += 1
+            if CONSOLE_ARGUMENTS.verbose:
+                logging.debug("dropping pending edge ({}) record waiting for {}: {}".format(old_edge[0], old_uuid, old_edge[1]))
+        self.seq += 1
+        self.edges[self.seq] = (uuid, edge)
+        self.waiting.setdefault(uuid, list()).append(self.seq)
+
+    def remove(self, uuid, edge):
+        """Forget the (oldest) sequence number of @uuid, whose @edge was dropped."""
+        seqs = self.waiting[uuid]
+        seqs.pop(0)
+        if not seqs:
+            del self.waiting[uuid]
+
+    def pop(self, uuid):
+        """Remove and return the edges waiting for the node @uuid, oldest first."""
+        return [self.edges.pop(seq)[1] for seq in self.waiting.pop(uuid, list())]
+
+    def __len__(self):
+        return len(self.edges)
+
+
+class Writer(threading.Thread):
+    """Write lines to their files in the background. Lines are handed over
+    through a queue of at most @capacity lines; when the queue is full
+    (the disk, or whatever reads the output, is slower than the input),
+    put blocks, so that no more input is read until the writer catches up
+    and the producer of the input is held back in turn. Files are flushed
+    whenever the queue runs empty, so that a quiet input is written out
+    with little delay but a busy one is still written in large chunks."""
+    def __init__(self, capacity):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.queue = Queue.Queue(maxsize=capacity)
+        self.stalls = 0                 # number of times put had to wait for the writer
+
+    def put(self, output, line):
+        """Queue @line to be written to the file @output; a @line of None closes @output."""
+        try:
+            self.queue.put_nowait((output, line))
+        except Queue.Full:
+            self.stalls += 1
+            self.queue.put((output, line))
+
+    def close(self):
+        """Write all queued lines and stop the writer."""
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        dirty = set()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            output, line = item
+            if line is None:
+                output.close()
+                dirty.discard(output)
+            else:
+                output.write(line)
+                dirty.add(output)
+            if self.queue.empty():
+                for output in dirty:
+                    output.flush()
+                dirty.clear()
+        for output in dirty:
+            output.flush()
+
+
+class LiveGraph(object):
+    """Incremental state of a live CamFlow graph: the nodes seen so far
+    (as in prepare.py), the edges pending on unseen nodes, and the node
+    IDs of the output (as in parse.py, new IDs start from 0). The first
+    @base_size edges go to the base graph file @base, the rest to the
+    stream graph file @stream, in the formats of parse.py. Edges are
+    written in the order in which they become complete; since they are
+    not sorted by their logical timestamps as parse.py does, CamFlow
+    should be configured to emit them in order. Records, edges, and new
+    output nodes are counted in the telemetry stage self.stage, if set."""
+    def __init__(self, base, stream, base_size, pending, writer, node_map):
+        self.node_map = node_map
+        self.map_id = dict()            # maps CamFlow UUIDs to output IDs
+        self.pending = PendingEdges(pending)
+        self.base = base
+        self.stream = stream
+        self.base_size = base_size
+        self.edges = 0
+        self.writer = writer
+        self.stage = None
+        if base_size == 0:
+            self.writer.put(self.base, None)
+
+    def add(self, json_object):
+        """Add the nodes and edges of a parsed CamFlow JSON object @json_object."""
+        # edges waiting for a new node may now be written
+        # only the types of the nodes are written, so their UIDs are not encoded
+        for uid in prepare.add_nodes(json_object, self.node_map, False):
+            for edge in self.pending.pop(uid):
+                self.resolve(edge)
+
+        for relation, uid, edge, srcUUID, dstUUID, timestamp, date, jiffies in prepare.relation_edges(json_object, None, CONSOLE_ARGUMENTS.verbose):
+            if timestamp is None or jiffies is None:
+                continue
+            self.resolve([relation, uid, srcUUID, dstUUID, prepare.edgegen(edge), timestamp, jiffies])
+
+    def resolve(self, edge):
+        """Write @edge if both of its nodes are known, or defer it otherwise."""
+        for uuid in (edge[2], edge[3]):
+            if uuid not in self.node_map:
+                self.pending.add(edge, uuid)
+                return
+        self.write(edge)
+
+    def relabel(self, uuid):
+        """Return the output ID of the node @uuid and "1" if the node has not been seen before ("0" otherwise)."""
+        node_id = self.map_id.get(uuid)
+        if node_id is not None:
+            return node_id, "0"
+        node_id = str(len(self.map_id))
+        self.map_id[uuid] = node_id
+        return node_id, "1"
+
+    def write(self, edge):
+        relation, uid, srcUUID, dstUUID, edgetype, timestamp, jiffies = edge
+        srcVal = self.node_map[srcUUID][0]
+        dstVal = self.node_map[dstUUID][0]
+        srcID, srcSeen = self.relabel(srcUUID)
+        dstID, dstSeen = self.relabel(dstUUID)
+        if self.edges < self.base_size:
+            if CONSOLE_ARGUMENTS.jiffies:
+                line = "{} {} {}:{}:{}:{}:{}\n".format(srcID, dstID, srcVal, dstVal, edgetype, timestamp, jiffies)
+            else:
+                line = "{} {} {}:{}:{}:{}\n".format(srcID, dstID, srcVal, dstVal, edgetype, timestamp)
+            self.writer.put(self.base, line)
+        else:
+            if CONSOLE_ARGUMENTS.jiffies:
+                line = "{} {} {}:{}:{}:{}:{}:{}:{}\n".format(srcID, dstID, srcVal, dstVal, edgetype, srcSeen, dstSeen, timestamp, jiffies)
+            else:
+                line = "{} {} {}:{}:{}:{}:{}:{}\n".format(srcID, dstID, srcVal, dstVal, edgetype, srcSeen, dstSeen, timestamp)
+            self.writer.put(self.stream, line)
+        self.edges += 1
+        if self.stage:
+            self.stage.update(0, 1, (srcSeen == "1") + (dstSeen == "1"))
+        if self.edges == self.base_size:
+            # the base graph is complete; close it so that it can be read right away
+            self.writer.put(self.base, None)
+            print("\x1b[6;30;42m[STATUS]\x1b[0m Base graph of size {} is complete; streaming edges to {}".format(self.base_size, CONSOLE_ARGUMENTS.stream))
+
+
+def read_records(f, graph, pb):
+    """Add the CamFlow JSON records read from the file object @f, one per
+    line, to the live @graph until @f ends. Lines are read one at a time
+    (not in read-ahead chunks) so that each record is handled as soon as
+    it arrives."""
+    skipped = 0
+    for line in iter(f.readline, ''):
+        pb.update()
+        if graph.stage:
+            graph.stage.update(1)
+        if not prepare.may_contain(line, prepare.NODE_KEYS + prepare.EDGE_KEYS):
+            skipped += 1
+            continue
+        try:
+            # use "ignore" if non-decodeable exists in the @line
+            json_object = decoder.loads(line.decode("utf-8","ignore"))
+        except Exception as e:
+            # a live input may be cut off mid-record; skip it rather than stop
+            print("\x1b[6;30;41m[ERROR]\x1b[0m Exception ({}) occurred when parsing JSON: {}".format(e, line[:200]))
+            continue
+        graph.add(json_object)
+    return skipped
+
+
+def serve(path, graph, pb):
+    """Accept connections on a UNIX socket at @path, one at a time, and
+    add the CamFlow JSON records sent over each to the live @graph.
+    The graph is kept across connections, e.g., if CamFlow reconnects."""
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    print("\x1b[6;30;42m[STATUS]\x1b[0m Listening for CamFlow data on {}".format(path))
+    skipped = 0
+    try:
+        while True:
+            connection, _ = server.accept()
+            f = connection.makefile('rb')
+            try:
+                skipped += read_records(f, graph, pb)
+            finally:
+                f.close()
+                connection.close()
+    finally:
+        server.close()
+        os.remove(path)
+    return skipped
+
+
+def terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert live CamFlow JSON from stdin or a UNIX socket to Unicorn base and stream graphs')
+    parser.add_argument('-i', '--input', help='input CamFlow data file path, or - for stdin (default is stdin)', default='-')
+    parser.add_argument('-u', '--socket', help='read CamFlow data from connections to a UNIX socket at this path instead of -i')
+    parser.add_argument('-b', '--base-size', help='the size (number of edges) of the base graph', type=int, required=True)
+    parser.add_argument('-B', '--base', help='output destination file path of the base graph', required=True)
+    parser.add_argument('-S', '--stream', help='output destination file path of the stream graph', required=True)
+    parser.add_argument('-t', '--jiffies', help='record CamFlow graph jiffies (default is false)', action='store_true')
+    parser.add_argument('-P', '--pending', help='maximum number of edges kept while waiting for their nodes; the oldest is dropped beyond that (default is 1000000)', type=int, default=1000000)
+    parser.add_argument('-q', '--queue', help='maximum number of output lines waiting to be written before reading the input is paused (default is 10000)', type=int, default=10000)
+    parser.add_argument('-v', '--verbose', help='verbose logging (default is false)', action='store_true')
+    parser.add_argument('-l', '--log', help='log file path (only valid is -v is set; default is debug.log)', default='debug.log')
+    parser.add_argument('-d', '--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + decoder.BACKENDS, default='auto')
+    parser.add_argument('--no-prefilter', dest='prefilter', help='decode every line instead of skipping lines that cannot hold nodes or edges by a substring test', action='store_false')
+    parser.add_argument('--node-store', help='how nodes are kept: a dictionary, compact hash tables of about 16 bytes per node (slower lookups), or compact hash tables that overflow to a file next to the stream graph (default is dict)', choices=NODE_STORES, default='dict')
+    parser.add_argument('--node-memory', help='maximum number of nodes kept in memory before the rest overflow to disk (only valid if --node-store is disk; default is 16777216)', type=int, default=1 << 24)
+    telemetry.add_arguments(parser)
+    args = parser.parse_args()
+
+    CONSOLE_ARGUMENTS = args
+    prepare.CONSOLE_ARGUMENTS = args
+
+    try:
+        decoder.use(args.decoder)
+    except ValueError as e:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m {}".format(e))
+        sys.exit(1)
+
+    if args.pending < 1 or args.queue < 1:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m -P and -q must be positive")
+        sys.exit(1)
+
+    if args.verbose:
+        logging.basicConfig(filename=args.log, level=logging.DEBUG)
+
+    # stop cleanly (writing out everything queued) on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, terminate)
+
+    writer = Writer(args.queue)
+    writer.start()
+    base = open(args.base, "w")
+    stream = open(args.stream, "w")
+    node_map = new_node_map(args.node_store, os.path.dirname(os.path.abspath(args.stream)), args.node_memory)
+    graph = LiveGraph(base, stream, args.base_size, args.pending, writer, node_map)
+    monitor = telemetry.new_telemetry(args)
+    if monitor:
+        # records arrive at the pace of CamFlow, so the clock is looked at on every update
+        graph.stage = monitor.stage("live", 1)
+        graph.stage.base_size = args.base_size
+
+    description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing live CamFlow data'
+    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    skipped = 0
+    try:
+        if args.socket:
+            skipped = serve(args.socket, graph, pb)
+        elif args.input == '-':
+            skipped = read_records(sys.stdin, graph, pb)
+        else:
+            with open(args.input, 'r') as f:
+                skipped = read_records(f, graph, pb)
+            f.close()
+    except KeyboardInterrupt:
+        pass
+    pb.close()
+    writer.close()
+    if not base.closed:
+        base.close()
+    stream.close()
+    if monitor:
+        graph.stage.close()
+        monitor.close()
+
+    prepare.report_skipped(skipped, pb.n, "nodes or edges")
+    print("\x1b[6;30;43m[INFO]\x1b[0m {} edges pending on unseen nodes at the end, {} dropped when -P was full; reading paused {} times for the writer".format(
+        len(graph.pending), graph.pending.dropped, writer.stalls))
+    print("\x1b[6;30;43m[INFO]\x1b[0m Node map: {}".format(memory_report(node_map)))
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(min(graph.edges, args.base_size), args.base))
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Stream graph of size {} is located at {}".format(max(graph.edges - args.base_size, 0), args.stream))
@@ -0,0 +1,225 @@
+import os
+import sys
+import mmap
+import ctypes
+import itertools
+import tempfile
+import xxhash
+
+
+# node stores selectable with --node-store: a plain dictionary, compact
+# hash tables in memory, or compact hash tables that overflow to disk
+NODE_STORES = ["dict", "compact", "disk"]
+# initial number of slots of a hash table (a power of 2)
+INITIAL_CAPACITY = 1 << 16
+# bytes per slot of a hash table: a 64-bit key and a 64-bit value
+SLOT_SIZE = 16
+
+
+def node_key(uid):
+    """64-bit key of a node with UUID @uid; the same value as
+    hashgen([uid]) in prepare.py, i.e., the encoded UUID."""
+    return xxhash.xxh64_intdigest(uid)
+
+
+class HashTable(object):
+    """Open-addressing (linear probing) hash table of nonzero 64-bit keys
+    and 64-bit values, stored in a flat array of @capacity slots (a power
+    of 2) of SLOT_SIZE bytes each: the key of slot i at index 2i and its
+    value at index 2i+1. A key of 0 marks an empty slot. The array is
+    in memory, or in a memory-mapped temporary file in @directory if
+    given, so that the operating system can page it out to disk."""
+    def __init__(self, capacity, directory=None):
+        self.capacity = capacity
+        self.mask = 2 * capacity - 1   # masks an index of the array; keys are at even indices
+        self.size = 0
+        self.file = None
+        self.map = None
+        if directory is None:
+            self.slots = (ctypes.c_uint64 * (2 * capacity))()
+        else:
+            self.file = tempfile.TemporaryFile(dir=directory)
+            os.ftruncate(self.file.fileno(), capacity * SLOT_SIZE)
+            self.map = mmap.mmap(self.file.fileno(), capacity * SLOT_SIZE)
+            self.slots = (ctypes.c_uint64 * (2 * capacity)).from_buffer(self.map)
+
+    def find(self, key):
+        """Return the index in the array of the slot of @key, or
+        of the empty slot where it would go."""
+        slots = self.slots
+        mask = self.mask
+        j = (key << 1) & mask
+        k = slots[j]
+        while k != key and k != 0:
+            j = (j + 2) & mask
+            k = slots[j]
+        return j
+
+    def get(self, key):
+        """Return the value of @key, or None if it is not in the table."""
+        slots = self.slots
+        mask = self.mask
+        j = (key << 1) & mask
+        k = slots[j]
+        while k != key:
+            if k == 0:
+                return None
+            j = (j + 2) & mask
+            k = slots[j]
+        return slots[j + 1]
+
+    def put(self, key, value):
+        """Set the value of @key to @value. The caller makes sure
+        the table does not fill up (see full)."""
+        j = self.find(key)
+        if self.slots[j] == 0:
+            self.slots[j] = key
+            self.size += 1
+        self.slots[j + 1] = value
+
+    def full(self):
+        """Whether the table should grow before another key is added;
+        a table is kept at most 3/4 full so that probes stay short."""
+        return (self.size + 1) * 4 > self.capacity * 3
+
+    def items(self):
+        """Generate the (key, value) pairs in the table."""
+        slots = self.slots
+        for i in range(self.capacity):
+            if slots[2 * i] != 0:
+                yield slots[2 * i], slots[2 * i + 1]
+
+    def grown(self, directory=None):
+        """Return a table twice as large with the same items, and close this one."""
+        table = HashTable(self.capacity * 2, directory)
+        for key, value in self.items():
+            table.put(key, value)
+        self.close()
+        return table
+
+    def nbytes(self):
+        return self.capacity * SLOT_SIZE
+
+    def close(self):
+        self.slots = None
+        if self.map is not None:
+            self.map.close()
+            self.file.close()
+            self.map = None
+            self.file = None
+
+
+class CompactNodeMap(object):
+    """Drop-in replacement of the node map (a dictionary) of prepare.py,
+    which maps a node UUID to (type, encoded UUID). Only the 64-bit
+    encoded UUID (see node_key) and the 64-bit type hash of each node are
+    kept, in an open-addressing HashTable of 16-byte slots, instead of
+    the UUID string, the type string, and a tuple per node. Lookups hash
+    the UUID again, trading some time for memory.
+
+    If @directory is given, at most @memory_nodes nodes are kept in the
+    memory table; any further node goes to a table in a memory-mapped
+    file in @directory (see HashTable)."""
+    def __init__(self, directory=None, memory_nodes=None):
+        self.memory = HashTable(INITIAL_CAPACITY)
+        self.directory = directory
+        self.memory_nodes = memory_nodes
+        self.disk = None
+        self.zero = None                # value of the key 0, which marks empty slots in the tables
+
+    def lookup(self, key):
+        if key == 0:
+            return self.zero
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+        return value
+
+    def __contains__(self, uid):
+        return self.lookup(node_key(uid)) is not None
+
+    def __getitem__(self, uid):
+        key = node_key(uid)
+        value = self.lookup(key)
+        if value is None:
+            raise KeyError(uid)
+        return str(value), key
+
+    def get(self, uid, default=None):
+        try:
+            return self[uid]
+        except KeyError:
+            return default
+
+    def __setitem__(self, uid, value):
+        """@value is (type, encoded UUID), as in the node map of prepare.py;
+        the UUID is encoded here if it is not (i.e., None)."""
+        key = value[1]
+        if key is None:
+            key = node_key(uid)
+        value = int(value[0])
+        if key == 0:
+            self.zero = value
+            return
+        j = self.memory.find(key)
+        if self.memory.slots[j] == key:
+            self.memory.slots[j + 1] = value
+        elif self.disk is not None and self.disk.get(key) is not None:
+            self.disk.put(key, value)
+        elif self.directory is None or self.memory.size < self.memory_nodes:
+            if self.memory.full():
+                self.memory = self.memory.grown()
+                self.memory.put(key, value)
+            else:
+                self.memory.slots[j] = key
+                self.memory.slots[j + 1] = value
+                self.memory.size += 1
+        else:
+            if self.disk is None:
+                self.disk = HashTable(INITIAL_CAPACITY, self.directory)
+            elif self.disk.full():
+                self.disk = self.disk.grown(self.directory)
+            self.disk.put(key, value)
+
+    def __len__(self):
+        return self.memory.size + (self.disk.size if self.disk is not None else 0) + (self.zero is not None)
+
+    def close(self):
+        self.memory.close()
+        if self.disk is not None:
+            self.disk.close()
+
+
+def new_node_map(store, directory=None, memory_nodes=None):
+    """Create an empty node map of the kind @store (one of NODE_STORES).
+    With "disk", nodes beyond the first @memory_nodes are kept in a
+    memory-mapped file in @directory."""
+    if store == "dict":
+        return dict()
+    if store == "compact":
+        return CompactNodeMap()
+    return CompactNodeMap(directory or tempfile.gettempdir(), memory_nodes)
+
+
+def memory_report(node_map):
+    """Describe the memory used by @node_map. The size of a dictionary is
+    estimated from a sample of its entries."""
+    nodes = len(node_map)
+    if isinstance(node_map, CompactNodeMap):
+        memory = node_map.memory.nbytes()
+        report = "{} nodes in {:.1f} MB of compact tables in memory ({:.1f} bytes per node in memory".format(
+            nodes, memory / 1048576.0, memory / float(max(node_map.memory.size, 1)))
+        if node_map.disk is not None:
+            report += ", {} more nodes in {:.1f} MB on disk".format(node_map.disk.size, node_map.disk.nbytes() / 1048576.0)
+        return report + ")"
+    memory = sys.getsizeof(node_map)
+    sample = 0
+    size = 0
+    for uid in itertools.islice(node_map, 1000):
+        value = node_map[uid]
+        size += sys.getsizeof(uid) + sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+        sample += 1
+    if sample:
+        memory += size * nodes // sample
+    return "{} nodes in about {:.1f} MB of a dictionary ({:.1f} bytes per node)".format(
+        nodes, memory / 1048576.0, memory / float(max(nodes, 1)))
@@ -1,37 +1,160 @@
+import os
 import sys
 import argparse
-import math
+import heapq
+import itertools
+import collections
+import tempfile
+import operator
 import tqdm
+import telemetry
+
+# node relabeling and base graph splits are shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+from provparser.partool.relabel import RELABEL_STORES, new_relabeler
+from provparser.partool.splits import parse_splits, split_size
 
 
 # make argparse arguments global
 CONSOLE_ARGUMENTS = None
+# runtime telemetry (see telemetry.py), or None
+TELEMETRY = None
+# maximum number of sorted runs on disk (see EdgeSorter) before they are merged into one
+MAX_RUNS = 64
+# number of edges relabeled at a time (see relabel)
+RELABEL_CHUNK = 4096
+
+
+class EdgeSorter(object):
+    """Sort edges (see read_edges) by their logical timestamps, edge[5].
+    Each edge is kept compactly as a tuple of its integer timestamp and
+    its fields joined by tabs, and sorted on the timestamp alone; edges
+    with the same timestamp keep the order in which they were added. At
+    most @budget edges are kept in memory: whenever the budget is full,
+    they are sorted and written to a temporary file in @directory (a
+    run), and the runs are merged at the end (external merge sort). If
+    the edges are added in order, nothing is sorted and runs are simply
+    concatenated."""
+    def __init__(self, budget, directory=None):
+        self.budget = budget
+        self.directory = directory
+        self.buffer = list()
+        self.runs = list()
+        self.count = 0
+        self.last = None                # timestamp of the last edge added
+        self.monotonic = True           # whether all edges were added in order
+        self.buffer_monotonic = True    # whether the edges in memory were added in order
+
+    def add(self, edge):
+        ts = long(edge[5])
+        if self.last is not None and ts < self.last:
+            self.monotonic = False
+            self.buffer_monotonic = False
+        self.last = ts
+        self.buffer.append((ts, "\t".join(edge)))
+        self.count += 1
+        if len(self.buffer) >= self.budget:
+            self.spill()
+
+    def spill(self):
+        """Write the edges in memory to a new sorted run."""
+        if not self.buffer_monotonic:
+            self.buffer.sort(key=operator.itemgetter(0))
+        self.buffer_monotonic = True
+        run = tempfile.TemporaryFile(mode="w+", dir=self.directory)
+        for ts, packed in self.buffer:
+            run.write(packed + "\n")
+        run.seek(0)
+        self.runs.append(run)
+        self.buffer = list()
+        if len(self.runs) >= MAX_RUNS:
+            # merge the runs so far into one, so that not too many files are open
+            run = tempfile.TemporaryFile(mode="w+", dir=self.directory)
+            for packed in self.merge():
+                run.write(packed + "\n")
+            run.seek(0)
+            self.runs.append(run)
+
+    def __len__(self):
+        return self.count
+
+    def edges(self):
+        """Return a generator of all edges added so far in sorted order (once)."""
+        if self.monotonic:
+            print("\x1b[6;30;43m[INFO]\x1b[0m Edges are already in order; skipping the sort")
+        if not self.runs:
+            if not self.buffer_monotonic:
+                self.buffer.sort(key=operator.itemgetter(0))
+            buffer, self.buffer = self.buffer, list()
+            return (packed.split("\t") for ts, packed in buffer)
+        if self.buffer:
+            self.spill()
+        if not self.monotonic:
+            print("\x1b[6;30;43m[INFO]\x1b[0m Merging {} sorted runs of at most {} edges".format(len(self.runs), self.budget))
+        return (packed.split("\t") for packed in self.merge())
+
+    def merge(self):
+        """Merge all runs and generate their packed edges in sorted order.
+        Ties are broken by run and then by position in the run, so that
+        the merge is stable. Runs of edges added in order are just
+        concatenated."""
+        runs, self.runs = self.runs, list()
+        if self.monotonic:
+            for run in runs:
+                for line in run:
+                    yield line.rstrip("\n")
+        else:
+            for ts, i, pos, packed in heapq.merge(*[read_run(i, run) for i, run in enumerate(runs)]):
+                yield packed
+        for run in runs:
+            run.close()
+
+
+def read_run(i, run):
+    """Generate the edges of the @i-th sorted run @run (see EdgeSorter)
+    as tuples (timestamp, @i, position in the run, packed edge)."""
+    for pos, line in enumerate(run):
+        packed = line.rstrip("\n")
+        yield long(packed.split("\t", 6)[5]), i, pos, packed
 
 
-def compare_edges(a, b):
-    """Compare two edges @a and @b based on logical timestamps.
-    As seen below, edge[5] = edge_logical_timestamp."""
-    if long(a[5]) > long(b[5]):
-        return 1
+def check_arguments(args):
+    """Check the output options in @args and return the list of splits
+    (see parse_splits) to write; exit if the options are inconsistent."""
+    if args.stats and not args.interval:
+        print("You must set -I if you choose to record runtime graph generation performance")
+        exit(1)
+    if args.splits:
+        splits = parse_splits(args.splits)
+        if "{split}" not in args.base or "{split}" not in args.stream or (args.stats and "{split}" not in args.stats_file):
+            print("\x1b[6;30;41m[ERROR]\x1b[0m -B and -S (and -f if -s is set) must contain {split} with -p")
+            exit(1)
+    elif args.base_size is not None:
+        splits = [str(args.base_size)]
     else:
-        return -1
+        splits = ["10%"]                                    # default to 10% of the total edges in the graph
+    if getattr(args, "window", None) is not None:
+        if args.window < 0:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m -w must not be negative")
+            exit(1)
+        if any(split.endswith("%") for split in splits):
+            print("\x1b[6;30;41m[ERROR]\x1b[0m With -w, the total number of edges is not known in advance; set the base graph size with -b (or sizes in number of edges with -p)")
+            exit(1)
+    return splits
 
 
-def read_single_graph(file_name):
+def read_edges(file_name):
     """Parsing edgelist from the output of prepare.py.
     The format from prepare.py looks like:
     <source_node_id> \t <destination_node_id> \t <hashed_source_type>:<hashed_destination_type>:<hashed_edge_type>:<edge_logical_timestamp>[:<timestamp_stats>]
     The last '<timestamp_stats>' may or may not exist depending on whether the -s/-t option is set when running prepare.py.
-    Returned from this funtion is a list of edges, each of which is itself a list containing:
-    [source_node_id, destination_node_id, source_node_type, destination_node_type, edge_type, logical_timestamp, [timestamp,] source_node_seen, destination_node_seen]
+    This function generates the edges in file order, each of which is itself a list containing:
+    [source_node_id, destination_node_id, source_node_type, destination_node_type, edge_type, logical_timestamp, [timestamp]]
     The `timestamp` may or may not exist.
     """
-    map_id = dict()	# maps original IDs to new IDs, which always start from 0
-    new_id = 0
-    graph = list()      # list of parsed edges
-    
     description = '\x1b[6;30;42m[STATUS]\x1b[0m Sorting edges in CamFlow data from {}'.format(file_name)
     pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" edges")
+    stage = TELEMETRY.stage("read") if TELEMETRY else None
     with open(file_name, 'r') as f:
         for line in f:
             pb.update()                                     # for progress tracking
@@ -57,41 +180,208 @@ def read_single_graph(file_name):
                     edge.append(ts)                             # optional: edge[6] = timestamp_stats
                 elif CONSOLE_ARGUMENTS.jiffies:
                     edge.append(ts)                             # optional: edge[6] = jiffies
-
-                graph.append(edge)
             except:
                 print("{}".format(line))
+                continue
+            if stage:
+                stage.update(1, 1)
+            yield edge
     f.close()
     pb.close()
-    # sort the graph edges based on logical timestamps
-    graph.sort(compare_edges)
+    if stage:
+        stage.close()
+
+
+def relabel(edges, file_name, progress=True, stage=None):
+    """Relabel the nodes of the sorted @edges (see read_edges) of the graph
+    from @file_name with new IDs, which always start from 0. This function
+    generates the edges, each of which is itself a list containing:
+    [source_node_id, destination_node_id, source_node_type, destination_node_type, edge_type, logical_timestamp, [timestamp,] source_node_seen, destination_node_seen]
+    Progress is shown unless @progress is False (e.g., if the edges are
+    still being read, which shows its own progress). The edges and new
+    nodes are counted in the telemetry @stage, if any, once written.
+    """
+    nodes = new_relabeler(CONSOLE_ARGUMENTS.relabel_store)	# new IDs always start from 0
 
     description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing edges in CamFlow data (final stage) from {}'.format(file_name)
-    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" edge")
-    for edge in graph:
-        pb.update()
-        if edge[0] in map_id:                               # check if source ID has been seen before
-            edge[0] = map_id[edge[0]]
-            edge.append("0")                                # edge[6/7] = whether source node has been seen before
-        else:
-            edge.append("1")
-            map_id[edge[0]] = str(new_id)
-            edge[0] = str(new_id)
-            new_id = new_id + 1
-
-        if edge[1] in map_id:                               # check if destination ID has been seen before
-            edge[1] = map_id[edge[1]]
-            edge.append("0")                                # edge[7/8] = whether destination node has been seen before
-        else:
-            edge.append("1")
-            map_id[edge[1]] = str(new_id)
-            edge[1] = str(new_id)
-            new_id = new_id + 1
+    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" edge", disable=not progress)
+    edges = iter(edges)
+    while True:
+        chunk = list(itertools.islice(edges, RELABEL_CHUNK))
+        if not chunk:
+            break
+        pb.update(len(chunk))
+        src_ids, dst_ids, src_seen, dst_seen = nodes.relabel_columns([edge[0] for edge in chunk], [edge[1] for edge in chunk])
+        for edge, src_id, dst_id, src_new, dst_new in zip(chunk, src_ids, dst_ids, src_seen, dst_seen):
+            edge[0] = src_id
+            edge[1] = dst_id
+            edge.append(src_new)                            # edge[6/7] = whether source node has been seen before
+            edge.append(dst_new)                            # edge[7/8] = whether destination node has been seen before
+            yield edge
+        if stage:
+            if CONSOLE_ARGUMENTS.stats:
+                stage.graph_ts = max(stage.graph_ts, max(float(edge[6]) for edge in chunk))
+            stage.update(0, len(chunk), src_seen.count("1") + dst_seen.count("1"))
 
     pb.close()
+
+
+def reorder(edges, window):
+    """Generate @edges (see read_edges) in the order of their logical
+    timestamps, assuming that each edge is out of place by at most @window
+    positions, as in the output of prepare.py (without -p or -w). Edges are
+    held in a window of @window edges and emitted as soon as no later edge
+    may precede them: while the edges arrive in order, the window is a
+    FIFO queue and nothing is sorted; from the first edge out of order on,
+    it is a min-heap. Edges with the same timestamp keep their order. If
+    an edge arrives after an edge with a larger timestamp has already been
+    emitted, the window is too small: we report it and exit."""
+    last = None             # timestamp of the last edge emitted
+    fifo = collections.deque()
+    heap = None
+    for seq, edge in enumerate(edges):
+        ts = long(edge[5])
+        if last is not None and ts < last:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m Edge with logical timestamp {} arrived after an edge with timestamp {} was written; it is out of place by more than the reorder window (-w {}). Set a larger -w, or do not set -w to sort the whole graph.".format(ts, last, window))
+            exit(1)
+        item = (ts, seq, edge)
+        if heap is None:
+            if fifo and ts < fifo[-1][0]:
+                heap = list(fifo)   # a sorted list is already a heap
+                fifo = None
+                heapq.heappush(heap, item)
+                if len(heap) > window:
+                    last, _, edge = heapq.heappop(heap)
+                    yield edge
+            else:
+                fifo.append(item)
+                if len(fifo) > window:
+                    last, _, edge = fifo.popleft()
+                    yield edge
+        elif len(heap) >= window:
+            last, _, edge = heapq.heappushpop(heap, item)
+            yield edge
+        else:
+            heapq.heappush(heap, item)
+    if heap is None:
+        for ts, _, edge in fifo:
+            yield edge
+    else:
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+
+def new_sorter():
+    """Create an EdgeSorter with the memory budget of -M, whose runs are
+    written to the directory of the base graph."""
+    return EdgeSorter(CONSOLE_ARGUMENTS.memory_edges, os.path.dirname(os.path.abspath(CONSOLE_ARGUMENTS.base)))
+
+
+def read_single_graph(file_name):
+    """Read the edgelist in @file_name, the output of prepare.py
+    (see read_edges), into an EdgeSorter and return it."""
+    graph = new_sorter()
+    for edge in read_edges(file_name):
+        graph.add(edge)
     return graph
 
 
+def sorted_edges(graph):
+    """Return the edges of the EdgeSorter @graph in sorted order (see
+    EdgeSorter.edges), timed as the sort stage in the telemetry."""
+    stage = TELEMETRY.stage("sort") if TELEMETRY else None
+    edges = graph.edges()
+    if stage:
+        stage.update(0, len(graph))
+        stage.close()
+    return edges
+
+
+def write_stage(graph, total, splits, file_name, progress=True):
+    """Relabel the sorted edges @graph (see relabel) and write them (see
+    write_graphs), timed as the write stage in the telemetry."""
+    stage = None
+    if TELEMETRY:
+        stage = TELEMETRY.stage("write", 1)            # updated once per chunk of edges (see relabel)
+        stage.base_size = split_size(splits[0], total)      # base and stream edges are those of the first split
+    write_graphs(relabel(graph, file_name, progress, stage), total, splits, file_name)
+    if stage:
+        stage.close()
+
+
+def write_graphs(graph, total, splits, file_name):
+    """Write a base/stream graph pair of the sorted and relabeled edges
+    @graph (see relabel), @total of them, from @file_name for each split
+    in @splits (see parse_splits), all in a single pass over the graph, to
+    the files given by -B and -S (and the timestamps to -f if -s is set).
+    @total may be None (e.g., with -w) if no split is a percentage."""
+    args = CONSOLE_ARGUMENTS
+    outputs = list()
+    for split in splits:
+        output = dict()
+        output["split"] = split
+        output["base_size"] = split_size(split, total)
+        output["base"] = args.base.format(split=split) if args.splits else args.base
+        output["stream"] = args.stream.format(split=split) if args.splits else args.stream
+        output["base_file"] = open(output["base"], "w")
+        output["stream_file"] = open(output["stream"], "w")
+        if args.stats:
+            # for runtime performance eval.
+            output["stats_file"] = args.stats_file.format(split=split) if args.splits else args.stats_file
+            output["ts_file"] = open(output["stats_file"], "w")
+            # we use this flag to make sure we record the time it takes to create base graph only once.
+            output["recorded_once"] = False
+            output["edge_cnt"] = 0
+        outputs.append(output)
+
+    num = -1
+    for num, edge in enumerate(graph):
+        base_line = None
+        stream_line = None
+        for output in outputs:
+            if num < output["base_size"]:
+                if base_line is None:
+                    if args.jiffies:
+                        base_line = "{} {} {}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[5], edge[6])
+                    else:
+                        base_line = "{} {} {}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[5])
+                output["base_file"].write(base_line)
+            else:
+                if stream_line is None:
+                    if args.stats:
+                        stream_line = "{} {} {}:{}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[7], edge[8], edge[5], edge[6])
+                    elif args.jiffies:
+                        stream_line = "{} {} {}:{}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[7], edge[8], edge[5], edge[6])
+                    else:
+                        stream_line = "{} {} {}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[6], edge[7], edge[5])
+                output["stream_file"].write(stream_line)
+            if args.stats:
+                output["edge_cnt"] += 1
+                if not output["recorded_once"] and output["edge_cnt"] == output["base_size"]:
+                    output["ts_file"].write("{}\n".format(edge[6]))
+                    output["edge_cnt"] = 0
+                    output["recorded_once"] = True
+                if output["edge_cnt"] == args.interval:
+                    output["ts_file"].write("{}\n".format(edge[6]))
+                    output["edge_cnt"] = 0
+    total = num + 1
+    if args.stats and total:
+        # record time for the last round of edges
+        for output in outputs:
+            output["ts_file"].write("{}\n".format(edge[6]))
+
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {} is processed.".format(file_name))
+    for output in outputs:
+        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(output["base_size"], output["base"]))
+        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Stream graph of size {} is located at {}".format(total - output["base_size"], output["stream"]))
+        if args.stats:
+            print("\x1b[6;30;42m[SUCCESS]\x1b[0m Time information is located at {}".format(output["stats_file"]))
+        output["base_file"].close()
+        output["stream_file"].close()
+        if args.stats:
+            output["ts_file"].close()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-i', '--input', help='input data file path (from the output of prepare.py)', required=True)
@@ -102,64 +392,23 @@ if __name__ == "__main__":
     parser.add_argument('-I', '--interval', help='the interval (in terms of number of edges) to record time (you must set this value if -s is set)', type=int)
     parser.add_argument('-f', '--stats-file', help='file path to record the statistics (only valid if -s is set; default is ts.txt)', default='ts.txt')
     parser.add_argument('-t', '--jiffies', help='record CamFlow graph jiffies; -s can overwrite this option', action='store_true')
+    parser.add_argument('-p', '--splits', help='write a base/stream graph pair for each of these base graph sizes in a single pass, e.g., "1%%,5%%,10%%,4000" (-B and -S, and -f if -s is set, must contain {split}; overrides -b)')
+    parser.add_argument('-w', '--window', help='instead of sorting the whole graph, reorder edges in a window of this many edges and write them as soon as they are in order; fails if an edge is out of place by more (requires -b, or sizes in number of edges with -p)', type=int)
+    parser.add_argument('-r', '--relabel-store', help='how new node IDs are kept: a dictionary of the original IDs, or a compact table of their 64-bit values, which takes less memory but more time (default is dict)', choices=RELABEL_STORES, default='dict')
+    parser.add_argument('-M', '--memory-edges', help='maximum number of edges sorted in memory; larger graphs are sorted in runs on disk, next to the base graph, and merged (default is 10000000)', type=int, default=10000000)
+    telemetry.add_arguments(parser)
     args = parser.parse_args()
 
     CONSOLE_ARGUMENTS = args
 
-    graph = read_single_graph(args.input)
-    # default to 10% of the total edges in the graph
-    base_graph_size = int(math.ceil(len(graph) * 0.1))
-    if args.base_size is not None:
-        base_graph_size = args.base_size
-    stream_graph_size = len(graph) - base_graph_size
-    
-    base_file = open(args.base, "w")
-    stream_file = open(args.stream, "w")
-
-    if args.stats:
-        if not args.interval:
-            print("You must set -I if you choose to record runtime graph generation performance")
-            exit(1)
-        # for runtime performance eval.
-        ts_file = open(args.stats_file, "w")
-        # we use this flag to make sure we record the time it takes to create base graph only once.
-        recorded_once = False
-        edge_cnt = 0
-        
-    for num, edge in enumerate(graph):
-        if num < base_graph_size:
-            if args.jiffies:
-                base_file.write("{} {} {}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[5], edge[6]))
-            else:
-                base_file.write("{} {} {}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[5]))
-	else:
-            if args.stats:
-                stream_file.write("{} {} {}:{}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[7], edge[8], edge[5], edge[6]))
-            elif args.jiffies:
-                stream_file.write("{} {} {}:{}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[7], edge[8], edge[5], edge[6]))
-            else:
-                stream_file.write("{} {} {}:{}:{}:{}:{}:{}\n".format(edge[0], edge[1], edge[2], edge[3], edge[4], edge[6], edge[7], edge[5]))
-        if args.stats:
-            edge_cnt += 1
-            if not recorded_once and edge_cnt == base_graph_size:
-                ts_file.write("{}\n".format(edge[6]))
-                edge_cnt = 0
-                recorded_once = True
-            if edge_cnt == args.interval:
-                ts_file.write("{}\n".format(edge[6]))
-                edge_cnt = 0
-            # record time for the last round of edges
-            if num == len(graph) - 1:
-                ts_file.write("{}\n".format(edge[6]))
-    
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {} is processed.".format(args.input))
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(base_graph_size, args.base))
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Stream graph of size {} is located at {}".format(stream_graph_size, args.stream))
-    if args.stats:
-        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Time information is located at {}".format(args.stats_file))
-
-    base_file.close()
-    stream_file.close()
-    if args.stats:
-        ts_file.close()
-
+    splits = check_arguments(args)
+    TELEMETRY = telemetry.new_telemetry(args)
+    if args.window is not None:
+        # stream the edges through the reorder window instead of sorting the whole graph
+        graph = reorder(read_edges(args.input), args.window)
+        write_stage(graph, None, splits, args.input, False)
+    else:
+        graph = read_single_graph(args.input)
+        write_stage(sorted_edges(graph), len(graph), splits, args.input)
+    if TELEMETRY:
+        TELEMETRY.close()
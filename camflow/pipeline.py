@@ -0,0 +1,74 @@
+import os
+import sys
+import argparse
+import logging
+
+import prepare
+import parse
+import telemetry
+from prepare import decoder
+from nodestore import NODE_STORES, new_node_map
+
+
+def prepared_edges(inputfile, node_map, noencode):
+    """Generate the edges of CamFlow data file @inputfile as parse.read_edges
+    would read them from the output of prepare.py, without writing it."""
+    for edge in prepare.generate_edges(inputfile, node_map):
+        yield prepare.edge_fields(edge, node_map, noencode)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert CamFlow JSON to Unicorn base and stream graphs in a single process (prepare.py followed by parse.py, without the intermediate edgelist)')
+    parser.add_argument('-i', '--input', help='input CamFlow data file path', required=True)
+    parser.add_argument('-b', '--base-size', help='the size of the base graph (default to 10%% of the total graph size)', type=int)
+    parser.add_argument('-B', '--base', help='output destination file path of the base graph', required=True)
+    parser.add_argument('-S', '--stream', help='output destination file path of the stream graph', required=True)
+    parser.add_argument('-p', '--splits', help='write a base/stream graph pair for each of these base graph sizes in a single pass, e.g., "1%%,5%%,10%%,4000" (-B and -S, and -f if -s is set, must contain {split}; overrides -b)')
+    parser.add_argument('-s', '--stats', help='record some statistics of the CamFlow graph data and runtime graph generation speed (default is false)', action='store_true')
+    parser.add_argument('-I', '--interval', help='the interval (in terms of number of edges) to record time (you must set this value if -s is set)', type=int)
+    parser.add_argument('-f', '--stats-file', help='file path to record the timestamps (only valid if -s is set; default is ts.txt)', default='ts.txt')
+    parser.add_argument('-F', '--graph-stats-file', help='file path to record the statistics of the CamFlow graph data (only valid if -s is set; default is stats.csv)', default='stats.csv')
+    parser.add_argument('-t', '--jiffies', help='record CamFlow graph jiffies; -s can overwrite this option', action='store_true')
+    parser.add_argument('-v', '--verbose', help='verbose logging (default is false)', action='store_true')
+    parser.add_argument('-l', '--log', help='log file path (only valid is -v is set; default is debug.log)', default='debug.log')
+    parser.add_argument('-d', '--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + decoder.BACKENDS, default='auto')
+    parser.add_argument('--no-prefilter', dest='prefilter', help='decode every line instead of skipping lines that cannot hold nodes (or edges) by a substring test', action='store_false')
+    parser.add_argument('--node-store', help='how nodes are kept (see prepare.py; default is dict)', choices=NODE_STORES, default='dict')
+    parser.add_argument('--node-memory', help='maximum number of nodes kept in memory before the rest overflow to disk (only valid if --node-store is disk; default is 16777216)', type=int, default=1 << 24)
+    parser.add_argument('-r', '--relabel-store', help='how new node IDs are kept (see parse.py; default is dict)', choices=parse.RELABEL_STORES, default='dict')
+    parser.add_argument('-M', '--memory-edges', help='maximum number of edges sorted in memory; larger graphs are sorted in runs on disk, next to the base graph, and merged (default is 10000000)', type=int, default=10000000)
+    telemetry.add_arguments(parser)
+    args = parser.parse_args()
+
+    prepare.CONSOLE_ARGUMENTS = args
+    parse.CONSOLE_ARGUMENTS = args
+
+    splits = parse.check_arguments(args)
+    try:
+        decoder.use(args.decoder)
+    except ValueError as e:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m {}".format(e))
+        sys.exit(1)
+
+    if args.verbose:
+        logging.basicConfig(filename=args.log, level=logging.DEBUG)
+
+    # the stages of both prepare.py and parse.py are in the same telemetry
+    prepare.TELEMETRY = parse.TELEMETRY = telemetry.new_telemetry(args)
+    node_map = new_node_map(args.node_store, os.path.dirname(os.path.abspath(args.base)), args.node_memory)
+    prepare.parse_all_nodes(args.input, node_map)
+    # node IDs only need to be unique before they are relabeled,
+    # so the encoded UUIDs are used as in prepare.py
+    graph = parse.new_sorter()
+    for edge in prepared_edges(args.input, node_map, False):
+        graph.add(edge)
+    total_nodes = len(node_map)
+    node_map = None                 # not needed any more; free it before sorting
+    parse.write_stage(parse.sorted_edges(graph), len(graph), splits, args.input)
+
+    if args.stats:
+        stats = open(args.graph_stats_file, "a+")
+        stats.write("{},{},{}\n".format(args.input, total_nodes, len(graph)))
+        stats.close()
+    if parse.TELEMETRY:
+        parse.TELEMETRY.close()
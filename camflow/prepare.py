@@ -6,10 +6,44 @@ import logging
 import xxhash
 import time
 import datetime
+import tempfile
+import shutil
+import resource
+import multiprocessing
 import tqdm
+import telemetry
+
+# the JSON decoding layer is shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+from provparser.partool import decoder
+from nodestore import NODE_STORES, new_node_map, memory_report
 
 # make argparse arguments global
 CONSOLE_ARGUMENTS = None
+# runtime telemetry (see telemetry.py), or None
+TELEMETRY = None
+# CamFlow relations (edges) with the fields of their source node, destination
+# node, and logical timestamp; a new kind of relation only needs an entry here
+RELATIONS = [
+    ("used", "prov:entity", "prov:activity", "cf:id"),
+    ("wasGeneratedBy", "prov:activity", "prov:entity", "cf:id"),
+    ("wasInformedBy", "prov:informant", "prov:informed", "cf:id"),
+    ("wasDerivedFrom", "prov:usedEntity", "prov:generatedEntity", "cf:id"),
+    ("wasAssociatedWith", "prov:agent", "prov:activity", "cf:id"),
+]
+# top-level keys (quoted as in the JSON text) of the records holding nodes and edges
+NODE_KEYS = ['"activity"', '"entity"']
+EDGE_KEYS = ['"{}"'.format(relation) for relation, _, _, _ in RELATIONS]
+# memoized edge type hashes (see edgegen) and the number of hashes they saved
+EDGE_TYPES = dict()
+EDGE_TYPE_HITS = 0
+# converted "cf:date" values (see date_to_ts), the maximum number of them kept, and the last one
+DATE_CACHE = dict()
+DATE_CACHE_SIZE = 65536
+LAST_DATE = None
+LAST_TS = None
+# node map of the edge workers with -w, inherited from the parent when the workers are forked
+WORKER_NODE_MAP = None
 
 def hashgen(l):
     """Generate a single hash value from a list. @l is a list of
@@ -51,29 +85,68 @@ def edgegen(edge):
     """Generate a single hash value for a CamFlow edge. We
     hash type information and flags. @edge is the CamFlow
     edge data, parsed as a dictionary. This function returns
-    a single hashed integer value of the edge."""
-    l = list()
+    a single hashed integer value of the edge. Since there are
+    only a few distinct types and flags, hash values are
+    memoized in EDGE_TYPES."""
+    global EDGE_TYPE_HITS
     assert(edge["prov:type"])               # CamFlow edge must contain "prov:type" field
-    l.append(edge["prov:type"])
     if "cf:flags" in edge:
-        l.append(edge["cf:flags"])
+        key = (edge["prov:type"], edge["cf:flags"])
     else:
-        l.append("N/A")
-    return hashgen(l)
+        key = (edge["prov:type"], "N/A")
+    value = EDGE_TYPES.get(key)
+    if value is None:
+        value = hashgen(key)
+        EDGE_TYPES[key] = value
+    else:
+        EDGE_TYPE_HITS += 1
+    return value
+
 
+def may_contain(line, keys):
+    """Cheap test of whether the JSON string @line may have one of the
+    @keys, without decoding it. A line that fails the test cannot hold
+    any of them; a line that passes still might not. Always true if the
+    prefilter is turned off (--no-prefilter)."""
+    if not CONSOLE_ARGUMENTS.prefilter:
+        return True
+    for key in keys:
+        if key in line:
+            return True
+    return False
 
-def parse_nodes(json_string, node_map):
+
+def report_skipped(skipped, total, what):
+    """Report the number of lines the prefilter @skipped out of @total lines read."""
+    if CONSOLE_ARGUMENTS.prefilter:
+        print("\x1b[6;30;43m[INFO]\x1b[0m Prefilter skipped {} of {} lines without {}".format(skipped, total, what))
+
+
+def parse_nodes(json_string, node_map, encode=True):
     """Parse a CamFlow JSON string that may contain nodes ("activity" or "entity").
     Parsed nodes populate @node_map, which is a dictionary that maps the node's UID,
     which is assigned by CamFlow to uniquely identify a node object, to a hashed
-    value (in str) which represents the 'type' of the node. """
+    value (in str) which represents the 'type' of the node and the encoded UID
+    (i.e., the hashed UID), so that neither is hashed again for every edge.
+    The encoded UID is None unless @encode is set (see add_nodes).
+    This function returns the list of the UIDs of the nodes added. """
     try:
         # use "ignore" if non-decodeable exists in the @json_string
-        json_object = json.loads(json_string.decode("utf-8","ignore"))
+        json_object = decoder.loads(json_string.decode("utf-8","ignore"))
     except Exception as e:
         print("Exception ({}) occurred when parsing a node in JSON:".format(e))
         print(json_string)
         exit(1)
+    return add_nodes(json_object, node_map, encode)
+
+
+def add_nodes(json_object, node_map, encode=True):
+    """Add the nodes in a parsed CamFlow JSON object @json_object to
+    @node_map (see parse_nodes) and return the list of their UIDs.
+    UIDs are only encoded if @encode is set, i.e., unless the output
+    keeps the original UIDs (-n); compact node maps encode them anyway,
+    as their keys."""
+    added = list()
     if "activity" in json_object:
         activity = json_object["activity"]
         for uid in activity:
@@ -84,7 +157,8 @@ def parse_nodes(json_string, node_map):
                     if CONSOLE_ARGUMENTS.verbose:
                         logging.debug("skipping a problematic activity node with no 'prov:type': {}".format(uid))
                 else:
-                    node_map[uid] = str(nodegen(activity[uid]))
+                    node_map[uid] = (str(nodegen(activity[uid])), hashgen([uid]) if encode else None)
+                    added.append(uid)
 
     if "entity" in json_object:
         entity = json_object["entity"]
@@ -94,23 +168,100 @@ def parse_nodes(json_string, node_map):
                     if CONSOLE_ARGUMENTS.verbose:
                         logging.debug("skipping a problematic entity node with no 'prov:type': {}".format(uid))
                 else:
-                    node_map[uid] = str(nodegen(entity[uid]))
+                    node_map[uid] = (str(nodegen(entity[uid])), hashgen([uid]) if encode else None)
+                    added.append(uid)
+    return added
 
 
-def parse_all_nodes(filename, node_map):
+def parse_all_nodes(filename, node_map, encode=True):
     """Parse all nodes in CamFlow data. @filename is the file path of
     the CamFlow data to parse. @node_map contains the mappings of all
-    CamFlow nodes to their hashed attributes. """
+    CamFlow nodes to their hashed attributes; UIDs are encoded only if
+    @encode is set (see add_nodes). """
     description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing nodes in CamFlow data from {}'.format(filename)
     pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    stage = TELEMETRY.stage("nodes") if TELEMETRY else None
+    skipped = 0
     with open(filename, 'r') as f:
         # each line in CamFlow data could contain multiple
         # provenance nodes, we call @parse_nodes routine.
         for line in f:
             pb.update()                 # for progress tracking
-            parse_nodes(line, node_map)
+            if not may_contain(line, NODE_KEYS):
+                skipped += 1
+                if stage:
+                    stage.update(1)
+                continue
+            added = parse_nodes(line, node_map, encode)
+            if stage:
+                stage.update(1, 0, len(added))
     f.close()
     pb.close()
+    if stage:
+        stage.close()
+    report_skipped(skipped, pb.n, "nodes")
+
+
+def relation_edges(json_object, node_map=None, verbose=False):
+    """Generate the edges of all relations in RELATIONS from a parsed CamFlow
+    JSON object @json_object, as tuples (relation, uid, edge, srcUUID, dstUUID,
+    timestamp, date, jiffies), where @edge is the CamFlow edge data, @timestamp
+    its logical timestamp, and @date its "cf:date". Each field is fetched once.
+    Edges without a type, source or destination UUID, or date are skipped,
+    and so are edges with a node not in @node_map (unless it is None). An edge
+    without a logical timestamp or jiffies is still generated (with None), as
+    it counts towards the smallest timestamp (-s), but must not be written out.
+    Skipped edges are logged if @verbose is set."""
+    for relation, src_field, dst_field, ts_field in RELATIONS:
+        edges = json_object.get(relation)
+        if edges is None:
+            continue
+        for uid in edges:
+            edge = edges[uid]
+            get = edge.get
+            edgetype = get("prov:type")
+            if edgetype is None:
+                # an edge must have a type; if not, we will
+                # have to skip the edge. Log this issue if
+                # verbose is set.
+                if verbose:
+                    logging.debug("edge ({}) record without type: {}".format(relation, uid))
+                continue
+            srcUUID = get(src_field)
+            dstUUID = get(dst_field)
+            # an edge's source and destination node must exist
+            # (in @node_map as well); if not, we will have to skip
+            # the edge. Log this issue if verbose is set.
+            if srcUUID is None:
+                if verbose:
+                    logging.debug("edge ({}/{}) record without source UUID: {}".format(relation, edgetype, uid))
+                continue
+            if dstUUID is None:
+                if verbose:
+                    logging.debug("edge ({}/{}) record without destination UUID: {}".format(relation, edgetype, uid))
+                continue
+            if node_map is not None:
+                if srcUUID not in node_map:
+                    if verbose:
+                        logging.debug("edge ({}/{}) record with an unseen srcUUID: {}".format(relation, edgetype, uid))
+                    continue
+                if dstUUID not in node_map:
+                    if verbose:
+                        logging.debug("edge ({}/{}) record with an unseen dstUUID: {}".format(relation, edgetype, uid))
+                    continue
+            date = get("cf:date")
+            if date is None:
+                if verbose:
+                    logging.debug("edge ({}) record without timestamp: {}".format(relation, uid))
+                continue
+            # the logical timestamp is used to order edges
+            timestamp = get(ts_field)
+            if timestamp is None and verbose:
+                logging.debug("edge ({}) record without logical timestamp: {}".format(relation, uid))
+            jiffies = get("cf:jiffies")
+            if jiffies is None and verbose:
+                logging.debug("edge ({}) record without jiffies: {}".format(relation, uid))
+            yield relation, uid, edge, srcUUID, dstUUID, timestamp, date, jiffies
 
 
 def parse_all_edges(inputfile, outputfile, node_map, noencode):
@@ -125,512 +276,500 @@ def parse_all_edges(inputfile, outputfile, node_map, noencode):
     If -s is set, each line would look like:
         <source_node_id> \t <destination_node_id> \t <hashed_source_type>:<hashed_destination_type>:<hashed_edge_type>:<edge_logical_timestamp>:<timestamp_stats>"""
     total_edges = 0
+    output = open(outputfile, "w+")
+    for edge in generate_edges(inputfile, node_map):
+        total_edges += 1
+        write_edge(output, edge, node_map, noencode)
+    output.close()
+    return total_edges
+
+
+def generate_edges(inputfile, node_map):
+    """Generate all valid edges from CamFlow data file @inputfile, in file
+    order, as lists [relation, uid, srcUUID, dstUUID, edgetype, timestamp,
+    adjusted_ts, jiffies, True] (see write_edge). Before this function is
+    called, parse_all_nodes should be called to populate the @node_map."""
     smallest_timestamp = None
     # scan through the entire file to find the smallest timestamp from all the edges.
     # this step is only needed if we need to add some statistical information.
     if CONSOLE_ARGUMENTS.stats:
         description = '\x1b[6;30;42m[STATUS]\x1b[0m Scanning edges in CamFlow data from {}'.format(inputfile)
         pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+        stage = TELEMETRY.stage("scan") if TELEMETRY else None
         with open(inputfile, 'r') as f:
             for line in f:
                 pb.update()
-                json_object = json.loads(line.decode("utf-8","ignore"))
- 
-                if "used" in json_object:
-                    used = json_object["used"]
-                    for uid in used:
-                        if "prov:type" not in used[uid]:
-                            continue
-                        if "cf:date" not in used[uid]:
-                            continue
-                        if "prov:entity" not in used[uid]:
-                            continue
-                        if "prov:activity" not in used[uid]:
-                            continue
-                        srcUUID = used[uid]["prov:entity"]
-                        dstUUID = used[uid]["prov:activity"]
-                        if srcUUID not in node_map:
-                            continue
-                        if dstUUID not in node_map:
-                            continue
-                        timestamp_str = used[uid]["cf:date"]
-                        ts = time.mktime(datetime.datetime.strptime(timestamp_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                        if smallest_timestamp == None or ts < smallest_timestamp:
-                            smallest_timestamp = ts
-
-                if "wasGeneratedBy" in json_object:
-                    wasGeneratedBy = json_object["wasGeneratedBy"]
-                    for uid in wasGeneratedBy:
-                        if "prov:type" not in wasGeneratedBy[uid]:
-                            continue
-                        if "cf:date" not in wasGeneratedBy[uid]:
-                            continue
-                        if "prov:entity" not in wasGeneratedBy[uid]:
-                            continue
-                        if "prov:activity" not in wasGeneratedBy[uid]:
-                            continue
-                        srcUUID = wasGeneratedBy[uid]["prov:activity"]
-                        dstUUID = wasGeneratedBy[uid]["prov:entity"]
-                        if srcUUID not in node_map:
-                            continue
-                        if dstUUID not in node_map:
-                            continue
-                        timestamp_str = wasGeneratedBy[uid]["cf:date"]
-                        ts = time.mktime(datetime.datetime.strptime(timestamp_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                        if smallest_timestamp == None or ts < smallest_timestamp:
-                            smallest_timestamp = ts
-
-                if "wasInformedBy" in json_object:
-                    wasInformedBy = json_object["wasInformedBy"]
-                    for uid in wasInformedBy:
-                        if "prov:type" not in wasInformedBy[uid]:
-                            continue
-                        if "cf:date" not in wasInformedBy[uid]:
-                            continue
-                        if "prov:informant" not in wasInformedBy[uid]:
-                            continue
-                        if "prov:informed" not in wasInformedBy[uid]:
-                            continue
-                        srcUUID = wasInformedBy[uid]["prov:informant"]
-                        dstUUID = wasInformedBy[uid]["prov:informed"]
-                        if srcUUID not in node_map:
-                            continue
-                        if dstUUID not in node_map:
-                            continue
-                        timestamp_str = wasInformedBy[uid]["cf:date"]
-                        ts = time.mktime(datetime.datetime.strptime(timestamp_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                        if smallest_timestamp == None or ts < smallest_timestamp:
-                            smallest_timestamp = ts
-
-                if "wasDerivedFrom" in json_object:
-                    wasDerivedFrom = json_object["wasDerivedFrom"]
-                    for uid in wasDerivedFrom:
-                        if "prov:type" not in wasDerivedFrom[uid]:
-                            continue
-                        if "cf:date" not in wasDerivedFrom[uid]:
-                            continue
-                        if "prov:usedEntity" not in wasDerivedFrom[uid]:
-                            continue
-                        if "prov:generatedEntity" not in wasDerivedFrom[uid]:
-                            continue
-                        srcUUID = wasDerivedFrom[uid]["prov:usedEntity"]
-                        dstUUID = wasDerivedFrom[uid]["prov:generatedEntity"]
-                        if srcUUID not in node_map:
-                            continue
-                        if dstUUID not in node_map:
-                            continue
-                        timestamp_str = wasDerivedFrom[uid]["cf:date"]
-                        ts = time.mktime(datetime.datetime.strptime(timestamp_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                        if smallest_timestamp == None or ts < smallest_timestamp:
-                            smallest_timestamp = ts
-
-                if "wasAssociatedWith" in json_object:
-                    wasAssociatedWith = json_object["wasAssociatedWith"]
-                    for uid in wasAssociatedWith:
-                        if "prov:type" not in wasAssociatedWith[uid]:
-                            continue
-                        if "cf:date" not in wasAssociatedWith[uid]:
-                            continue
-                        if "prov:agent" not in wasAssociatedWith[uid]:
-                            continue
-                        if "prov:activity" not in wasAssociatedWith[uid]:
-                            continue
-                        srcUUID = wasAssociatedWith[uid]["prov:agent"]
-                        dstUUID = wasAssociatedWith[uid]["prov:activity"]
-                        if srcUUID not in node_map:
-                            continue
-                        if dstUUID not in node_map:
-                            continue
-                        timestamp_str = wasAssociatedWith[uid]["cf:date"]
-                        ts = time.mktime(datetime.datetime.strptime(timestamp_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                        if smallest_timestamp == None or ts < smallest_timestamp:
-                            smallest_timestamp = ts
+                if stage:
+                    stage.update(1)
+                if not may_contain(line, EDGE_KEYS):
+                    continue
+                json_object = decoder.loads(line.decode("utf-8","ignore"))
+                for edge in relation_edges(json_object, node_map):
+                    ts = date_to_ts(edge[6])
+                    if smallest_timestamp == None or ts < smallest_timestamp:
+                        smallest_timestamp = ts
         f.close()
         pb.close()
-    
-    # we will go through the CamFlow data (again) and output edgelist to a file
-    output = open(outputfile, "w+")
+        if stage:
+            stage.close()
+
+    # we will go through the CamFlow data (again) and generate the edges
     description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing edges in CamFlow data from {}'.format(inputfile)
     pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    stage = TELEMETRY.stage("edges") if TELEMETRY else None
+    skipped = 0
     with open(inputfile, 'r') as f:
         for line in f:
             pb.update()
-            json_object = json.loads(line.decode("utf-8","ignore"))
-
-            if "used" in json_object:
-                used = json_object["used"]
-                for uid in used:
-                    if "prov:type" not in used[uid]:
-                        # an edge must have a type; if not,
-                        # we will have to skip the edge. Log
-                        # this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used) record without type: {}".format(uid))
-                        continue
-                    else:
-                        edgetype = edgegen(used[uid])
-                    # cf:id is used as logical timestamp to order edges
-                    if "cf:id" not in used[uid]:
-                        # an edge must have a logical timestamp;
-                        # if not we will have to skip the edge.
-                        # Log this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used) record without logical timestamp: {}".format(uid))
-                        continue
-                    else:
-                        timestamp = used[uid]["cf:id"]
-		    if "prov:entity" not in used[uid]:
-                        # an edge's source node must exist;
-                        # if not, we will have to skip the
-                        # edge. Log this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used/{}) record without source UUID: {}".format(used[uid]["prov:type"], uid))
-                        continue
-                    if "prov:activity" not in used[uid]:
-                        # an edge's destination node must exist;
-                        # if not, we will have to skip the edge.
-                        # Log this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used/{}) record without destination UUID: {}".format(used[uid]["prov:type"], uid))
-                        continue
-                    srcUUID = used[uid]["prov:entity"]
-                    dstUUID = used[uid]["prov:activity"]
-                    # both source and destination node must
-                    # exist in @node_map; if not, we will
-                    # have to skip the edge. Log this issue
-                    # if verbose is set.
-                    if srcUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used/{}) record with an unseen srcUUID: {}".format(used[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        srcVal = node_map[srcUUID]
-                    if dstUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used/{}) record with an unseen dstUUID: {}".format(used[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        dstVal = node_map[dstUUID]
-                    if "cf:date" not in used[uid]:
-                        # an edge must have a timestamp; if
-                        # not, we will have to skip the edge.
-                        # Log this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used) record without timestamp: {}".format(uid))
-                        continue
-                    else:
-                        # we only record @adjusted_ts if we need
-                        # to record stats of CamFlow dataset.
-                        if CONSOLE_ARGUMENTS.stats:
-                            ts_str = used[uid]["cf:date"]
-                            ts = time.mktime(datetime.datetime.strptime(ts_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                            adjusted_ts = ts - smallest_timestamp
-                    if "cf:jiffies" not in used[uid]:
-                        # an edge must have a jiffies timestamp; if
-                        # not, we will have to skip the edge.
-                        # Log this issue if verbose is set.
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (used) record without jiffies: {}".format(uid))
-                        continue
-                    else:
-                        # we only record @jiffies if
-                        # the option is set
-                        if CONSOLE_ARGUMENTS.jiffies:
-                            jiffies = used[uid]["cf:jiffies"]
-                    total_edges += 1
-                    if noencode:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
-		    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp))
-
-            if "wasGeneratedBy" in json_object:
-                wasGeneratedBy = json_object["wasGeneratedBy"]
-                for uid in wasGeneratedBy:
-                    if "prov:type" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy) record without type: {}".format(uid))
-                        continue
-                    else:
-                        edgetype = edgegen(wasGeneratedBy[uid])
-                    if "cf:id" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy) record without logical timestamp: {}".format(uid))
-                        continue
-                    else:
-                        timestamp = wasGeneratedBy[uid]["cf:id"]
-                    if "prov:entity" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy/{}) record without source UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-                        continue
-                    if "prov:activity" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy/{}) record without destination UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-                        continue
-                    srcUUID = wasGeneratedBy[uid]["prov:activity"]
-                    dstUUID = wasGeneratedBy[uid]["prov:entity"]
-                    if srcUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy/{}) record with an unseen srcUUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        srcVal = node_map[srcUUID]
-                    if dstUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy/{}) record with an unsen dstUUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        dstVal = node_map[dstUUID]
-                    if "cf:date" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy) record without timestamp: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            ts_str = wasGeneratedBy[uid]["cf:date"]
-                            ts = time.mktime(datetime.datetime.strptime(ts_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                            adjusted_ts = ts - smallest_timestamp
-                    if "cf:jiffies" not in wasGeneratedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasGeneratedBy) record without jiffies: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.jiffies:
-                            jiffies = wasGeneratedBy[uid]["cf:jiffies"]
-                    total_edges += 1
-                    if noencode:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp))
-	
-            if "wasInformedBy" in json_object:
-                wasInformedBy = json_object["wasInformedBy"]
-                for uid in wasInformedBy:
-                    if "prov:type" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy) record without type: {}".format(uid))
-                        continue
-                    else:
-                        edgetype = edgegen(wasInformedBy[uid])
-                    if "cf:id" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy) record without logical timestamp: {}".format(uid))
-                        continue
-                    else:
-                        timestamp = wasInformedBy[uid]["cf:id"]
-                    if "prov:informant" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy/{}) record without source UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-                        continue
-                    if "prov:informed" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy/{}) record without destination UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-                        continue
-                    srcUUID = wasInformedBy[uid]["prov:informant"]
-                    dstUUID = wasInformedBy[uid]["prov:informed"]
-                    if srcUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy/{}) record with an unseen srcUUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        srcVal = node_map[srcUUID]
-                    if dstUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy/{}) record with an unseen dstUUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        dstVal = node_map[dstUUID]
-                    if "cf:date" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy) record without timestamp: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            ts_str = wasInformedBy[uid]["cf:date"]
-                            ts = time.mktime(datetime.datetime.strptime(ts_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                            adjusted_ts = ts - smallest_timestamp
-                    if "cf:jiffies" not in wasInformedBy[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasInformedBy) record without jiffies: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.jiffies:
-                            jiffies = wasInformedBy[uid]["cf:jiffies"]
-                    total_edges += 1
-                    if noencode:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp))
-
-            if "wasDerivedFrom" in json_object:
-                wasDerivedFrom = json_object["wasDerivedFrom"]
-                for uid in wasDerivedFrom:
-                    if "prov:type" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom) record without type: {}".format(uid))
-                        continue
-                    else:
-                        edgetype = edgegen(wasDerivedFrom[uid])
-                    if "cf:id" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom) record without logical timestamp: {}".format(uid))
-                            continue
-                    else:
-                        timestamp = wasDerivedFrom[uid]["cf:id"]
-                    if "prov:usedEntity" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom/{}) record without source UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-                        continue
-                    if "prov:generatedEntity" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom/{}) record without destination UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-                        continue
-                    srcUUID = wasDerivedFrom[uid]["prov:usedEntity"]
-                    dstUUID = wasDerivedFrom[uid]["prov:generatedEntity"]
-                    if srcUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom/{}) record with an unseen srcUUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        srcVal = node_map[srcUUID]
-                    if dstUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom/{}) record with an unseen dstUUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        dstVal = node_map[dstUUID]
-                    if "cf:date" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom) record without timestamp: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            ts_str = wasDerivedFrom[uid]["cf:date"]
-                            ts = time.mktime(datetime.datetime.strptime(ts_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                            adjusted_ts = ts - smallest_timestamp
-                    if "cf:jiffies" not in wasDerivedFrom[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasDerivedFrom) record without jiffies: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.jiffies:
-                            jiffies = wasDerivedFrom[uid]["cf:jiffies"]
-                    total_edges += 1
-                    if noencode:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp))
-
-            if "wasAssociatedWith" in json_object:
-                wasAssociatedWith = json_object["wasAssociatedWith"]
-                for uid in wasAssociatedWith:
-                    if "prov:type" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith) record without type: {}".format(uid))
-                        continue
-                    else:
-                        edgetype = edgegen(wasAssociatedWith[uid])
-                    if "cf:id" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith) record without logical timestamp: {}".format(uid))
-                        continue
-                    else:
-                        timestamp = wasAssociatedWith[uid]["cf:id"]
-                    if "prov:agent" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith/{}) record without source UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-                        continue
-                    if "prov:activity" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith/{}) record without destination UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-                        continue
-                    srcUUID = wasAssociatedWith[uid]["prov:agent"]
-                    dstUUID = wasAssociatedWith[uid]["prov:activity"]
-                    if srcUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith/{}) record with an unseen srcUUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        srcVal = node_map[srcUUID]
-                    if dstUUID not in node_map:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith/{}) record with an unseen dstUUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-                        continue
-                    else:
-                        dstVal = node_map[dstUUID]
-                    if "cf:date" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith) record without timestamp: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            ts_str = wasAssociatedWith[uid]["cf:date"]
-                            ts = time.mktime(datetime.datetime.strptime(ts_str, "%Y:%m:%dT%H:%M:%S").timetuple())
-                            adjusted_ts = ts - smallest_timestamp
-                    if "cf:jiffies" not in wasAssociatedWith[uid]:
-                        if CONSOLE_ARGUMENTS.verbose:
-                            logging.debug("edge (wasAssociatedWith) record without jiffies: {}".format(uid))
-                        continue
-                    else:
-                        if CONSOLE_ARGUMENTS.jiffies:
-                            jiffies = wasAssociatedWith[uid]["cf:jiffies"]
-                    total_edges += 1
-                    if noencode:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
-                    else:
-                        if CONSOLE_ARGUMENTS.stats:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, adjusted_ts))
-                        elif CONSOLE_ARGUMENTS.jiffies:
-                            output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp, jiffies))
-                        else:
-                            output.write("{}\t{}\t{}:{}:{}:{}\n".format(hashgen([srcUUID]), hashgen([dstUUID]), srcVal, dstVal, edgetype, timestamp))
+            if stage:
+                stage.update(1)
+            if not may_contain(line, EDGE_KEYS):
+                skipped += 1
+                continue
+            json_object = decoder.loads(line.decode("utf-8","ignore"))
+            for relation, uid, edge, srcUUID, dstUUID, timestamp, date, jiffies in relation_edges(json_object, node_map, CONSOLE_ARGUMENTS.verbose):
+                if timestamp is None or jiffies is None:
+                    continue
+                # we only record @adjusted_ts if we need
+                # to record stats of CamFlow dataset.
+                adjusted_ts = None
+                if CONSOLE_ARGUMENTS.stats:
+                    adjusted_ts = date_to_ts(date) - smallest_timestamp
+                    if stage:
+                        stage.graph_ts = max(stage.graph_ts, adjusted_ts)
+                if stage:
+                    stage.update(0, 1)
+                yield [relation, uid, srcUUID, dstUUID, edgegen(edge), timestamp, adjusted_ts, jiffies, True]
     f.close()
+    pb.close()
+    if stage:
+        stage.close()
+    report_skipped(skipped, pb.n, "edges")
+
+
+class DeferredEdges(object):
+    """Edges whose source or destination node has not been seen yet.
+    At most @capacity edges are kept in memory, indexed by the UUID of
+    a node they are waiting for; any further edge is spilled to a
+    temporary file and resolved only at the end of the input."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.waiting = dict()           # maps a missing node UUID to the edges waiting for it
+        self.size = 0                   # number of edges in memory
+        self.spill = None               # temporary file of spilled edges
+
+    def add(self, edge, uuid):
+        """Defer @edge until the node @uuid is seen."""
+        if self.size < self.capacity:
+            self.waiting.setdefault(uuid, list()).append(edge)
+            self.size += 1
+        else:
+            if self.spill is None:
+                self.spill = tempfile.TemporaryFile(mode="w+")
+            self.spill.write(json.dumps(edge) + "\n")
+
+    def pop(self, uuid):
+        """Remove and return the edges (in memory) waiting for the node @uuid."""
+        edges = self.waiting.pop(uuid, list())
+        self.size -= len(edges)
+        return edges
+
+    def remaining(self):
+        """Remove and generate all remaining edges, in memory and spilled."""
+        for uuid in list(self.waiting):
+            for edge in self.pop(uuid):
+                yield edge
+        if self.spill is not None:
+            self.spill.seek(0)
+            for line in self.spill:
+                yield json.loads(line)
+            self.spill.close()
+            self.spill = None
+
+
+def date_to_ts(timestamp_str):
+    """Convert a CamFlow "cf:date" value (e.g., "2019:05:01T13:45:09")
+    to seconds since the epoch. "cf:date" has a resolution of one
+    second and repeats across many consecutive edges, so the last
+    value is checked first and converted values are memoized in
+    DATE_CACHE; only a new second is parsed and converted."""
+    global LAST_DATE, LAST_TS
+    if timestamp_str == LAST_DATE:
+        return LAST_TS
+    ts = DATE_CACHE.get(timestamp_str)
+    if ts is None:
+        ts = parse_date(timestamp_str)
+        if len(DATE_CACHE) >= DATE_CACHE_SIZE:
+            DATE_CACHE.clear()
+        DATE_CACHE[timestamp_str] = ts
+    LAST_DATE, LAST_TS = timestamp_str, ts
+    return ts
+
+
+def parse_date(timestamp_str):
+    """Parse a "cf:date" value by the fixed offsets of its fields
+    and convert it to seconds since the epoch (in local time, as
+    time.mktime does). Values not in the usual zero-padded form
+    are left to strptime, which raises ValueError if malformed."""
+    s = timestamp_str
+    if len(s) == 19 and s[4] == ':' and s[7] == ':' and s[10] == 'T' and s[13] == ':' and s[16] == ':':
+        try:
+            # datetime checks that each field is in range
+            date = datetime.datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]))
+        except ValueError:
+            date = datetime.datetime.strptime(s, "%Y:%m:%dT%H:%M:%S")
+    else:
+        date = datetime.datetime.strptime(s, "%Y:%m:%dT%H:%M:%S")
+    return time.mktime(date.timetuple())
+
+
+def write_edge(output, edge, node_map, noencode):
+    """Write an @edge, a list [relation, uid, srcUUID, dstUUID, edgetype,
+    timestamp, ts, jiffies, complete] whose nodes are both in @node_map,
+    to @output in the format of parse_all_edges. With -s, @ts is written
+    as the timestamp statistic; parse_edges_one_pass and parse_parallel
+    write raw timestamps and adjust them afterwards (adjust_timestamps)."""
+    relation, uid, srcUUID, dstUUID, edgetype, timestamp, ts, jiffies, complete = edge
+    srcVal, srcID = node_map[srcUUID]
+    dstVal, dstID = node_map[dstUUID]
+    if not noencode:
+        srcUUID = srcID
+        dstUUID = dstID
+    if CONSOLE_ARGUMENTS.stats:
+        output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, ts))
+    elif CONSOLE_ARGUMENTS.jiffies:
+        output.write("{}\t{}\t{}:{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp, jiffies))
+    else:
+        output.write("{}\t{}\t{}:{}:{}:{}\n".format(srcUUID, dstUUID, srcVal, dstVal, edgetype, timestamp))
+
+
+def edge_fields(edge, node_map, noencode):
+    """Return the fields of an @edge (see write_edge) as written by
+    write_edge, as the list of str [srcID, dstID, srcType, dstType,
+    edgetype, timestamp] followed by the timestamp statistic (with -s)
+    or jiffies (with -t), so that they can be used without writing
+    and reading back the edgelist (e.g., by pipeline.py)."""
+    relation, uid, srcUUID, dstUUID, edgetype, timestamp, ts, jiffies, complete = edge
+    srcVal, srcID = node_map[srcUUID]
+    dstVal, dstID = node_map[dstUUID]
+    if not noencode:
+        srcUUID = srcID
+        dstUUID = dstID
+    fields = [str(srcUUID), str(dstUUID), srcVal, dstVal, str(edgetype), str(timestamp)]
+    if CONSOLE_ARGUMENTS.stats:
+        fields.append(str(ts))
+    elif CONSOLE_ARGUMENTS.jiffies:
+        fields.append(str(jiffies))
+    return fields
+
+
+def parse_edges_one_pass(inputfile, outputfile, node_map, noencode, capacity):
+    """Parse all nodes and edges from CamFlow data file @inputfile to an
+    @outputfile in a single pass. @node_map is populated as in
+    parse_all_nodes. An edge is written as soon as both of its nodes
+    are in @node_map; edges that arrive before their nodes are deferred
+    (see DeferredEdges with @capacity) until the nodes show up. Edges
+    whose nodes never show up are skipped. The output is the same as
+    that of parse_all_nodes followed by parse_all_edges, except that
+    deferred edges are written later. With -s, timestamps are adjusted
+    after the pass by rewriting only that column of the output. This
+    function returns the total number of valid edges parsed."""
+    total_edges = [0]
+    smallest_timestamp = [None]
+    deferred = DeferredEdges(capacity)
+    if CONSOLE_ARGUMENTS.stats:
+        output = tempfile.NamedTemporaryFile(mode="w", dir=os.path.dirname(os.path.abspath(outputfile)), delete=False)
+    else:
+        output = open(outputfile, "w+")
+
+    def resolve(edge):
+        """Write @edge if both of its nodes are known, or defer it otherwise.
+        An incomplete edge (i.e., one that would be skipped for missing
+        fields) only counts towards the smallest timestamp (with -s)."""
+        relation, uid, srcUUID, dstUUID, edgetype, timestamp, ts, jiffies, complete = edge
+        for uuid in (srcUUID, dstUUID):
+            if uuid not in node_map:
+                deferred.add(edge, uuid)
+                return
+        if ts is not None and (smallest_timestamp[0] == None or ts < smallest_timestamp[0]):
+            smallest_timestamp[0] = ts
+        if complete:
+            total_edges[0] += 1
+            write_edge(output, edge, node_map, noencode)
+            if stage:
+                stage.update(0, 1)
+
+    description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing CamFlow data from {} in a single pass'.format(inputfile)
+    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    stage = TELEMETRY.stage("one-pass") if TELEMETRY else None
+    skipped = 0
+    with open(inputfile, 'r') as f:
+        for line in f:
+            pb.update()
+            if stage:
+                stage.update(1)
+            if not may_contain(line, NODE_KEYS + EDGE_KEYS):
+                skipped += 1
+                continue
+            try:
+                # use "ignore" if non-decodeable exists in the @line
+                json_object = decoder.loads(line.decode("utf-8","ignore"))
+            except Exception as e:
+                print("Exception ({}) occurred when parsing a node in JSON:".format(e))
+                print(line)
+                exit(1)
+            # edges waiting for a new node may now be written
+            added = add_nodes(json_object, node_map, not noencode)
+            if stage:
+                stage.update(0, 0, len(added))
+            for uid in added:
+                for edge in deferred.pop(uid):
+                    resolve(edge)
+
+            for relation, uid, edge, srcUUID, dstUUID, timestamp, date, jiffies in relation_edges(json_object, None, CONSOLE_ARGUMENTS.verbose):
+                complete = timestamp is not None and jiffies is not None
+                if not complete and not CONSOLE_ARGUMENTS.stats:
+                    continue
+                ts = None
+                if CONSOLE_ARGUMENTS.stats:
+                    ts = date_to_ts(date)
+                edgetype = edgegen(edge) if complete else None
+                resolve([relation, uid, srcUUID, dstUUID, edgetype, timestamp, ts, jiffies, complete])
+    f.close()
+    pb.close()
+    report_skipped(skipped, pb.n, "nodes or edges")
+
+    # edges whose nodes never showed up are skipped
+    for edge in deferred.remaining():
+        relation, uid, srcUUID, dstUUID = edge[:4]
+        if srcUUID not in node_map or dstUUID not in node_map:
+            if CONSOLE_ARGUMENTS.verbose and edge[8]:
+                logging.debug("edge ({}) record with an unseen srcUUID or dstUUID: {}".format(relation, uid))
+            continue
+        resolve(edge)
+    output.close()
+    if stage:
+        stage.close()
+
+    if CONSOLE_ARGUMENTS.stats:
+        adjust_timestamps(output.name, outputfile, smallest_timestamp[0])
+    return total_edges[0]
+
+
+def adjust_timestamps(rawfile, outputfile, smallest_timestamp):
+    """Rewrite the edgelist @rawfile, whose last column holds raw timestamps,
+    to @outputfile with the timestamps adjusted by @smallest_timestamp, and
+    remove @rawfile. Only the last column of each line is touched."""
+    merge_edges([rawfile], outputfile, smallest_timestamp)
+
+
+def merge_edges(rawfiles, outputfile, smallest_timestamp=None):
+    """Concatenate the edgelists @rawfiles, in order, to @outputfile and
+    remove them. If @smallest_timestamp is given, the last column holds
+    raw timestamps and is adjusted by @smallest_timestamp on the way."""
+    output = open(outputfile, "w+")
+    for rawfile in rawfiles:
+        with open(rawfile, 'r') as f:
+            if smallest_timestamp is None:
+                shutil.copyfileobj(f, output)
+            else:
+                for line in f:
+                    head, ts = line.rstrip("\n").rsplit(":", 1)
+                    output.write("{}:{}\n".format(head, float(ts) - smallest_timestamp))
+        f.close()
+        os.remove(rawfile)
     output.close()
+
+
+def split_file(filename, parts):
+    """Split the file @filename into about @parts byte ranges [start, end)
+    that each start at the beginning of a line."""
+    size = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts - 1, bounds[-1]))
+            f.readline()                # move to the beginning of the next line
+            if f.tell() >= size:
+                break
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    f.close()
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def range_lines(filename, start, end):
+    """Generate the lines in the byte range [@start, @end) of the file @filename."""
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line
+    f.close()
+
+
+def parse_nodes_range(task):
+    """Worker of parse_parallel: parse the nodes in a byte range of the
+    CamFlow data file. @task is (filename, start, end, encode), where
+    @encode is passed to add_nodes. This function
+    returns the number of records read, the number of records skipped by
+    the prefilter, the node map of the range, and the error that stopped
+    the worker (see worker_error), if any."""
+    filename, start, end, encode = task
+    node_map = dict()
+    records = 0
+    skipped = 0
+    for line in range_lines(filename, start, end):
+        records += 1
+        if not may_contain(line, NODE_KEYS):
+            skipped += 1
+            continue
+        try:
+            json_object = decoder.loads(line.decode("utf-8","ignore"))
+        except Exception as e:
+            return records, skipped, node_map, ("Exception ({}) occurred when parsing a node in JSON:".format(e), line)
+        add_nodes(json_object, node_map, encode)
+    return records, skipped, node_map, None
+
+
+def parse_edges_range(task):
+    """Worker of parse_parallel: parse the edges in a byte range of the
+    CamFlow data file to an edgelist file, as parse_all_edges does but
+    with raw timestamps if -s is set. @task is (filename, start, end,
+    outputfile, noencode). Nodes are looked up in WORKER_NODE_MAP. This
+    function returns the number of records read, the number of records
+    skipped by the prefilter, the number of edges written, the smallest
+    timestamp seen (only with -s), the number of edge type hashes
+    avoided by edgegen in this worker, and the error that stopped the
+    worker (see worker_error), if any."""
+    filename, start, end, outputfile, noencode = task
+    node_map = WORKER_NODE_MAP
+    records = 0
+    skipped = 0
+    total_edges = 0
+    smallest_timestamp = None
+    hits = EDGE_TYPE_HITS
+    output = open(outputfile, "w")
+    for line in range_lines(filename, start, end):
+        records += 1
+        if not may_contain(line, EDGE_KEYS):
+            skipped += 1
+            continue
+        try:
+            json_object = decoder.loads(line.decode("utf-8","ignore"))
+        except Exception as e:
+            output.close()
+            return records, skipped, total_edges, smallest_timestamp, EDGE_TYPE_HITS - hits, ("Exception ({}) occurred when parsing an edge in JSON:".format(e), line)
+        for relation, uid, edge, srcUUID, dstUUID, timestamp, date, jiffies in relation_edges(json_object, node_map, CONSOLE_ARGUMENTS.verbose):
+            ts = None
+            if CONSOLE_ARGUMENTS.stats:
+                # edges without a logical timestamp or jiffies still count
+                # towards the smallest timestamp, as in parse_all_edges
+                ts = date_to_ts(date)
+                if smallest_timestamp == None or ts < smallest_timestamp:
+                    smallest_timestamp = ts
+            if timestamp is None or jiffies is None:
+                continue
+            total_edges += 1
+            write_edge(output, [relation, uid, srcUUID, dstUUID, edgegen(edge), timestamp, ts, jiffies, True], node_map, noencode)
+    output.close()
+    return records, skipped, total_edges, smallest_timestamp, EDGE_TYPE_HITS - hits, None
+
+
+def worker_error(error):
+    """Report the @error returned by a worker of parse_parallel, a message
+    and the line that could not be parsed, as the serial passes do, and
+    exit. Workers return errors instead of raising them, since exceptions
+    that cannot be pickled back would leave the pool hanging."""
+    message, line = error
+    print(message)
+    print(line)
+    exit(1)
+
+
+def parse_parallel(inputfile, outputfile, node_map, noencode, workers):
+    """Parse all nodes and then all edges from CamFlow data file @inputfile
+    to an @outputfile with a pool of @workers processes. The file is split
+    into byte ranges aligned to lines; nodes of each range are parsed in
+    parallel and their maps merged into @node_map in file order, so that
+    the first occurrence of a node wins as in parse_all_nodes. Edges of
+    each range are then parsed in parallel to their own file, and the files
+    are concatenated in file order. The output is identical to that of
+    parse_all_nodes followed by parse_all_edges. This function returns
+    the total number of valid edges parsed."""
+    global WORKER_NODE_MAP, EDGE_TYPE_HITS
+    # a few ranges per worker keep all workers busy until the end
+    ranges = split_file(inputfile, workers * 4)
+
+    description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing nodes in CamFlow data from {} with {} workers'.format(inputfile, workers)
+    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    stage = TELEMETRY.stage("nodes", 1) if TELEMETRY else None
+    skipped = 0
+    pool = multiprocessing.Pool(processes=workers)
+    try:
+        for records, range_skipped, range_map, error in pool.imap(parse_nodes_range, [(inputfile, start, end, not noencode) for start, end in ranges]):
+            pb.update(records)
+            if error is not None:
+                pb.close()
+                worker_error(error)
+            skipped += range_skipped
+            nodes = len(node_map)
+            for uid in range_map:
+                if uid not in node_map:
+                    node_map[uid] = range_map[uid]
+            if stage:
+                stage.update(records, 0, len(node_map) - nodes)
+    finally:
+        # all the ranges are done, or the run is stopping
+        pool.terminate()
+        pool.join()
     pb.close()
+    if stage:
+        stage.close()
+    report_skipped(skipped, pb.n, "nodes")
+
+    WORKER_NODE_MAP = node_map          # forked workers inherit the complete node map
+    tmpdir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(outputfile)))
+    tasks = [(inputfile, start, end, os.path.join(tmpdir, "{}.txt".format(i)), noencode) for i, (start, end) in enumerate(ranges)]
+    total_edges = 0
+    smallest_timestamp = None
+    description = '\x1b[6;30;42m[STATUS]\x1b[0m Parsing edges in CamFlow data from {} with {} workers'.format(inputfile, workers)
+    pb = tqdm.tqdm(desc=description, mininterval=1.0, unit=" recs")
+    stage = TELEMETRY.stage("edges", 1) if TELEMETRY else None
+    skipped = 0
+    pool = multiprocessing.Pool(processes=workers)
+    try:
+        try:
+            for records, range_skipped, edges, ts, hits, error in pool.imap(parse_edges_range, tasks):
+                pb.update(records)
+                if error is not None:
+                    pb.close()
+                    worker_error(error)
+                skipped += range_skipped
+                EDGE_TYPE_HITS += hits
+                total_edges += edges
+                if ts is not None and (smallest_timestamp == None or ts < smallest_timestamp):
+                    smallest_timestamp = ts
+                if stage:
+                    stage.update(records, edges)
+        finally:
+            pool.terminate()
+            pool.join()
+        pb.close()
+        if stage:
+            stage.close()
+        report_skipped(skipped, pb.n, "edges")
+        WORKER_NODE_MAP = None
+
+        merge_edges([task[3] for task in tasks], outputfile, smallest_timestamp if CONSOLE_ARGUMENTS.stats else None)
+    except:
+        # leave no partial edgelists behind
+        shutil.rmtree(tmpdir, True)
+        raise
+    os.rmdir(tmpdir)
     return total_edges
 
 
@@ -644,19 +783,53 @@ if __name__ == "__main__":
     parser.add_argument('-s', '--stats', help='record some statistics of the CamFlow graph data and runtime graph generation speed (default is false)', action='store_true')
     parser.add_argument('-f', '--stats-file', help='file path to record the statistics (only valid if -s is set; default is stats.csv)', default='stats.csv')
     parser.add_argument('-t', '--jiffies', help='record jiffies of the CamFlow graph data. This option can be overwritten by "-s"', action='store_true')
+    parser.add_argument('-p', '--one-pass', help='read the CamFlow data only once; edges that arrive before their nodes are deferred (default is false)', action='store_true')
+    parser.add_argument('-b', '--buffer', help='maximum number of deferred edges kept in memory before they are spilled to disk (only valid if -p is set; default is 1000000)', type=int, default=1000000)
+    parser.add_argument('-w', '--workers', help='parse nodes and edges with this many worker processes; the output is the same as with a single process (not valid with -p; default is 1)', type=int, default=1)
+    parser.add_argument('-d', '--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + decoder.BACKENDS, default='auto')
+    parser.add_argument('--no-prefilter', dest='prefilter', help='decode every line instead of skipping lines that cannot hold nodes (or edges) by a substring test', action='store_false')
+    parser.add_argument('--node-store', help='how nodes are kept: a dictionary, compact hash tables of about 16 bytes per node (slower lookups), or compact hash tables that overflow to a file next to the output (default is dict)', choices=NODE_STORES, default='dict')
+    parser.add_argument('--node-memory', help='maximum number of nodes kept in memory before the rest overflow to disk (only valid if --node-store is disk; default is 16777216)', type=int, default=1 << 24)
+    telemetry.add_arguments(parser)
     args = parser.parse_args()
 
     CONSOLE_ARGUMENTS = args
 
+    try:
+        decoder.use(args.decoder)
+    except ValueError as e:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m {}".format(e))
+        sys.exit(1)
+
+    if args.workers > 1 and args.one_pass:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m -w is not valid with -p")
+        sys.exit(1)
+
     if args.verbose:
         logging.basicConfig(filename=args.log, level=logging.DEBUG)
 
-    node_map = dict()
-    parse_all_nodes(args.input, node_map)
-    total_edges = parse_all_edges(args.input, args.output, node_map, args.noencode)
+    TELEMETRY = telemetry.new_telemetry(args)
+    node_map = new_node_map(args.node_store, os.path.dirname(os.path.abspath(args.output)), args.node_memory)
+    if args.one_pass:
+        total_edges = parse_edges_one_pass(args.input, args.output, node_map, args.noencode, args.buffer)
+    elif args.workers > 1:
+        total_edges = parse_parallel(args.input, args.output, node_map, args.noencode, args.workers)
+    else:
+        parse_all_nodes(args.input, node_map, not args.noencode)
+        total_edges = parse_all_edges(args.input, args.output, node_map, args.noencode)
+
+    # compact node stores keep no encoded node IDs; they are hashed again on every lookup.
+    # with -n, node IDs are not hashed at all in a dictionary
+    print("\x1b[6;30;43m[INFO]\x1b[0m Hashes avoided: {} of node IDs ({} nodes hashed once each), {} of edge types".format(
+        0 if args.noencode or args.node_store != "dict" else 2 * total_edges,
+        0 if args.noencode and args.node_store == "dict" else len(node_map), EDGE_TYPE_HITS))
+    print("\x1b[6;30;43m[INFO]\x1b[0m Node map: {}; peak RSS {:.1f} MB".format(
+        memory_report(node_map), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
 
     if args.stats:
         total_nodes = len(node_map)
         stats = open(args.stats_file, "a+")
         stats.write("{},{},{}\n".format(args.input, total_nodes, total_edges))
 
+    if TELEMETRY:
+        TELEMETRY.close()
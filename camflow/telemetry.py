@@ -0,0 +1,125 @@
+import sys
+import csv
+import json
+import time
+import collections
+
+
+# formats of the telemetry stream: one JSON object per line, or CSV with a header
+TELEMETRY_FORMATS = ["jsonl", "csv"]
+# fields of a telemetry record, in the order of the CSV columns
+FIELDS = ["time", "stage", "elapsed", "records", "edges", "edges_per_sec", "nodes", "nodes_per_sec", "base", "stream", "graph_ts", "done"]
+# number of updates of a stage between two looks at the clock
+CHECK_EVERY = 256
+
+
+class Telemetry(object):
+    """Runtime telemetry of the stages of a run (see Stage), written to
+    @path ("-" for standard output) in @fmt (one of TELEMETRY_FORMATS)
+    while the run goes on: a record per stage every @interval seconds,
+    and a last one when the stage is done. Each record is flushed as soon
+    as it is written, so that the stream can be followed (e.g., with
+    tail -f) on a live capture."""
+    def __init__(self, path, fmt="jsonl", interval=1.0):
+        self.fmt = fmt
+        self.interval = interval
+        self.file = sys.stdout if path == "-" else open(path, "w")
+        self.writer = None
+        if fmt == "csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(FIELDS)
+            self.file.flush()
+
+    def stage(self, name, check_every=CHECK_EVERY):
+        """Start the stage @name. Its clock is looked at every @check_every
+        updates (or every update, for stages whose input is slow)."""
+        return Stage(self, name, check_every)
+
+    def write(self, record):
+        if self.writer is not None:
+            self.writer.writerow(["" if record[field] is None else record[field] for field in FIELDS])
+        else:
+            self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class Stage(object):
+    """Counters of a stage of a run: the input records read, the edges
+    processed, and the new nodes seen so far, from which the rates over
+    the last interval are computed. If @base_size is set (i.e., the
+    stage writes base and stream graphs), the edges are also counted as
+    base and stream edges; @graph_ts is the largest adjusted timestamp
+    of the edges so far (with -s), i.e., the timestamp that ts.txt
+    records once post-processed. The elapsed time of the last record
+    of a stage is its latency."""
+    def __init__(self, telemetry, name, check_every):
+        self.telemetry = telemetry
+        self.name = name
+        self.check_every = check_every
+        self.records = 0
+        self.edges = 0
+        self.nodes = 0
+        self.base_size = None
+        self.graph_ts = None
+        self.updates = 0
+        self.start = time.time()
+        self.last = (self.start, 0, 0)  # time, edges, and nodes of the last record
+
+    def update(self, records=0, edges=0, nodes=0):
+        """Add to the counters, and write a record if it is time to."""
+        self.records += records
+        self.edges += edges
+        self.nodes += nodes
+        self.updates += 1
+        if self.updates >= self.check_every:
+            self.updates = 0
+            now = time.time()
+            if now - self.last[0] >= self.telemetry.interval:
+                self.emit(now)
+
+    def emit(self, now, done=False):
+        """Write a record of the stage at time @now; the rates of the last
+        record of a stage (@done) are over the whole stage."""
+        since, edges, nodes = (self.start, 0, 0) if done else self.last
+        seconds = max(now - since, 1e-9)
+        record = collections.OrderedDict()
+        record["time"] = round(now, 3)
+        record["stage"] = self.name
+        record["elapsed"] = round(now - self.start, 3)
+        record["records"] = self.records
+        record["edges"] = self.edges
+        record["edges_per_sec"] = round((self.edges - edges) / seconds, 1)
+        record["nodes"] = self.nodes
+        record["nodes_per_sec"] = round((self.nodes - nodes) / seconds, 1)
+        record["base"] = None
+        record["stream"] = None
+        if self.base_size is not None:
+            record["base"] = min(self.edges, self.base_size)
+            record["stream"] = self.edges - record["base"]
+        record["graph_ts"] = self.graph_ts
+        record["done"] = done
+        self.telemetry.write(record)
+        self.last = (now, self.edges, self.nodes)
+
+    def close(self):
+        """Write the last record of the stage."""
+        self.emit(time.time(), True)
+
+
+def new_telemetry(args):
+    """Create the Telemetry asked for by --telemetry in @args, or return
+    None if there is none, so that stages can be skipped cheaply."""
+    if not args.telemetry:
+        return None
+    return Telemetry(args.telemetry, args.telemetry_format, args.telemetry_interval)
+
+
+def add_arguments(parser):
+    """Add the telemetry options to the argparse @parser."""
+    parser.add_argument('--telemetry', help='write runtime telemetry of each stage (edges/s, new nodes/s, base/stream edge counts, and stage latency) during the run to this file path ("-" for standard output)')
+    parser.add_argument('--telemetry-format', help='format of the telemetry (default is jsonl, i.e., one JSON object per line)', choices=TELEMETRY_FORMATS, default='jsonl')
+    parser.add_argument('--telemetry-interval', help='seconds between two telemetry records of a stage (default is 1.0)', type=float, default=1.0)
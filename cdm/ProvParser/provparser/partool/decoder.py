@@ -0,0 +1,189 @@
+#!/usr/bin/python
+import re
+import json
+from io import BytesIO
+
+# JSON decoding backends. orjson, ujson, and json (the standard library,
+# always present) decode one value at a time; the ijson backends parse a
+# stream incrementally.
+BACKENDS = ["orjson", "ujson", "json", "yajl2_c", "yajl2_cffi", "yajl2", "python"]
+IJSON_BACKENDS = ["yajl2_c", "yajl2_cffi", "yajl2", "python"]
+# preferred backends, fastest first (see benchmarks/json_decoders.py), to
+# decode a single value (loads) and a stream of values (items)
+LOADS_ORDER = ["orjson", "ujson", "json"]
+ITEMS_ORDER = ["orjson", "ujson", "yajl2_c", "json", "yajl2_cffi", "yajl2", "python"]
+# largest number of characters of a JSON value that spans multiple lines
+MAX_PENDING = 1 << 26
+# position of a decoding error in the messages of the standard json in Python 2
+ERROR_POSITION = re.compile(r'\(char (\d+)')
+
+# names and modules of the backends in use; chosen on first use unless set by use()
+loads_backend = None
+loads_module = None
+items_backend = None
+items_module = None
+
+def load(name):
+	"""Import a backend.
+
+	Arguments:
+	name - name of the backend (one of BACKENDS)
+
+	Return:
+	the backend module, or None if it is not installed
+	"""
+	if name not in BACKENDS:
+		raise ValueError("unknown JSON backend {} (choose from {})".format(name, ", ".join(BACKENDS)))
+	try:
+		if name in IJSON_BACKENDS:
+			return __import__('ijson.backends.' + name, fromlist=[name])
+		return __import__(name)
+	except Exception:
+		# a C backend may be present but fail to load its shared library
+		return None
+
+def available():
+	"""Return the names of the installed backends."""
+	return [name for name in BACKENDS if load(name) is not None]
+
+def fastest(order):
+	"""Return the name and module of the first installed backend in @order."""
+	for name in order:
+		mod = load(name)
+		if mod is not None:
+			return name, mod
+	return 'json', json
+
+def use(name=None):
+	"""Select the backend to decode JSON with.
+
+	Arguments:
+	name - name of the backend; None or "auto" selects the fastest installed
+	one for loads() and for items() separately
+
+	Return:
+	the name of the backend used by items()
+	"""
+	global loads_backend, loads_module, items_backend, items_module
+	if name is None or name == 'auto':
+		loads_backend, loads_module = fastest(LOADS_ORDER)
+		items_backend, items_module = fastest(ITEMS_ORDER)
+	else:
+		mod = load(name)
+		if mod is None:
+			raise ValueError("JSON backend {} is not installed".format(name))
+		loads_backend, loads_module = name, mod
+		items_backend, items_module = name, mod
+	return items_backend
+
+def loads(s):
+	"""Decode a single JSON value.
+
+	Arguments:
+	s - the JSON document (str or bytes)
+
+	Return:
+	the decoded value
+	"""
+	if loads_module is None:
+		use()
+	if loads_backend in IJSON_BACKENDS:
+		for value in items(BytesIO(s if isinstance(s, bytes) else s.encode('utf-8'))):
+			return value
+		raise ValueError("no JSON value to decode")
+	return loads_module.loads(s)
+
+def items(fileobj):
+	"""Iteratively decode the JSON values in a file object. This is
+	a drop-in replacement of ijson.common.items(ijson.parse(fileobj,
+	multiple_values=True), '').
+
+	With orjson, ujson, or json, the input is expected to hold one
+	value per line (as CamFlow and CDM JSON data do), so that each line
+	is decoded at once. A value that spans multiple lines, or multiple
+	values on a line, are still decoded correctly (but more slowly).
+
+	Arguments:
+	fileobj - file object
+
+	Return:
+	a generator of the decoded values
+	"""
+	if items_module is None:
+		use()
+	if items_backend in IJSON_BACKENDS:
+		try:
+			return items_module.items(fileobj, '', multiple_values=True)
+		except TypeError:
+			# ijson 2.x backends do not take multiple_values in items()
+			import ijson
+			return ijson.common.items(items_module.parse(fileobj, multiple_values=True), '')
+	return lines(fileobj, items_module.loads)
+
+def error_position(error):
+	"""Return the position in the text of a JSON decoding @error, or None if it is not known."""
+	position = getattr(error, 'pos', None)
+	if position is None:
+		match = ERROR_POSITION.search(str(error))
+		if match is not None:
+			position = int(match.group(1))
+	return position
+
+def decodes(decode, text):
+	"""Return whether @text holds a single JSON value that @decode can decode."""
+	try:
+		decode(text)
+	except ValueError:
+		return False
+	return True
+
+def lines(fileobj, decode):
+	"""Generate the JSON values in a file object with one value per line.
+	A value may span multiple lines, but not a string, so that a syntax
+	error before the end of the text read so far (e.g., a truncated
+	record followed by more lines) is raised as soon as it is found
+	instead of at the end of the input. If the error does not tell where
+	it is (as some errors of json in Python 2 do not), a line read after
+	a value that does not decode, but that decodes on its own, means
+	that the value is malformed rather than incomplete.
+
+	Arguments:
+	fileobj - file object
+	decode - function that decodes a single JSON value
+	"""
+	decoder = json.JSONDecoder()
+	pending = None
+	for line in fileobj:
+		if pending is None:
+			if not line.strip():
+				continue
+			try:
+				yield decode(line)
+				continue
+			except ValueError:
+				pending = ''
+		# fall back to incremental decoding until the pending text is consumed
+		if isinstance(line, bytes) and not isinstance(line, str):
+			line = line.decode('utf-8')
+		pending += line
+		while pending is not None:
+			start = len(pending) - len(pending.lstrip())
+			if start == len(pending):
+				pending = None
+				break
+			try:
+				value, end = decoder.raw_decode(pending, start)
+			except ValueError as e:
+				position = error_position(e)
+				if position is None:
+					if pending[start:].strip() != line.strip() and decodes(decode, line):
+						raise ValueError("invalid JSON value: {} in {}".format(e, pending[start:start + 100]))
+				elif position < len(pending.rstrip()):
+					raise ValueError("invalid JSON value: {} in {}".format(e, pending[start:start + 100]))
+				if len(pending) > MAX_PENDING:
+					raise ValueError("JSON value longer than {} characters: {}".format(MAX_PENDING, pending[start:start + 100]))
+				break			# incomplete value; read more lines
+			yield value
+			pending = pending[end:]
+	if pending is not None and pending.strip():
+		raise ValueError("incomplete JSON value at the end of the input: {}".format(pending[:100]))
@@ -174,216 +174,7 @@ def cgencf(parser, db, out):
 	
 	for cfrec in parser:
 		pb.update()
-
-		if "used" in cfrec:
-			used = cfrec["used"]
-			for uid in used:
-				if "prov:type" not in used[uid]:
-					logging.debug("Edge (used) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(used[uid])
-
-				if "cf:id" not in used[uid]:	# Can be used as timestamp
-					logging.debug("Edge (used) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = used[uid]["cf:id"]
-
-				if "prov:entity" not in used[uid]:
-					logging.debug("Edge (used/{}) record without srcUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in used[uid]:
-					logging.debug("Edge (used/{}) record without dstUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = used[uid]["prov:entity"]
-				dstUUID = used[uid]["prov:activity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (used/{}) record with an unmatched srcUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (used/{}) record with an unmatched dstUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasGeneratedBy" in cfrec:
-			wasGeneratedBy = cfrec["wasGeneratedBy"]
-			for uid in wasGeneratedBy:
-				if "prov:type" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasGeneratedBy[uid])
-
-				if "cf:id" not in wasGeneratedBy[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasGeneratedBy) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasGeneratedBy[uid]["cf:id"]
-
-				if "prov:entity" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy/{}) record without srcUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy/{}) record without dstUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasGeneratedBy[uid]["prov:activity"]
-				dstUUID = wasGeneratedBy[uid]["prov:entity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasGeneratedBy/{}) record with an unmatched srcUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasGeneratedBy/{}) record with an unmatched dstUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasInformedBy" in cfrec:
-			wasInformedBy = cfrec["wasInformedBy"]
-			for uid in wasInformedBy:
-				if "prov:type" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasInformedBy[uid])
-
-				if "cf:id" not in wasInformedBy[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasInformedBy) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasInformedBy[uid]["cf:id"]
-
-				if "prov:informant" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy/{}) record without srcUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				if "prov:informed" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy/{}) record without dstUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasInformedBy[uid]["prov:informant"]
-				dstUUID = wasInformedBy[uid]["prov:informed"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasInformedBy/{}) record with an unmatched srcUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasInformedBy/{}) record with an unmatched dstUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasDerivedFrom" in cfrec:
-			wasDerivedFrom = cfrec["wasDerivedFrom"]
-			for uid in wasDerivedFrom:
-				if "prov:type" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasDerivedFrom[uid])
-
-				if "cf:id" not in wasDerivedFrom[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasDerivedFrom) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasDerivedFrom[uid]["cf:id"]
-
-				if "prov:usedEntity" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom/{}) record without srcUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				if "prov:generatedEntity" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom/{}) record without dstUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasDerivedFrom[uid]["prov:usedEntity"]
-				dstUUID = wasDerivedFrom[uid]["prov:generatedEntity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasDerivedFrom/{}) record with an unmatched srcUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasDerivedFrom/{}) record with an unmatched dstUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasAssociatedWith" in cfrec:
-			wasAssociatedWith = cfrec["wasAssociatedWith"]
-			for uid in wasAssociatedWith:
-				if "prov:type" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasAssociatedWith[uid])
-
-				if "cf:id" not in wasAssociatedWith[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasAssociatedWith) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasAssociatedWith[uid]["cf:id"]
-
-				if "prov:agent" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith/{}) record without srcUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith/{}) record without dstUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasAssociatedWith[uid]["prov:agent"]
-				dstUUID = wasAssociatedWith[uid]["prov:activity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasAssociatedWith/{}) record with an unmatched srcUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasAssociatedWith/{}) record with an unmatched dstUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
+		gencfedges(cfrec, db, out)
 
 	pb.close()
 	return
@@ -593,216 +384,7 @@ def gencf(parser, i, dbs, out):
 
 	for cfrec in parser:
 		pb.update()
-
-		if "used" in cfrec:
-			used = cfrec["used"]
-			for uid in used:
-				if "prov:type" not in used[uid]:
-					logging.debug("Edge (used) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(used[uid])
-
-				if "cf:id" not in used[uid]:	# Can be used as timestamp
-					logging.debug("Edge (used) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = used[uid]["cf:id"]
-
-				if "prov:entity" not in used[uid]:
-					logging.debug("Edge (used/{}) record without srcUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in used[uid]:
-					logging.debug("Edge (used/{}) record without dstUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = used[uid]["prov:entity"]
-				dstUUID = used[uid]["prov:activity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (used/{}) record with an unmatched srcUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (used/{}) record with an unmatched dstUUID. UUID: {}".format(used[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasGeneratedBy" in cfrec:
-			wasGeneratedBy = cfrec["wasGeneratedBy"]
-			for uid in wasGeneratedBy:
-				if "prov:type" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasGeneratedBy[uid])
-
-				if "cf:id" not in wasGeneratedBy[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasGeneratedBy) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasGeneratedBy[uid]["cf:id"]
-
-				if "prov:entity" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy/{}) record without srcUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in wasGeneratedBy[uid]:
-					logging.debug("Edge (wasGeneratedBy/{}) record without dstUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasGeneratedBy[uid]["prov:activity"]
-				dstUUID = wasGeneratedBy[uid]["prov:entity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasGeneratedBy/{}) record with an unmatched srcUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasGeneratedBy/{}) record with an unmatched dstUUID. UUID: {}".format(wasGeneratedBy[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasInformedBy" in cfrec:
-			wasInformedBy = cfrec["wasInformedBy"]
-			for uid in wasInformedBy:
-				if "prov:type" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasInformedBy[uid])
-
-				if "cf:id" not in wasInformedBy[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasInformedBy) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasInformedBy[uid]["cf:id"]
-
-				if "prov:informant" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy/{}) record without srcUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				if "prov:informed" not in wasInformedBy[uid]:
-					logging.debug("Edge (wasInformedBy/{}) record without dstUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasInformedBy[uid]["prov:informant"]
-				dstUUID = wasInformedBy[uid]["prov:informed"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasInformedBy/{}) record with an unmatched srcUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasInformedBy/{}) record with an unmatched dstUUID. UUID: {}".format(wasInformedBy[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-
-		if "wasDerivedFrom" in cfrec:
-			wasDerivedFrom = cfrec["wasDerivedFrom"]
-			for uid in wasDerivedFrom:
-				if "prov:type" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasDerivedFrom[uid])
-
-				if "cf:id" not in wasDerivedFrom[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasDerivedFrom) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasDerivedFrom[uid]["cf:id"]
-
-				if "prov:usedEntity" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom/{}) record without srcUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				if "prov:generatedEntity" not in wasDerivedFrom[uid]:
-					logging.debug("Edge (wasDerivedFrom/{}) record without dstUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasDerivedFrom[uid]["prov:usedEntity"]
-				dstUUID = wasDerivedFrom[uid]["prov:generatedEntity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasDerivedFrom/{}) record with an unmatched srcUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasDerivedFrom/{}) record with an unmatched dstUUID. UUID: {}".format(wasDerivedFrom[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
-		
-		if "wasAssociatedWith" in cfrec:
-			wasAssociatedWith = cfrec["wasAssociatedWith"]
-			for uid in wasAssociatedWith:
-				if "prov:type" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith) record without type. UUID: %s", uid)
-					continue
-				else:
-					edgetype = valgencfe(wasAssociatedWith[uid])
-
-				if "cf:id" not in wasAssociatedWith[uid]:	# Can be used as timestamp
-					logging.debug("Edge (wasAssociatedWith) record without timestamp. UUID: %s", uid)
-					continue
-				else:
-					timestamp = wasAssociatedWith[uid]["cf:id"]
-
-				if "prov:agent" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith/{}) record without srcUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				if "prov:activity" not in wasAssociatedWith[uid]:
-					logging.debug("Edge (wasAssociatedWith/{}) record without dstUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				srcUUID = wasAssociatedWith[uid]["prov:agent"]
-				dstUUID = wasAssociatedWith[uid]["prov:activity"]
-
-				srcVal = db.get(srcUUID)
-				if srcVal == None:
-					logging.debug("Edge (wasAssociatedWith/{}) record with an unmatched srcUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				dstVal = db.get(dstUUID)
-				if dstVal == None:
-					logging.debug("Edge (wasAssociatedWith/{}) record with an unmatched dstUUID. UUID: {}".format(wasAssociatedWith[uid]["prov:type"], uid))
-					continue
-
-				out.write(str(hashgen([srcUUID])) + '\t' \
-					+ str(hashgen([dstUUID])) + '\t' \
-					+ str(srcVal) + ':' + str(dstVal) \
-					+ ':' + str(edgetype) \
-					+ ':' + str(timestamp) + '\t' + '\n')
+		gencfedges(cfrec, db, out)
 	pb.close()
 	return
 
@@ -998,6 +580,61 @@ def gencd(parser, i, dbs, out):
 	return
 
 
+def gencfedges(cfrec, db, out):
+	"""Write the edges of a CamFlow record to the output file.
+	The relations and their fields are given by CF_RELATIONS,
+	and each field of an edge is fetched only once.
+
+	Arguments:
+	cfrec - CamFlow record
+	db - database of the nodes
+	out - output file object
+	"""
+	for relation, srcfield, dstfield, tsfield in CF_RELATIONS:
+		edges = cfrec.get(relation)
+		if edges is None:
+			continue
+		for uid in edges:
+			edge = edges[uid]
+			get = edge.get
+
+			prov_type = get("prov:type")
+			if prov_type is None:
+				logging.debug("Edge (%s) record without type. UUID: %s", relation, uid)
+				continue
+			edgetype = valgencfe(edge)
+
+			timestamp = get(tsfield)	# Can be used as timestamp
+			if timestamp is None:
+				logging.debug("Edge (%s) record without timestamp. UUID: %s", relation, uid)
+				continue
+
+			srcUUID = get(srcfield)
+			if srcUUID is None:
+				logging.debug("Edge ({}/{}) record without srcUUID. UUID: {}".format(relation, prov_type, uid))
+				continue
+
+			dstUUID = get(dstfield)
+			if dstUUID is None:
+				logging.debug("Edge ({}/{}) record without dstUUID. UUID: {}".format(relation, prov_type, uid))
+				continue
+
+			srcVal = db.get(srcUUID)
+			if srcVal == None:
+				logging.debug("Edge ({}/{}) record with an unmatched srcUUID. UUID: {}".format(relation, prov_type, uid))
+				continue
+
+			dstVal = db.get(dstUUID)
+			if dstVal == None:
+				logging.debug("Edge ({}/{}) record with an unmatched dstUUID. UUID: {}".format(relation, prov_type, uid))
+				continue
+
+			out.write(str(hashgen([srcUUID])) + '\t' \
+				+ str(hashgen([dstUUID])) + '\t' \
+				+ str(srcVal) + ':' + str(dstVal) \
+				+ ':' + str(edgetype) \
+				+ ':' + str(timestamp) + '\t' + '\n')
+
 def getfromdb(dbs, i, uuid):
 	"""Wrapper function to get value from an uuid.
 
@@ -63,6 +63,16 @@ CD2_TYPE_IPC = 'IpcObject'
 # Cadets-E2/FiveDirections UUID constant
 CD2_UUID = 'UUID'
 
+# CamFlow relations (edges): relation name, source field, destination field, and timestamp field.
+# A new kind of CamFlow relation only needs an entry here.
+CF_RELATIONS = [
+	("used", "prov:entity", "prov:activity", "cf:id"),
+	("wasGeneratedBy", "prov:activity", "prov:entity", "cf:id"),
+	("wasInformedBy", "prov:informant", "prov:informed", "cf:id"),
+	("wasDerivedFrom", "prov:usedEntity", "prov:generatedEntity", "cf:id"),
+	("wasAssociatedWith", "prov:agent", "prov:activity", "cf:id"),
+]
+
 def initdb(fn):
 	"""Initialize a database with a given name
 
@@ -0,0 +1,294 @@
+#!/usr/bin/python
+import ctypes
+
+try:
+	import xxhash
+except ImportError:
+	xxhash = None
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# relabelers selectable by the parsers: a plain dictionary keyed by the
+# original node IDs, or a compact table keyed by 64-bit node keys
+RELABEL_STORES = ["dict", "compact"]
+# initial number of slots of a compact table (a power of 2)
+INITIAL_CAPACITY = 1 << 16
+# largest 64-bit key
+MAX_KEY = (1 << 64) - 1
+# largest ID that fits in 32 bits
+MAX_ID32 = (1 << 32) - 1
+
+def node_key(node_id):
+	"""Map a node ID to a 64-bit key.
+
+	Arguments:
+	node_id - node ID (str); the node IDs of an edgelist are usually
+	the (decimal) integers generated by hashgen
+
+	Return:
+	the ID itself if it is the decimal form of an integer in [0, 2^64),
+	its xxh64 hash otherwise
+	"""
+	if node_id.isdigit() and (node_id[0] != "0" or len(node_id) == 1):
+		key = int(node_id)
+		if key <= MAX_KEY:
+			return key
+	if not isinstance(node_id, bytes):
+		node_id = node_id.encode('utf-8')
+	return xxhash.xxh64_intdigest(node_id)
+
+def relabel_chunk(src, dst, lookup, relabel):
+	"""Relabel the nodes of a chunk of edges (see Relabeler.relabel_columns).
+
+	Arguments:
+	src - IDs of the source nodes of the edges
+	dst - IDs of the destination nodes of the edges
+	lookup - function that looks up the new IDs of a list of nodes (see Relabeler)
+	relabel - function that relabels a node (see Relabeler)
+
+	Return:
+	the same as Relabeler.relabel_columns
+	"""
+	src_ids = lookup(src)
+	dst_ids = lookup(dst)
+	src_new = ["0"] * len(src_ids)
+	dst_new = ["0"] * len(dst_ids)
+	if None not in src_ids and None not in dst_ids:
+		return src_ids, dst_ids, src_new, dst_new
+	missing = set([i for i, new_id in enumerate(src_ids) if new_id is None])
+	missing.update([i for i, new_id in enumerate(dst_ids) if new_id is None])
+	for i in sorted(missing):
+		if src_ids[i] is None:
+			src_ids[i], src_new[i] = relabel(src[i])
+		if dst_ids[i] is None:
+			dst_ids[i], dst_new[i] = relabel(dst[i])
+	return src_ids, dst_ids, src_new, dst_new
+
+class Relabeler(object):
+	"""Relabel nodes with dense integer IDs, numbered from @start in the
+	order in which the nodes are first seen. New IDs are given as strings,
+	ready to be written out.
+
+	This class only holds the numbering and relabel_columns; relabelers
+	derived from it provide:
+	relabel(node_id) - relabel a node given its original ID, and return
+	its new ID and "1" if the node is seen for the first time or "0" otherwise
+	lookup(node_ids) - return the list of the new IDs of nodes given their
+	original IDs, without relabeling them (None for the nodes not seen yet)
+	"""
+	def __init__(self, start=0):
+		self.start = start
+		self.next_id = start
+
+	def __len__(self):
+		return self.next_id - self.start
+
+	def relabel_columns(self, src, dst):
+		"""Relabel the nodes of a chunk of edges in one call. The source of
+		each edge is seen before its destination, as if relabel were called
+		on each of them in turn. All the nodes are looked up at once, and
+		only the ones not seen before the chunk are relabeled one by one.
+
+		Arguments:
+		src - original IDs of the source nodes of the edges
+		dst - original IDs of the destination nodes of the edges
+
+		Return:
+		the lists of new source IDs, new destination IDs, and "1"/"0"
+		flags of whether the sources and destinations are seen first
+		"""
+		return relabel_chunk(src, dst, self.lookup, self.relabel)
+
+class DictRelabeler(Relabeler):
+	"""Relabeler that maps the original node IDs to new IDs in a
+	dictionary. A new ID is formatted once, when the node is first seen."""
+	def __init__(self, start=0):
+		Relabeler.__init__(self, start)
+		self.ids = dict()
+
+	def relabel(self, node_id):
+		new_id = self.ids.get(node_id)
+		if new_id is not None:
+			return new_id, "0"
+		new_id = self.ids[node_id] = str(self.next_id)
+		self.next_id += 1
+		return new_id, "1"
+
+	def lookup(self, node_ids):
+		return list(map(self.ids.get, node_ids))
+
+class CompactRelabeler(Relabeler):
+	"""Relabeler that maps 64-bit node keys (see node_key) to new IDs in an
+	open-addressing (linear probing) hash table of two flat arrays: one of
+	the keys, and one of the IDs, which take 32 bits each for as long as
+	they fit. A slot thus takes 12 bytes (16 bytes past 2^32 IDs) instead
+	of a dictionary entry, an ID string, and a new ID string per node; a
+	new ID is formatted whenever it is given out. A key of 0 marks an empty
+	slot; the ID of the key 0 is kept aside."""
+	def __init__(self, start=0):
+		Relabeler.__init__(self, start)
+		self.size = 0
+		self.zero = None
+		self.allocate(INITIAL_CAPACITY)
+
+	def allocate(self, capacity):
+		"""Allocate empty arrays of @capacity slots (a power of 2). IDs take
+		64 bits if an ID assigned before the table is full may need them."""
+		self.capacity = capacity
+		self.mask = capacity - 1
+		self.keys = (ctypes.c_uint64 * capacity)()
+		if self.start + capacity <= MAX_ID32:
+			self.ids = (ctypes.c_uint32 * capacity)()
+		else:
+			self.ids = (ctypes.c_uint64 * capacity)()
+
+	def grow(self):
+		"""Double the capacity of the table; it is kept at most 3/4 full so that probes stay short."""
+		keys, ids = self.keys, self.ids
+		self.allocate(self.capacity * 2)
+		mask = self.mask
+		for i, key in enumerate(keys):
+			if key != 0:
+				j = key & mask
+				while self.keys[j] != 0:
+					j = (j + 1) & mask
+				self.keys[j] = key
+				self.ids[j] = ids[i]
+
+	def find(self, key):
+		"""Return the index of the slot of the nonzero @key, or of the empty slot where it would go."""
+		keys = self.keys
+		mask = self.mask
+		j = key & mask
+		k = keys[j]
+		while k != key and k != 0:
+			j = (j + 1) & mask
+			k = keys[j]
+		return j
+
+	def relabel(self, node_id):
+		return self.relabel_key(node_key(node_id))
+
+	def lookup(self, node_ids):
+		return self.lookup_keys(list(map(node_key, node_ids)))
+
+	def relabel_columns(self, src, dst):
+		# nodes are hashed once, to their keys
+		return relabel_chunk(list(map(node_key, src)), list(map(node_key, dst)), self.lookup_keys, self.relabel_key)
+
+	def relabel_key(self, key):
+		"""The same as relabel, given the key of the node."""
+		if key == 0:
+			if self.zero is None:
+				self.zero = self.next_id
+				self.next_id += 1
+				return str(self.zero), "1"
+			return str(self.zero), "0"
+		j = self.find(key)
+		if self.keys[j] == key:
+			return str(self.ids[j]), "0"
+		if (self.size + 1) * 4 > self.capacity * 3:
+			self.grow()
+			j = self.find(key)
+		new_id = self.next_id
+		self.keys[j] = key
+		self.ids[j] = new_id
+		self.size += 1
+		self.next_id += 1
+		return str(new_id), "1"
+
+	def lookup_keys(self, keys):
+		"""The same as lookup, given the keys of the nodes."""
+		slots = self.keys
+		ids = self.ids
+		mask = self.mask
+		found = list()
+		for key in keys:
+			if key == 0:
+				found.append(None if self.zero is None else str(self.zero))
+				continue
+			j = key & mask
+			k = slots[j]
+			while k != key and k != 0:
+				j = (j + 1) & mask
+				k = slots[j]
+			found.append(str(ids[j]) if k != 0 else None)
+		return found
+
+class ArrayRelabeler(object):
+	"""Relabeler of chunks of edges at a time (requires numpy), with the
+	same numbering as Relabeler.relabel_columns. The 64-bit keys of the
+	nodes seen so far are kept in a sorted array, and their new IDs in
+	a parallel array of 32-bit integers (64-bit past 2^32 IDs), so that a
+	chunk is relabeled with a few vectorized operations on its unique
+	keys. Node IDs must already be 64-bit keys (see node_key)."""
+	def __init__(self, start=0):
+		if np is None:
+			raise ImportError("ArrayRelabeler requires numpy")
+		self.start = start
+		self.next_id = start
+		self.keys = np.empty(0, dtype=np.uint64)
+		self.ids = np.empty(0, dtype=np.uint32)
+
+	def __len__(self):
+		return self.next_id - self.start
+
+	def relabel_columns(self, src, dst):
+		"""Relabel the nodes of a chunk of edges in one call.
+
+		Arguments:
+		src - array of the 64-bit keys of the source nodes of the edges
+		dst - array of the 64-bit keys of the destination nodes of the edges
+
+		Return:
+		the arrays of new source IDs, new destination IDs, and 1/0 (int8)
+		flags of whether the sources and destinations are seen first
+		"""
+		num_edges = len(src)
+		endpoints = np.empty(2 * num_edges, dtype=np.uint64)
+		endpoints[0::2] = np.asarray(src).astype(np.uint64, copy=False)
+		endpoints[1::2] = np.asarray(dst).astype(np.uint64, copy=False)
+		unique, first, inverse = np.unique(endpoints, return_index=True, return_inverse=True)
+
+		# unique keys already seen in earlier chunks
+		pos = np.searchsorted(self.keys, unique)
+		seen = np.zeros(len(unique), dtype=bool)
+		inside = pos < len(self.keys)
+		seen[inside] = self.keys[pos[inside]] == unique[inside]
+		unique_ids = np.empty(len(unique), dtype=np.int64)
+		unique_ids[seen] = self.ids[pos[seen]]
+
+		# number the other keys in the order in which they are first seen in the chunk
+		new = np.flatnonzero(~seen)
+		new = new[np.argsort(first[new], kind='stable')]
+		unique_ids[new] = np.arange(self.next_id, self.next_id + len(new))
+		self.next_id += len(new)
+		if self.next_id - 1 > MAX_ID32 and self.ids.dtype != np.uint64:
+			self.ids = self.ids.astype(np.uint64)
+		self.keys = np.insert(self.keys, pos[~seen], unique[~seen])
+		self.ids = np.insert(self.ids, pos[~seen], unique_ids[~seen].astype(self.ids.dtype))
+
+		ids = unique_ids[inverse.reshape(-1)]
+		first_seen = np.zeros(2 * num_edges, dtype=np.int8)
+		first_seen[first[new]] = 1
+		return ids[0::2], ids[1::2], first_seen[0::2], first_seen[1::2]
+
+def new_relabeler(store, start=0):
+	"""Create an empty relabeler.
+
+	Arguments:
+	store - the kind of the relabeler (one of RELABEL_STORES)
+	start - the first new ID
+
+	Return:
+	the relabeler
+	"""
+	if store == "dict":
+		return DictRelabeler(start)
+	if store == "compact":
+		if xxhash is None:
+			raise ImportError("the compact relabeler requires xxhash")
+		return CompactRelabeler(start)
+	raise ValueError("unknown relabeler {} (choose from {})".format(store, ", ".join(RELABEL_STORES)))
@@ -0,0 +1,36 @@
+#!/usr/bin/python
+import math
+
+def parse_splits(spec):
+	"""Parse a split specification (e.g., from -p) into base graph sizes.
+
+	Arguments:
+	spec - comma-separated list of sizes, each either a percentage
+	of the graph (e.g., "5%") or an absolute number of edges (e.g., "4000")
+
+	Return:
+	the list of the sizes (str), without duplicates, in the order given
+	"""
+	splits = list()
+	for split in spec.split(","):
+		split = split.strip()
+		if split and split not in splits:
+			splits.append(split)
+	return splits
+
+def split_size(split, total):
+	"""Compute the size of the base graph of a graph under a split.
+
+	Arguments:
+	split - a size given by parse_splits
+	total - number of edges of the graph; may be None if @split is an absolute size
+
+	Return:
+	the number of edges of the base graph (a percentage is rounded up),
+	never larger than the graph itself
+	"""
+	if split.endswith("%"):
+		return int(math.ceil(total * (float(split[:-1]) / 100)))
+	if total is None:
+		return int(split)
+	return min(int(split), total)
@@ -2,20 +2,43 @@
 from __future__ import print_function
 import os, sys, argparse
 import tqdm
+from partool.relabel import Relabeler, new_relabeler
+from partool.splits import parse_splits, split_size
+
+class RocksRelabeler(Relabeler):
+	"""Relabeler (see partool/relabel.py) that keeps the new IDs in the RocksDB database @db."""
+	def __init__(self, db, start=0):
+		Relabeler.__init__(self, start)
+		self.db = db
+
+	def relabel(self, node_id):
+		new_id = self.db.get(node_id)
+		if new_id is not None:
+			return new_id, "0"
+		new_id = str(self.next_id)
+		self.db.put(node_id, new_id)
+		self.next_id += 1
+		return new_id, "1"
+
+	def lookup(self, node_ids):
+		return [self.db.get(node_id) for node_id in node_ids]
 
 if __name__ == "__main__":
 	parser = argparse.ArgumentParser(description='Convert edgelist datasets to Unicorn Stream datasets.')
 	parser.add_argument('-v', '--verbose', help='increase console verbosity', action='store_true')
 	parser.add_argument('-m', '--memory', help='use in-memory dictionary instead of RocksDB', action='store_true')
+	parser.add_argument('-c', '--compact', help='use a compact in-memory table of 64-bit node IDs instead of RocksDB (less memory than -m, but slower)', action='store_true')
 	parser.add_argument('-S', '--size', help='size of base output file in # of edges (set automatically if not given)', type=int)
 	parser.add_argument('-i', '--input', help='input file path', required=True)
 	parser.add_argument('-b', '--base', help='base output file path', required=True)
 	parser.add_argument('-s', '--stream', help='stream output file path', required=True)
+	parser.add_argument('-p', '--splits', help='write a base/stream output pair for each of these base sizes in a single pass, e.g., "1%%,5%%,10%%,4000" (-b and -s must contain {split}; overrides -S)')
 	parser.add_argument('-I', '--information', help='print out the graph statistics to stats.txt', action='store_true', required=False)
 	global args
 	args = parser.parse_args()
 
-	if not args.memory:
+	# nodes are relabeled with IDs starting from 1
+	if not args.memory and not args.compact:
 		import rocksdb
 		# create database for nodes
 		opts = rocksdb.Options()
@@ -33,27 +56,47 @@ if __name__ == "__main__":
 		db = rocksdb.DB('nodes.db', opts)
 		if args.verbose:
 			print("\x1b[6;30;42m[+]\x1b[0m setting up database nodes.db in current directory...")
+		nodes = RocksRelabeler(db, 1)
+	elif args.compact:
+		nodes = new_relabeler("compact", 1)
+	else:
+		nodes = new_relabeler("dict", 1)
+
+	if args.splits:
+		splits = parse_splits(args.splits)
+		if "{split}" not in args.base or "{split}" not in args.stream:
+			print("\x1b[6;30;41m[error]\x1b[0m -b and -s must contain {split} with -p")
+			sys.exit(1)
+	elif args.size is None:
+		splits = ["10%"]
 	else:
-		db = dict()
+		splits = [str(args.size)]
 
-	if args.size is None:
+	total = None
+	if any(split.endswith("%") for split in splits):
 		# auto set base graph size in # of edges
 		total = 0
 		with open(args.input) as f:
 			for line in f:
 				total += 1
 		f.close()
-		args.size = total * 0.1
 
-	bf = open(args.base, "w")
-	if args.verbose:
-		print("\x1b[6;30;42m[+]\x1b[0m opening base output file {} to write...".format(args.base))
-	sf = open(args.stream, "w")
-	if args.verbose:
-		print("\x1b[6;30;42m[+]\x1b[0m opening stream output file {} to write...".format(args.stream))
+	# one base/stream output pair for each split, all written in a single pass
+	outputs = list()
+	for split in splits:
+		size = split_size(split, total)
+		if args.splits:
+			base, stream = args.base.format(split=split), args.stream.format(split=split)
+		else:
+			base, stream = args.base, args.stream
+		bf = open(base, "w")
+		if args.verbose:
+			print("\x1b[6;30;42m[+]\x1b[0m opening base output file {} to write...".format(base))
+		sf = open(stream, "w")
+		if args.verbose:
+			print("\x1b[6;30;42m[+]\x1b[0m opening stream output file {} to write...".format(stream))
+		outputs.append((size, bf, sf))
 
-	# node ID starts from 1
-	nid = 1
 	cnt = 0
 
 	description = '\x1b[6;30;43m[i]\x1b[0m Progress'
@@ -64,33 +107,8 @@ if __name__ == "__main__":
 			pb.update()
 			edge = line.strip().split("\t")
 			try:
-				srcID = db.get(edge[0])
-				srcBool = None
-				if srcID != None:	# Check if source ID has been seen before.
-					edge[0] = srcID
-					srcBool = "0"
-				else:
-					srcBool = "1"
-					if args.memory:
-						db[edge[0]] = str(nid)
-					else:
-						db.put(edge[0], str(nid))
-					edge[0] = str(nid)
-					nid = nid + 1
-
-				dstID = db.get(edge[1])
-				dstBool = None
-				if dstID != None:	# Check if destination ID has been seen before.
-					edge[1] = dstID
-					dstBool = "0"
-				else:
-					dstBool = "1"
-					if args.memory:
-						db[edge[1]] = str(nid)
-					else:
-						db.put(edge[1], str(nid))
-					edge[1] = str(nid)
-					nid = nid + 1
+				edge[0], srcBool = nodes.relabel(edge[0])	# srcBool tells if source ID is seen for the first time
+				edge[1], dstBool = nodes.relabel(edge[1])	# dstBool tells if destination ID is seen for the first time
 
 				attributes = edge[2].strip().split(":")
 				srctype = attributes[0]
@@ -98,21 +116,28 @@ if __name__ == "__main__":
 				edgetype = attributes[2]
 				timestamp = attributes[3]
 				
-				if cnt < args.size:
-					cnt = cnt + 1
-					bf.write(edge[0] + ' ' + edge[1] + ' ' + srctype + ':' + dsttype + ':' + edgetype + ':' + timestamp + '\n')
-				else:
-					cnt = cnt + 1
-					sf.write(edge[0] + ' ' + edge[1] + ' ' + srctype + ':' + dsttype + ':' + edgetype + ':' + srcBool + ":" + dstBool + ":" + timestamp + '\n')
+				baseLine = None
+				streamLine = None
+				for size, bf, sf in outputs:
+					if cnt < size:
+						if baseLine is None:
+							baseLine = edge[0] + ' ' + edge[1] + ' ' + srctype + ':' + dsttype + ':' + edgetype + ':' + timestamp + '\n'
+						bf.write(baseLine)
+					else:
+						if streamLine is None:
+							streamLine = edge[0] + ' ' + edge[1] + ' ' + srctype + ':' + dsttype + ':' + edgetype + ':' + srcBool + ":" + dstBool + ":" + timestamp + '\n'
+						sf.write(streamLine)
+				cnt = cnt + 1
 			except:
 				print("\x1b[6;30;41m\n[error]\x1b[0m  skipping this problematic line:{}".format(line))
 
 
 	f.close()
-	bf.close()
-	sf.close()
+	for size, bf, sf in outputs:
+		bf.close()
+		sf.close()
 	if args.information:
 		stats = open("stats.txt", "a+")
-		stats.write(str(nid) + '\t' + str(cnt) + '\n')
+		stats.write(str(nodes.next_id) + '\t' + str(cnt) + '\n')
 		stats.close()
 	print("\x1b[6;30;42m\n[success]\x1b[0m  processing of {} is done. Data now can be accepted by the graph processing framework.".format(args.input))
@@ -13,13 +13,16 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/crimson-unicorn/parsers/tree/master/cdm/ProvParser",
     install_requires=[
-        'ijson',
-        'cffi',
         'xxhash',
         'yappi',
         'python-rocksdb',
         'tqdm',
     ],
+    extras_require={
+        # faster JSON decoding (see provparser/partool/decoder.py)
+        'ujson': ['ujson'],
+        'ijson': ['ijson', 'cffi'],
+    },
     dependency_links=[
           "https://github.com/isagalaev/ijson/tarball/e252a50#egg=ijson-2.4",
     ],
@@ -1,23 +1,29 @@
 #!/usr/bin/env python
 
-import os, sys, argparse, json, hashlib
+import os, sys, argparse, hashlib
 import logging
 # from sqlitedict import SqliteDict
 
 from constants import *
 
+# the JSON decoding layer is shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ProvParser'))
+from provparser.partool import decoder
+
 parser = argparse.ArgumentParser(description='Convert CDM data to Unicorn')
 parser.add_argument('--source', help='Input data folder', required=True)
 parser.add_argument('--system', help='Tracing system used', choices=['cadets', 'clearscope', 'fivedirections', 'theia', 'trace'], required=True)
 parser.add_argument('--format', help='Consume Avro/JSON serialised CDM (Only JSON is supported as of 01-04-19)', default='json',
                     choices=['avro', 'json'], required=False)
 parser.add_argument('--save', help='Output data filename', required=True)
+parser.add_argument('--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + decoder.BACKENDS, default='auto')
 args = vars(parser.parse_args())
 
 input_source = args['source']
 system = args['system']
 input_format = args['format']
 output_locat = args['save']
+decoder.use(args['decoder'])
 
 next_id = 1
 
@@ -35,7 +41,7 @@ def print_all_cdm_record_type_in_json(fp):
 	f = open(fp, 'r')
 	types = set()
 	for line in f:
-		cdm_record = json.loads(line.strip())
+		cdm_record = decoder.loads(line.strip())
 		cdm_record_type = cdm_record['datum'].keys()[0]
 		if cdm_record_type not in types:
 			types.add(cdm_record_type)
@@ -1261,7 +1267,7 @@ def generate_output(nodes, fh, fp):
 		if input_format == 'avro':
 			raise NotImplementedError('CDM avro format is not supported as of 01-04-09.')
 		elif input_format == 'json':
-			cdm_record = json.loads(line.strip())
+			cdm_record = decoder.loads(line.strip())
 			cdm_record_type = cdm_record['datum'].keys()[0]
 			cdm_record_value = cdm_record['datum'][cdm_record_type]
 
@@ -1330,7 +1336,7 @@ for data_file in files:
 			if input_format == 'avro':
 				raise NotImplementedError('CDM avro format is not supported as of 01-04-09.')
 			elif input_format == 'json':
-				cdm_record = json.loads(line.strip())
+				cdm_record = decoder.loads(line.strip())
 				cdm_record_type = cdm_record['datum'].keys()[0]
 				cdm_record_value = cdm_record['datum'][cdm_record_type]
 				
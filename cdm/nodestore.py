@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import sqlite3, struct, binascii
+import collections
+
+# value of a node in the store: its nid (64 bits) and the MD5 digest of its label (16 bytes)
+NODE_FORMAT = struct.Struct('<Q16s')
+# default number of writes committed in a single transaction
+BATCH_SIZE = 100000
+# default number of nodes kept in memory for lookups
+CACHE_SIZE = 1 << 20
+
+class NodeStore(object):
+	"""Node store of the CDM converter, which maps the UUID of a node to
+	(nid, label), where label is the hex MD5 digest given by labelgen.
+
+	Nodes are kept in the SQLite database at @path, whose nodes table
+	is emptied first. Each node is stored as a fixed NODE_FORMAT value
+	instead of a pickled dictionary. Writes are buffered and committed
+	@batch_size at a time in a single transaction instead of one
+	transaction each. The last @cache_size nodes written or looked up are
+	kept in memory in LRU order, so that lookups of hot UUIDs do not go
+	to the database. Lookups served from memory count as hits, and the
+	ones that go to the database as misses (see report)."""
+	def __init__(self, path, batch_size=BATCH_SIZE, cache_size=CACHE_SIZE):
+		self.db = sqlite3.connect(path)
+		# the database is scratch space of a single run, so durability is not needed
+		self.db.execute('PRAGMA synchronous = OFF')
+		self.db.execute('PRAGMA journal_mode = MEMORY')
+		self.db.execute('DROP TABLE IF EXISTS nodes')
+		self.db.execute('CREATE TABLE nodes (uuid TEXT PRIMARY KEY, value BLOB NOT NULL)')
+		self.db.commit()
+		self.batch_size = batch_size
+		self.cache_size = cache_size
+		self.pending = dict()			# uuid -> packed value, not committed yet
+		self.cache = collections.OrderedDict()	# uuid -> (nid, label), in LRU order
+		self.hits = 0
+		self.misses = 0
+
+	def remember(self, uuid, node):
+		"""Put @node in the cache as the most recently used, and evict the least recently used if the cache is full."""
+		self.cache.pop(uuid, None)
+		self.cache[uuid] = node
+		if len(self.cache) > self.cache_size:
+			self.cache.popitem(last=False)
+
+	def get(self, uuid, default=None):
+		"""Return (nid, label) of the node @uuid, or @default if there is none."""
+		node = self.cache.get(uuid)
+		if node is not None:
+			self.hits += 1
+			self.remember(uuid, node)
+			return node
+		value = self.pending.get(uuid)
+		if value is not None:
+			self.hits += 1
+		else:
+			self.misses += 1
+			row = self.db.execute('SELECT value FROM nodes WHERE uuid = ?', (uuid,)).fetchone()
+			if row is None:
+				return default
+			value = row[0]
+		nid, digest = NODE_FORMAT.unpack(bytes(value))
+		node = (nid, binascii.hexlify(digest))
+		self.remember(uuid, node)
+		return node
+
+	def __contains__(self, uuid):
+		return self.get(uuid) is not None
+
+	def __getitem__(self, uuid):
+		node = self.get(uuid)
+		if node is None:
+			raise KeyError(uuid)
+		return node
+
+	def __setitem__(self, uuid, node):
+		"""@node is (nid, label); a node written again replaces the old one."""
+		nid, label = node
+		self.pending[uuid] = NODE_FORMAT.pack(nid, binascii.unhexlify(label))
+		self.remember(uuid, node)
+		if len(self.pending) >= self.batch_size:
+			self.flush()
+
+	def flush(self):
+		"""Commit the pending writes in a single transaction."""
+		if self.pending:
+			self.db.executemany('INSERT OR REPLACE INTO nodes VALUES (?, ?)',
+				((uuid, sqlite3.Binary(value)) for uuid, value in self.pending.items()))
+			self.db.commit()
+			self.pending = dict()
+
+	def report(self):
+		"""Describe the lookups of the store so far."""
+		lookups = self.hits + self.misses
+		return '{} lookups: {} hits ({:.1f}%) and {} misses ({:.1f}%) of the in-memory cache of {} nodes'.format(
+			lookups, self.hits, 100.0 * self.hits / max(lookups, 1),
+			self.misses, 100.0 * self.misses / max(lookups, 1), self.cache_size)
+
+	def close(self):
+		self.flush()
+		self.db.close()
@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 
-import os, sys, argparse, json, hashlib
+import os, sys, argparse, hashlib
 import tarfile as tf
 import logging
-import ijson.backends.yajl2_cffi as ijson
 
-from sqlitedict import SqliteDict
 from constants import *
+from nodestore import NodeStore, BATCH_SIZE, CACHE_SIZE
+
+# the JSON decoding layer is shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ProvParser'))
+from provparser.partool import decoder
 
 parser = argparse.ArgumentParser(description='Convert CDM data to Unicorn')
 parser.add_argument('--source', help='Input data folder', required=True)
@@ -14,12 +17,16 @@ parser.add_argument('--system', help='Tracing system used', choices=['cadets', '
 parser.add_argument('--format', help='Consume Avro/JSON serialised CDM (Only JSON is supported as of 01-04-19)', default='json',
                     choices=['avro', 'json'], required=False)
 parser.add_argument('--save', help='Output data filename', required=True)
+parser.add_argument('--decoder', help='JSON decoder backend (default is the fastest one installed)', choices=['auto'] + decoder.BACKENDS, default='auto')
+parser.add_argument('--node-batch', help='number of node writes committed to the node database in a single transaction (default is {})'.format(BATCH_SIZE), type=int, default=BATCH_SIZE)
+parser.add_argument('--node-cache', help='number of nodes kept in memory for lookups (default is {})'.format(CACHE_SIZE), type=int, default=CACHE_SIZE)
 args = vars(parser.parse_args())
 
 input_source = args['source']
 system = args['system']
 input_format = args['format']
 output_locat = args['save']
+decoder.use(args['decoder'])
 
 next_id = 1
 
@@ -37,7 +44,7 @@ def print_all_cdm_record_type_in_json(fp):
 	f = open(fp, 'r')
 	types = set()
 	for line in f:
-		cdm_record = json.loads(line.strip())
+		cdm_record = decoder.loads(line.strip())
 		cdm_record_type = cdm_record['datum'].keys()[0]
 		if cdm_record_type not in types:
 			types.add(cdm_record_type)
@@ -1284,36 +1291,32 @@ def generate_output(nodes, parser, fp):
 			if values['srcUUID'] == None or values['dstUUID'] == None:
 				continue
 
-			if values['srcUUID'] not in nodes:
+			# a single lookup per node, which gives its nid and its label
+			srcNode = nodes.get(values['srcUUID'])
+			if srcNode is None:
 				# raise ValueError('An unmatched subject UUID from edge (' + str(edge['uuid']) + ') of type: ' + edge['type'] + '.')
 				logging.debug('An unmatched source UUID from edge (' + repr(values['uuid']) + ') of type: ' + values['type'] + '.')
 				continue
-			else:
-				srcNodeID = values['srcUUID']
-				srcNode = nodes[srcNodeID]
-				srcNodeLabel = labelgen(srcNode)
+			srcNodeID, srcNodeLabel = srcNode
 
-			if values['dstUUID'] not in nodes:
+			dstNode = nodes.get(values['dstUUID'])
+			if dstNode is None:
 				# raise ValueError('An unmatched object1 UUID from edge (' + str(edge['uuid']) + ') of type: ' + edge['type'] + '.')
 				logging.debug('An unmatched destination UUID from edge (' + repr(values['uuid']) + ') of type: ' + values['type'] + '.')
 				continue
-			else:
-				dstNodeID = values['dstUUID']
-				dstNode = nodes[dstNodeID]
-				dstNodeLabel = labelgen(dstNode)
+			dstNodeID, dstNodeLabel = dstNode
 
-			f.write(str(srcNode['nid']) + '\t' + str(dstNode['nid']) + '\t' + srcNodeLabel + ":" + dstNodeLabel + ":" + labelgen(values) + ":" + str(values['timestamp']) + "\t" + "\n")
+			f.write(str(srcNodeID) + '\t' + str(dstNodeID) + '\t' + srcNodeLabel + ":" + dstNodeLabel + ":" + labelgen(values) + ":" + str(values['timestamp']) + "\t" + "\n")
 		
 			if values['bidirectional']:
-				f.write(str(dstNode['nid']) + '\t' + str(srcNode['nid']) + '\t' + dstNodeLabel + ":" + srcNodeLabel + ":" + labelgen(values) + ":" + str(values['timestamp']) + "\t" + "\n")
+				f.write(str(dstNodeID) + '\t' + str(srcNodeID) + '\t' + dstNodeLabel + ":" + srcNodeLabel + ":" + labelgen(values) + ":" + str(values['timestamp']) + "\t" + "\n")
 
 	f.close()
 
 logging.basicConfig(filename=system + '-error.log',level=logging.DEBUG)
 
-# uuid -> ['type', ...]
-nodes = SqliteDict('./' + system + '-nodes.sqlite', autocommit=True)
-# nodes = dict()
+# uuid -> (nid, label)
+nodes = NodeStore('./' + system + '-nodes.sqlite', args['node_batch'], args['node_cache'])
 
 # for debugging: make sure no two edges have the same UUIDs
 # edgeUUID = set()
@@ -1331,7 +1334,7 @@ for data_file in files:
 
 		for sorted_file in sorted_files:
 			file_obj = f.extractfile(f.getmember(sorted_file))
-			parser = ijson.common.items(ijson.parse(file_obj, multiple_values=True), '')
+			parser = decoder.items(file_obj)
 			for cdm_record in parser:
 				if input_format == 'avro':
 					raise ValueError('This is a streaming JSON parser implementation.')
@@ -1346,7 +1349,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_SRCSINK: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 				elif cdm_record_type == CDM_TYPE_SUBJECT:
@@ -1355,7 +1358,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_SUBJECT: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 				elif cdm_record_type == CDM_TYPE_FILE:
@@ -1363,15 +1366,11 @@ for data_file in files:
 					values = process_cdm_file(cdm_record_value, input_format, next_id)
 				
 					if uuid in nodes:
-						# clearscope contain identical records
-						# check if the original UUIDs are the same
-						node = nodes[uuid]
-						nodeUUID = node['uuid']
-						if nodeUUID == cdm_record_value['uuid']:
-							continue	# if simply because identical records, we just drop the record
-						else:	# if collision occurs
-							logging.debug('CDM_TYPE_FILE: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+						# clearscope contain identical records;
+						# nodes are keyed by their original UUIDs,
+						# so a record seen again is simply dropped
+						continue
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 				elif cdm_record_type == CDM_TYPE_SOCK:
@@ -1380,7 +1379,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_SOCK: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 				elif cdm_record_type == CDM_TYPE_PIPE:
@@ -1389,7 +1388,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_PIPE: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 					# TODO:
@@ -1404,7 +1403,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_PRINCIPAL: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 				# clearscope
 				elif cdm_record_type == CDM_TYPE_TAG:
@@ -1420,7 +1419,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_HOST: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 
 				elif cdm_record_type == CDM_TYPE_KEY:
@@ -1431,7 +1430,7 @@ for data_file in files:
 
 					if uuid in nodes:
 						logging.debug('CDM_TYPE_MEMORY: UUID is not unique. UUID: ' + repr(uuid))
-					nodes[uuid] = values
+					nodes[uuid] = (values['nid'], labelgen(values))
 					next_id += 1
 				elif cdm_record_type == CDM_TYPE_ENDMARKER:
 					pass
@@ -1446,6 +1445,9 @@ for data_file in files:
 
 		f.close()
 
+# commit the last nodes before looking them up
+nodes.flush()
+
 # go through the files again to output edge lists
 if system == 'cadets':
 	first = ['cadets-e3-0.json', 'cadets-e3-1.json', 'cadets-e3-2.json']
@@ -1505,7 +1507,7 @@ elif system == 'theia':
 
 			for sorted_file in sorted_files:
 				file_obj = f.extractfile(f.getmember(sorted_file))
-				parser = ijson.common.items(ijson.parse(file_obj, multiple_values=True), '')
+				parser = decoder.items(file_obj)
 				generate_output(nodes, parser, out_third)
 
 elif system == 'fivedirections':
@@ -1519,7 +1521,8 @@ elif system == 'fivedirections':
 		fh.close()
 
 
-# nodes.close()
+print('\x1b[6;30;43m[INFO]\x1b[0m Node store: {}'.format(nodes.report()))
+nodes.close()
 
 
 
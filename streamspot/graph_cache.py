@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+import graph_index
+import tqdm
+import numpy as np
+import pandas as pd
+
+
+# the cache of an input file is a directory next to it, with this suffix
+CACHE_SUFFIX = ".cache"
+# number of lines read from the input file at a time when the cache is built
+CHUNK_SIZE = 1000000
+# columns of the cache, each stored in its own .npy file
+COLUMNS = ["src_id", "src_type", "dst_id", "dst_type", "edge_type", "rows"]
+
+
+def to_ids(column):
+    """Convert the node IDs (in str) in the data frame @column to
+    int64. Raise ValueError if an ID does not survive the round
+    trip, e.g., it is not an integer or has leading zeros."""
+    ids = pd.to_numeric(column, errors="coerce")
+    if ids.isnull().any() or ids.dtype.kind != "i":
+        raise ValueError("node IDs are not all integers")
+    ids = ids.astype(np.int64)
+    if not (ids.astype(str) == column).all():
+        raise ValueError("node IDs cannot be stored as integers without loss")
+    return ids.values
+
+
+def to_codes(column, vocab):
+    """Convert the types (in str) in the data frame @column to one-byte
+    codes. @vocab maps each type seen so far to its code and is extended
+    with new types."""
+    for value in column.unique():
+        if value not in vocab:
+            if len(vocab) > 255:
+                raise ValueError("more than 256 distinct node and edge types")
+            vocab[value] = len(vocab)
+    return column.map(vocab).values.astype(np.uint8)
+
+
+def build_cache(file_name, cache_dir):
+    """Parse the StreamSpot file @file_name once and save it in columnar
+    form in @cache_dir: node IDs as int64, node and edge types as uint8
+    codes, and the row numbers of the edges grouped by graph ("rows").
+    The edges of a graph are rows[start:end], where [start, end) is the
+    entry of the graph in "graphs" of the metadata."""
+    columns = {name: list() for name in COLUMNS[:-1]}
+    graphs = list()
+    vocab = dict()
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Caching StreamSpot data from {}".format(file_name)
+    pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" edges")
+    for chunk in pd.read_csv(file_name, sep='\t', dtype=str, header=None, chunksize=CHUNK_SIZE):
+        columns["src_id"].append(to_ids(chunk[0]))
+        columns["src_type"].append(to_codes(chunk[1], vocab))
+        columns["dst_id"].append(to_ids(chunk[2]))
+        columns["dst_type"].append(to_codes(chunk[3], vocab))
+        columns["edge_type"].append(to_codes(chunk[4], vocab))
+        graphs.append(chunk[5].values)
+        pb.update(chunk.shape[0])
+    pb.close()
+
+    graphs = np.concatenate(graphs) if graphs else np.empty(0, dtype=object)
+    graph_ids, graph_codes = np.unique(graphs, return_inverse=True)
+    # a stable sort keeps the edges of each graph in their original order
+    rows = np.argsort(graph_codes, kind="stable").astype(np.int64)
+    bounds = np.searchsorted(graph_codes[rows], np.arange(len(graph_ids) + 1))
+
+    os.makedirs(cache_dir)
+    for name in COLUMNS[:-1]:
+        dtype = np.int64 if name.endswith("_id") else np.uint8
+        values = np.concatenate(columns[name]) if columns[name] else np.empty(0, dtype=dtype)
+        np.save(os.path.join(cache_dir, name + ".npy"), values)
+    np.save(os.path.join(cache_dir, "rows.npy"), rows)
+    meta = {"fingerprint": graph_index.fingerprint(file_name),
+            "vocab": sorted(vocab, key=vocab.get),
+            "graphs": {str(g): [int(bounds[i]), int(bounds[i + 1])] for i, g in enumerate(graph_ids)}}
+    with open(os.path.join(cache_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    f.close()
+
+
+def load_cache(file_name):
+    """Return the cache of the StreamSpot file @file_name as a dictionary
+    of read-only memory-mapped columns plus its metadata ("meta"). The
+    cache is built the first time and rebuilt if the input file changes."""
+    cache_dir = file_name + CACHE_SUFFIX
+    meta_name = os.path.join(cache_dir, "meta.json")
+    meta = None
+    if os.path.exists(meta_name):
+        with open(meta_name, "r") as f:
+            try:
+                meta = json.load(f)
+            except ValueError:
+                meta = None
+        f.close()
+        if meta is None or meta.get("fingerprint") != graph_index.fingerprint(file_name):
+            print("\x1b[6;30;43m[INFO]\x1b[0m Cache {} is out of date and will be rebuilt".format(cache_dir))
+            meta = None
+    if meta is None:
+        tmp_dir = cache_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        build_cache(file_name, tmp_dir)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.rename(tmp_dir, cache_dir)
+        with open(meta_name, "r") as f:
+            meta = json.load(f)
+        f.close()
+    cache = {name: np.load(os.path.join(cache_dir, name + ".npy"), mmap_mode="r") for name in COLUMNS}
+    cache["meta"] = meta
+    return cache
+
+
+def cached_graph(cache, graph_id=None):
+    """Return the edges of graph @graph_id in @cache as a data frame with the
+    same columns as the StreamSpot file, except that node IDs are int64.
+    If @graph_id is None, all edges are returned in their original order."""
+    if graph_id is None:
+        rows = slice(None)
+    else:
+        start, end = cache["meta"]["graphs"].get(graph_id, [0, 0])
+        rows = cache["rows"][start:end]
+    vocab = np.array(cache["meta"]["vocab"] or [""], dtype=object)
+    return pd.DataFrame({0: np.asarray(cache["src_id"][rows]),
+                         1: vocab[cache["src_type"][rows]],
+                         2: np.asarray(cache["dst_id"][rows]),
+                         3: vocab[cache["dst_type"][rows]],
+                         4: vocab[cache["edge_type"][rows]]})
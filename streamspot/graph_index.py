@@ -0,0 +1,139 @@
+import os
+import json
+import zlib
+import tqdm
+
+
+# the index of an input file is stored next to it, with this suffix
+INDEX_SUFFIX = ".idx"
+# number of bytes at the head and at the tail of an input file covered by its checksum
+CHECKSUM_BLOCK = 1 << 20
+
+
+def fingerprint(file_name):
+    """Fingerprint of the file @file_name, used to tell whether
+    an index still describes the file. It contains the size and
+    modification time of the file, and a CRC32 checksum of its
+    first and last CHECKSUM_BLOCK bytes (which overlap in files
+    smaller than twice that)."""
+    stat = os.stat(file_name)
+    checksum = 0
+    with open(file_name, "rb") as f:
+        checksum = zlib.crc32(f.read(CHECKSUM_BLOCK), checksum)
+        if stat.st_size > CHECKSUM_BLOCK:
+            f.seek(-CHECKSUM_BLOCK, os.SEEK_END)
+            checksum = zlib.crc32(f.read(CHECKSUM_BLOCK), checksum)
+    f.close()
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "checksum": checksum & 0xffffffff}
+
+
+def build_index(file_name):
+    """Scan the StreamSpot file @file_name once and return its index, a
+    dictionary that maps each graph ID (in str) to the number of edges
+    of the graph ("count") and the byte ranges [start, end) of the file
+    that contain them ("ranges"). Consecutive edges of the same graph
+    share a single range."""
+    graphs = dict()
+    offset = 0
+    last = None                                                 # graph entry of the previous line
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Indexing StreamSpot data from {}".format(file_name)
+    pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" edges")
+    with open(file_name, "rb") as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            edge = line.strip().split(b"\t")
+            if len(edge) < 6:                                   # skip empty or malformed lines
+                last = None
+                continue
+            pb.update()
+            graph_id = edge[5].decode("utf-8")
+            entry = graphs.get(graph_id)
+            if entry is None:
+                entry = {"count": 0, "ranges": list()}
+                graphs[graph_id] = entry
+            entry["count"] += 1
+            if entry is last:
+                entry["ranges"][-1][1] = offset                 # extend the range of the previous line
+            else:
+                entry["ranges"].append([start, offset])
+            last = entry
+    f.close()
+    pb.close()
+    return {"fingerprint": fingerprint(file_name), "graphs": graphs}
+
+
+def load_index(file_name):
+    """Return the index of the StreamSpot file @file_name. The index
+    is read from its sidecar file if one exists and still matches the
+    input file; otherwise, it is (re)built and saved for later runs."""
+    index_name = file_name + INDEX_SUFFIX
+    if os.path.exists(index_name):
+        with open(index_name, "r") as f:
+            try:
+                index = json.load(f)
+            except ValueError:
+                index = None
+        f.close()
+        if index is not None and index.get("fingerprint") == fingerprint(file_name):
+            return index
+        print("\x1b[6;30;43m[INFO]\x1b[0m Index {} is out of date and will be rebuilt".format(index_name))
+    index = build_index(file_name)
+    tmp_name = index_name + ".tmp"
+    with open(tmp_name, "w") as f:
+        json.dump(index, f)
+    f.close()
+    os.rename(tmp_name, index_name)
+    return index
+
+
+def graph_size(index, graph_id):
+    """Number of edges of graph @graph_id according to @index."""
+    entry = index["graphs"].get(graph_id)
+    if entry is None:
+        return 0
+    return entry["count"]
+
+
+def graph_ranges(index, graph_id):
+    """Byte ranges of graph @graph_id according to @index."""
+    entry = index["graphs"].get(graph_id)
+    if entry is None:
+        return list()
+    return entry["ranges"]
+
+
+def graph_lines(file_name, index, graph_id):
+    """Generate the lines (in str) of graph @graph_id in the StreamSpot file
+    @file_name, seeking straight to the byte ranges recorded in @index."""
+    with open(file_name, "rb") as f:
+        for start, end in graph_ranges(index, graph_id):
+            f.seek(start)
+            while f.tell() < end:
+                yield f.readline().decode("utf-8")
+    f.close()
+
+
+def graph_bytes(file_name, index, graph_id):
+    """Raw content (in bytes) of graph @graph_id in the StreamSpot file @file_name."""
+    chunks = list()
+    with open(file_name, "rb") as f:
+        for start, end in graph_ranges(index, graph_id):
+            f.seek(start)
+            chunks.append(f.read(end - start))
+    f.close()
+    return b"".join(chunks)
+
+
+def buffer_lines(buf, ranges):
+    """Generate the lines (in str) within the byte @ranges of the
+    buffer @buf, e.g., a memory-mapped StreamSpot file."""
+    for start, end in ranges:
+        while start < end:
+            stop = buf.find(b"\n", start, end)
+            if stop < 0:
+                stop = end
+            else:
+                stop += 1
+            yield buf[start:stop].decode("utf-8")
+            start = stop
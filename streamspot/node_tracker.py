@@ -0,0 +1,30 @@
+class NodeTracker(object):
+    """Keeps track of the nodes of a graph seen so far. Each node ID is
+    interned to a small integer, numbered from 0 in the order the nodes
+    are first seen, so that a lookup costs O(1) no matter how large the
+    graph is. If @arrange is set, visit returns the interned IDs instead
+    of the original ones (i.e., node IDs are rearranged to be Unicorn
+    compliant, exactly as parse_fast.py -a does)."""
+    def __init__(self, arrange=False):
+        self.arrange = arrange
+        self.ids = dict()                               # maps original node IDs to interned IDs
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, node_id):
+        return node_id in self.ids
+
+    def visit(self, node_id):
+        """Mark the node @node_id as seen. Return the ID to be written for the
+        node and "1" if the node is seen for the first time, or "0" otherwise."""
+        new_id = self.ids.get(node_id)
+        if new_id is None:
+            new_id = len(self.ids)
+            self.ids[node_id] = new_id
+            seen = "1"
+        else:
+            seen = "0"
+        if self.arrange:
+            return str(new_id), seen
+        return node_id, seen
@@ -1,72 +1,264 @@
+import os
 import sys
-import math
+import mmap
 import tqdm
 import argparse
+import multiprocessing
+import graph_index
+from node_tracker import NodeTracker
+from parse_all import parse_graph_ids, scenario_of
 
-def read_single_graph(file_name, graph_id):
-    """Read a single graph with ID @graph_id from the file @file_name
-    and return the list of its edges."""
-    graph = list()                                              # list of parsed graph edges
-    node_id_seen = list()                                       # list of the node id that we have seen already
+# base graph splits are shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+from provparser.partool.splits import parse_splits, split_size
+
+# memory-mapped input file shared by the workers in batch mode
+INPUT_MAP = None
+
+
+def parse_edges(lines, graph_id, pb, arrange=False):
+    """Parse the edges of the graph with ID @graph_id from @lines
+    and generate them one at a time. Only the node-seen state is
+    kept in memory. If @arrange is set, node IDs are rearranged
+    to be Unicorn compliant. Progress is tracked by @pb."""
+    nodes = NodeTracker(arrange)                                # the nodes that we have seen already
     cnt = 1                                                     # logical timestamps of edges
 
+    for line in lines:
+        edge = line.strip().split("\t")
+        if edge[5] == graph_id:                             # we only parse edges that are in the graph @graph_id
+            pb.update()                                     # for progress tracking
+            edge[0], src_bool = nodes.visit(edge[0])        # unseen node is given 1 in the edge entry, seen node 0
+            edge[2], dst_bool = nodes.visit(edge[2])
+            edge.append(src_bool)
+            edge.append(dst_bool)
+            edge.append(cnt)                                # give the edge a logical timestamp
+            cnt = cnt + 1
+            yield edge
+
+
+def parse_graph(lines, graph_id, pb, arrange=False):
+    """Parse the edges of the graph with ID @graph_id from @lines
+    and return the list of its edges. Progress is tracked by @pb."""
+    return list(parse_edges(lines, graph_id, pb, arrange))
+
+
+def open_graph(file_name, graph_id, index=None):
+    """Return the lines of the file @file_name to be parsed for
+    graph @graph_id. If the @index of the file is given, only the
+    lines of the graph are read."""
+    if index is None:
+        return open(file_name, "r")
+    return graph_index.graph_lines(file_name, index, graph_id)
+
+
+def read_single_graph(file_name, graph_id, index=None, arrange=False):
+    """Read a single graph with ID @graph_id from the file @file_name
+    and return the list of its edges. If the @index of the file is
+    given, only the lines of the graph are read."""
     desc = "\x1b[6;30;42m[STATUS]\x1b[0m Parsing StreamSpot data (graph id: {}) from {}".format(graph_id, file_name)
     pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" edges")
+    f = open_graph(file_name, graph_id, index)
+    graph = parse_graph(f, graph_id, pb, arrange)
+    f.close()
+    pb.close()
+    return graph
+
+
+def count_edges(file_name, graph_id):
+    """Count the edges of graph @graph_id in the file @file_name
+    without parsing them, i.e., by looking at the graph ID only."""
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Counting StreamSpot edges (graph id: {}) in {}".format(graph_id, file_name)
+    pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" lines")
+    total = 0
     with open(file_name, "r") as f:
         for line in f:
-            edge = line.strip().split("\t")
-            if edge[5] == graph_id:                             # we only parse edges that are in the graph @graph_id
-                pb.update()                                     # for progress tracking
-                if edge[0] in node_id_seen:                     # check if we have seen the source node before
-                    edge.append("0")                            # seen node is given 0 in the edge entry
-                else:
-                    edge.append("1")                            # unseen node is given 1 in the edge entry
-                    node_id_seen.append(edge[0])                # the unseen node is now seen
-                if edge[2] in node_id_seen:                     # check if we have seen the destination node before
-                    edge.append("0")
-                else:
-                    edge.append("1")
-                    node_id_seen.append(edge[2])
-                edge.append(cnt)                                # give the edge a logical timestamp
-                cnt = cnt + 1
-                graph.append(edge)
+            pb.update()
+            if line.rstrip().rsplit("\t", 1)[-1] == graph_id:
+                total = total + 1
     f.close()
     pb.close()
-    return graph
+    return total
+
+
+def stream_single_graph(file_name, graph_id, outputs, index=None, arrange=False):
+    """Parse a single graph with ID @graph_id from the file @file_name
+    and write each edge to @outputs (see write_graph) as soon as it is
+    parsed, so that memory holds only the node-seen state. The size of
+    the graph, if needed by a split, is taken from the @index of the
+    file if given, or counted in a separate pass otherwise. Return the
+    sizes of the base and the stream graph of each output."""
+    total = None
+    if any(split.endswith("%") for split, _, _ in outputs):
+        if index is None:
+            total = count_edges(file_name, graph_id)
+        else:
+            total = graph_index.graph_size(index, graph_id)
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Parsing StreamSpot data (graph id: {}) from {}".format(graph_id, file_name)
+    pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" edges")
+    f = open_graph(file_name, graph_id, index)
+    sizes = write_graph(parse_edges(f, graph_id, pb, arrange), outputs, total)
+    f.close()
+    pb.close()
+    return sizes
+
+
+def write_graph(edges, outputs, total=None):
+    """Write the parsed @edges of a graph to every base/stream graph pair
+    in @outputs, a list of (split, base_path, stream_path), in a single
+    pass. The first split_size(split) edges go to the base graph file
+    @base_path and the rest to the stream graph file @stream_path. Each
+    line is formatted once and written to every file it belongs to.
+    @edges can be a list or a generator; in the latter case, the number
+    of edges @total must be given if a split is a percentage. Return the
+    list of the sizes of the base and the stream graph of each pair."""
+    if total is None and isinstance(edges, list):
+        total = len(edges)
+    files = list()
+    for split, base_path, stream_path in outputs:
+        files.append((split_size(split, total), open(base_path, "w"), open(stream_path, "w")))
+
+    num_edges = 0
+    for edge in edges:
+        num_edges = num_edges + 1
+        base_line = None
+        stream_line = None
+        for base_graph_size, base_file, stream_file in files:
+            if edge[8] <= base_graph_size:
+                if base_line is None:
+                    base_line = "{} {} {}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], edge[8])
+                base_file.write(base_line)
+            else:
+                if stream_line is None:
+                    stream_line = "{} {} {}:{}:{}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], edge[6], edge[7], edge[8])
+                stream_file.write(stream_line)
+
+    sizes = list()
+    for base_graph_size, base_file, stream_file in files:
+        base_file.close()
+        stream_file.close()
+        base_graph_size = min(base_graph_size, num_edges)
+        sizes.append((base_graph_size, num_edges - base_graph_size))
+    return sizes
+
+
+def init_worker(file_name):
+    """Map the input file @file_name read-only into memory, unless the
+    mapping is already inherited from the parent process."""
+    global INPUT_MAP
+    if INPUT_MAP is None and os.path.getsize(file_name) > 0:     # an empty file cannot be mapped
+        with open(file_name, "rb") as f:
+            INPUT_MAP = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        f.close()
+
+
+def parse_graph_task(task):
+    """Parse a single graph in a worker process. @task is a tuple
+    (graph_id, ranges, total, outputs, arrange), where @ranges are the byte
+    ranges of the graph in the shared input file, @total is its number
+    of edges and @outputs are passed to write_graph. Edges are written
+    as soon as they are parsed."""
+    graph_id, ranges, total, outputs, arrange = task
+    edges = parse_edges(graph_index.buffer_lines(INPUT_MAP, ranges), graph_id, tqdm.tqdm(disable=True), arrange)
+    return graph_id, write_graph(edges, outputs, total)
+
+
+def graph_outputs(graph_id, splits, base_template, stream_template):
+    """List of (split, base_path, stream_path) of graph @graph_id, one
+    for each split in @splits, created from the output path templates."""
+    outputs = list()
+    for split in splits:
+        fields = {"graph": graph_id, "scenario": scenario_of(graph_id), "split": split}
+        outputs.append((split, base_template.format(**fields), stream_template.format(**fields)))
+    return outputs
+
+
+def parse_graphs(file_name, graph_ids, splits, base_template, stream_template, jobs, arrange=False):
+    """Parse every graph in @graph_ids from the file @file_name with a
+    pool of @jobs worker processes. All workers read the same read-only
+    memory map of the file, using the graph index to find each graph.
+    Output file paths are created from @base_template and @stream_template
+    for each split in @splits."""
+    global INPUT_MAP
+    index = graph_index.load_index(file_name)
+    tasks = list()
+    for graph_id in graph_ids:
+        tasks.append((graph_id, graph_index.graph_ranges(index, graph_id), graph_index.graph_size(index, graph_id),
+                      graph_outputs(graph_id, splits, base_template, stream_template), arrange))
+    # start from the largest graphs so that workers finish at about the same time
+    tasks.sort(key=lambda task: graph_index.graph_size(index, task[0]), reverse=True)
+    outputs = dict((task[0], task[3]) for task in tasks)
+
+    init_worker(file_name)                                      # forked workers inherit the mapping
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Parsing {} StreamSpot graphs from {} with {} workers".format(len(tasks), file_name, jobs)
+    pb = tqdm.tqdm(desc=desc, total=len(tasks), unit=" graphs")
+    pool = multiprocessing.Pool(processes=jobs, initializer=init_worker, initargs=(file_name,))
+    for graph_id, sizes in pool.imap_unordered(parse_graph_task, tasks):
+        pb.update()
+        for (_, base_path, stream_path), (base_graph_size, stream_graph_size) in zip(outputs[graph_id], sizes):
+            pb.write("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {}: base graph of size {} at {}, stream graph of size {} at {}".format(
+                graph_id, base_graph_size, base_path, stream_graph_size, stream_path))
+    pool.close()
+    pool.join()
+    pb.close()
+    if INPUT_MAP is not None:
+        INPUT_MAP.close()
+        INPUT_MAP = None
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument('-g', '--graph', help='the id of the graph to be parsed', required=True)
+    parser.add_argument('-g', '--graph', help='the id of the graph to be parsed, or a list/range of ids to be parsed in batch mode, e.g., "0-99,300-399:16"', required=True)
     # %% is not a typo: https://thomas-cokelaer.info/blog/2014/03/python-argparse-issues-with-the-help-argument-typeerror-o-format-a-number-is-required-not-dict/
     parser.add_argument('-s', '--size', help='the size of the base graph in absolute value (default is 10%% of the entire graph)', type=int)
     parser.add_argument('-i', '--input', help='input StreamSpot data file path', required=True)
-    parser.add_argument('-b', '--base', help='output file path of the base graph', required=True)
-    parser.add_argument('-S', '--stream', help='output file path of the stream graph', required=True)
+    parser.add_argument('-p', '--splits', help='write a base/stream graph pair for each of these base graph sizes in a single pass, e.g., "1%%,5%%,10%%,4000" (-b and -S must contain {split}; overrides -s)')
+    parser.add_argument('-b', '--base', help='output file path of the base graph (a template with {graph} and optionally {scenario} in batch mode, and {split} with -p)', required=True)
+    parser.add_argument('-S', '--stream', help='output file path of the stream graph (a template with {graph} and optionally {scenario} in batch mode, and {split} with -p)', required=True)
+    parser.add_argument('-a', '--arrange', help='rearrange node IDs of a graph to be Unicorn compliant', action='store_true')
+    parser.add_argument('-x', '--index', help='use (and build if missing or out of date) a graph index next to the input file to read only the lines of the graph', action='store_true')
+    parser.add_argument('-l', '--low-memory', help='write each edge as soon as it is parsed instead of keeping the whole graph in memory (needs an extra pass to count edges unless -x is set or -s is an absolute size; always on in batch mode)', action='store_true')
+    parser.add_argument('-j', '--jobs', help='parse graphs in batch mode with this many worker processes (default is the number of CPUs if more than one graph is given)', type=int)
     args = parser.parse_args()
 
-    graph = read_single_graph(args.input, args.graph)
-    if not args.size:
-        base_graph_size = int(math.ceil(len(graph) * 0.1))
+    if args.splits:
+        splits = parse_splits(args.splits)
+        if "{split}" not in args.base or "{split}" not in args.stream:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m -b and -S must contain {split} with -p")
+            sys.exit(1)
+    elif args.size:
+        splits = [str(args.size)]
     else:
-        base_graph_size = args.size
-    stream_graph_size = len(graph) - base_graph_size
-
-    base_file = open(args.base, "w")
-    stream_file = open(args.stream, "w")
+        splits = ["10%"]                                        # default to 10% of the entire graph
 
-    cnt = 0
-    for edge in graph:
-        if cnt < base_graph_size:
-            cnt = cnt + 1
-            base_file.write("{} {} {}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], edge[8]))
-        else:
-            stream_file.write("{} {} {}:{}:{}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], edge[6], edge[7], edge[8]))
+    if any(c in args.graph for c in ",-:"):
+        try:
+            graph_ids = parse_graph_ids(args.graph)
+        except ValueError as e:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m Invalid graph IDs {}: {}".format(args.graph, e))
+            sys.exit(1)
+    else:
+        graph_ids = [args.graph]                               # a single graph ID is taken as is
+    if len(graph_ids) > 1 or args.jobs:
+        if "{graph}" not in args.base or "{graph}" not in args.stream:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m -b and -S must contain {graph} in batch mode")
+            sys.exit(1)
+        jobs = args.jobs or multiprocessing.cpu_count()
+        parse_graphs(args.input, graph_ids, splits, args.base, args.stream, min(jobs, len(graph_ids)), args.arrange)
+        sys.exit(0)
 
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {} is processed.".format(args.graph))
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(base_graph_size, args.base))
-    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Stream graph of size {} is located at {}".format(stream_graph_size, args.stream))
+    index = None
+    if args.index:
+        index = graph_index.load_index(args.input)
 
-    base_file.close()
-    stream_file.close()
+    outputs = graph_outputs(args.graph, splits, args.base, args.stream)
+    if args.low_memory:
+        sizes = stream_single_graph(args.input, args.graph, outputs, index, args.arrange)
+    else:
+        graph = read_single_graph(args.input, args.graph, index, args.arrange)
+        sizes = write_graph(graph, outputs)
 
+    print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {} is processed.".format(args.graph))
+    for (_, base_path, stream_path), (base_graph_size, stream_graph_size) in zip(outputs, sizes):
+        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(base_graph_size, base_path))
+        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Stream graph of size {} is located at {}".format(stream_graph_size, stream_path))
@@ -0,0 +1,206 @@
+import os
+import sys
+import math
+import argparse
+import collections
+import tqdm
+from node_tracker import NodeTracker
+
+
+# StreamSpot groups its 600 graphs into scenarios of 100 graphs each.
+SCENARIOS = ["youtube", "gmail", "vgame", "attack", "download", "cnn"]
+
+
+def scenario_of(graph_id):
+    """Name of the StreamSpot scenario that graph @graph_id belongs to."""
+    if not graph_id.isdigit():
+        return "unknown"
+    index = int(graph_id) // 100
+    if index < len(SCENARIOS):
+        return SCENARIOS[index]
+    return "unknown"
+
+
+def parse_graph_ids(spec):
+    """Parse a graph ID specification @spec into a list of graph IDs (in str).
+    @spec is a comma-separated list of graph IDs or inclusive ranges,
+    optionally with a step, e.g., "0-99,300-399:16,512". Raise ValueError
+    if @spec is malformed."""
+    graph_ids = list()
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        step = 1
+        if ":" in item:
+            item, step = item.split(":")
+            step = int(step)
+            if step < 1:
+                raise ValueError("the step of range {} must be at least 1".format(item))
+        if "-" in item:
+            first, last = item.split("-")
+            candidates = [str(g) for g in range(int(first), int(last) + 1, step)]
+        else:
+            candidates = [str(int(item))]
+        for graph_id in candidates:
+            if graph_id not in graph_ids:
+                graph_ids.append(graph_id)
+    return graph_ids
+
+
+class HandlePool(object):
+    """A bounded pool of open output file handles. At most @capacity
+    files are open at any time; the least recently used handle is
+    closed when a new file must be opened. A file is truncated the
+    first time it is opened and appended to afterwards."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.handles = collections.OrderedDict()        # maps file paths to open handles in LRU order
+        self.opened = set()                             # file paths that have been opened before
+
+    def get(self, path):
+        """Return an open handle of the file at @path."""
+        fh = self.handles.pop(path, None)
+        if fh is None:
+            if len(self.handles) >= self.capacity:
+                _, lru = self.handles.popitem(last=False)
+                lru.close()
+            if path in self.opened:
+                fh = open(path, "a")
+            else:
+                fh = open(path, "w")
+                self.opened.add(path)
+        self.handles[path] = fh
+        return fh
+
+    def close(self, path):
+        """Close the handle of the file at @path if it is open."""
+        fh = self.handles.pop(path, None)
+        if fh is not None:
+            fh.close()
+
+    def close_all(self):
+        for fh in self.handles.values():
+            fh.close()
+        self.handles.clear()
+
+
+class GraphState(object):
+    """Parsing state of a single graph. Node first-seen flags
+    and logical timestamps are kept per graph, exactly as in
+    parse.py when the graph is parsed on its own."""
+    def __init__(self, graph_id, base_path, stream_path, arrange=False):
+        self.graph_id = graph_id
+        self.base_path = base_path
+        self.stream_path = stream_path
+        self.spool_path = stream_path + ".spool"       # used only if the base graph size is not known in advance
+        self.nodes = NodeTracker(arrange)               # the nodes that we have seen already
+        self.cnt = 1                                    # logical timestamps of edges
+
+
+def base_line(edge, cnt):
+    return "{} {} {}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], cnt)
+
+
+def stream_line(edge, src_bool, dst_bool, cnt):
+    return "{} {} {}:{}:{}:{}:{}:{}\n".format(edge[0], edge[2], edge[1], edge[3], edge[4], src_bool, dst_bool, cnt)
+
+
+def parse_all(file_name, states, pool, size=None):
+    """Read the StreamSpot file @file_name once and parse every graph in
+    @states, a dictionary that maps graph IDs to their GraphState. Edges
+    of other graphs are skipped. If the base graph @size is given, each
+    edge is written to its base or stream file right away; otherwise,
+    edges are spooled until the size of every graph is known and
+    split_spool must be called for each graph afterwards."""
+    desc = "\x1b[6;30;42m[STATUS]\x1b[0m Parsing {} StreamSpot graphs from {}".format(len(states), file_name)
+    pb = tqdm.tqdm(desc=desc, mininterval=1.0, unit=" edges")
+    with open(file_name, "r") as f:
+        for line in f:
+            edge = line.strip().split("\t")
+            state = states.get(edge[5])
+            if state is None:                           # we only parse edges of the selected graphs
+                continue
+            pb.update()
+            edge[0], src_bool = state.nodes.visit(edge[0])  # check if we have seen the source node before
+            edge[2], dst_bool = state.nodes.visit(edge[2])  # check if we have seen the destination node before
+            cnt = state.cnt
+            state.cnt = cnt + 1
+            if size is None:
+                pool.get(state.spool_path).write("\t".join(edge[:5] + [src_bool, dst_bool, str(cnt)]) + "\n")
+            elif cnt <= size:
+                pool.get(state.base_path).write(base_line(edge, cnt))
+            else:
+                pool.get(state.stream_path).write(stream_line(edge, src_bool, dst_bool, cnt))
+    f.close()
+    pb.close()
+    pool.close_all()
+
+
+def split_spool(state):
+    """Split the spooled edges of a graph into its base graph (first 10%
+    of the edges) and stream graph, and remove the spool file."""
+    total = state.cnt - 1
+    base_graph_size = int(math.ceil(total * 0.1))
+    base_file = open(state.base_path, "w")
+    stream_file = open(state.stream_path, "w")
+    if os.path.exists(state.spool_path):
+        with open(state.spool_path, "r") as f:
+            for line in f:
+                edge = line.rstrip("\n").split("\t")
+                cnt = int(edge[7])
+                if cnt <= base_graph_size:
+                    base_file.write(base_line(edge, cnt))
+                else:
+                    stream_file.write(stream_line(edge, edge[5], edge[6], cnt))
+        f.close()
+        os.remove(state.spool_path)
+    base_file.close()
+    stream_file.close()
+    return base_graph_size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parse many StreamSpot graphs in a single pass over the input file')
+    parser.add_argument('-g', '--graphs', help='IDs of the graphs to be parsed, e.g., "0-99,300-399:16" (default is 0-599)', default='0-599')
+    # %% is not a typo: https://thomas-cokelaer.info/blog/2014/03/python-argparse-issues-with-the-help-argument-typeerror-o-format-a-number-is-required-not-dict/
+    parser.add_argument('-s', '--size', help='the size of the base graph in absolute value (default is 10%% of each graph)', type=int)
+    parser.add_argument('-i', '--input', help='input StreamSpot data file path', required=True)
+    parser.add_argument('-b', '--base', help='output file path template of base graphs, e.g., "data/{scenario}/base-{graph}.txt"', required=True)
+    parser.add_argument('-S', '--stream', help='output file path template of stream graphs, e.g., "data/{scenario}/stream-{graph}.txt"', required=True)
+    parser.add_argument('-a', '--arrange', help='rearrange node IDs of each graph to be Unicorn compliant', action='store_true')
+    parser.add_argument('-m', '--max-open', help='maximum number of output files open at the same time (default is 64)', type=int, default=64)
+    args = parser.parse_args()
+
+    if args.max_open < 1:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m -m must be at least 1")
+        sys.exit(1)
+
+    if not args.size:
+        args.size = None
+
+    try:
+        graph_ids = parse_graph_ids(args.graphs)
+    except ValueError as e:
+        print("\x1b[6;30;41m[ERROR]\x1b[0m Invalid graph IDs {}: {}".format(args.graphs, e))
+        sys.exit(1)
+    states = dict()
+    for graph_id in graph_ids:
+        fields = {"graph": graph_id, "scenario": scenario_of(graph_id)}
+        states[graph_id] = GraphState(graph_id, args.base.format(**fields), args.stream.format(**fields), args.arrange)
+
+    pool = HandlePool(args.max_open)
+    parse_all(args.input, states, pool, args.size)
+
+    for graph_id in graph_ids:
+        state = states[graph_id]
+        if args.size is None:
+            base_graph_size = split_spool(state)
+        else:
+            base_graph_size = min(args.size, state.cnt - 1)
+            # graphs with no edges (or no stream edges) still get their output files
+            for path in (state.base_path, state.stream_path):
+                if path not in pool.opened:
+                    open(path, "w").close()
+        print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph {}: base graph of size {} at {}, stream graph of size {} at {}".format(
+            graph_id, base_graph_size, state.base_path, state.cnt - 1 - base_graph_size, state.stream_path))
@@ -1,117 +1,97 @@
+import io
+import os
 import sys
 import math
 import argparse
+import graph_index
+import graph_cache
 import tqdm as tqdm
+import numpy as np
 import pandas as pd
 
+# node relabeling is shared with ProvParser
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cdm", "ProvParser"))
+from provparser.partool.relabel import ArrayRelabeler
+
 
 # make argparse arguments global
 CONSOLE_ARGUMENTS = None
+# number of lines read from the input file at a time
+CHUNK_SIZE = 1000000
+
+
+def read_graph(file_name, graph_id=None, index=None):
+    """Read the edges of the graph with ID @graph_id from
+    file @file_name into a data frame. The file is read in
+    chunks of CHUNK_SIZE lines and edges of other graphs are
+    dropped from each chunk. If @graph_id is None, all edges
+    are kept. If the @index of the file is given, only the
+    lines of the graph are read; a graph that is not in the
+    file has no edges."""
+    if index is None:
+        source = file_name
+    else:
+        content = graph_index.graph_bytes(file_name, index, graph_id)
+        if not content:
+            return pd.DataFrame(columns=range(6), dtype=str)
+        source = io.BytesIO(content)
+    chunks = list()
+    for chunk in pd.read_csv(source, sep='\t', dtype=str, header=None, chunksize=CHUNK_SIZE):
+        if graph_id is not None:
+            chunk = chunk[chunk[5] == graph_id]
+        chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def node_keys(df):
+    """Return the 64-bit keys of the source and destination nodes of the
+    graph in the data frame @df: the node IDs themselves if they are
+    integers (i.e., read from the cache), or else their codes in a
+    factorization of all node IDs (in str), which is exact."""
+    if df[0].dtype.kind == "i":
+        return df[0].values, df[2].values
+    codes, _ = pd.factorize(np.concatenate([df[0].values, df[2].values]))
+    return codes[:df.shape[0]], codes[df.shape[0]:]
+
+
+def write_graph(df, b_size, b_fh, s_fh):
+    """Write the first @b_size edges of the graph in the data
+    frame @df to @b_fh and the rest of the edges to @s_fh.
+    The graph is processed column-wise, CHUNK_SIZE edges at a
+    time: node IDs are (optionally) renumbered and first-seen
+    flags are computed over the sequence of edge endpoints in
+    the order they are visited, i.e., source then destination
+    of each edge, by an ArrayRelabeler of their 64-bit keys."""
+    num_edges = df.shape[0]
+    src_keys, dst_keys = node_keys(df)
+    # the relabeler numbers nodes in the order they are first seen, starting from 0
+    nodes = ArrayRelabeler()
+
+    for start in range(0, num_edges, CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, num_edges)
+        chunk = df.iloc[start:end].reset_index(drop=True)
+        src_codes, dst_codes, src_seen, dst_seen = nodes.relabel_columns(src_keys[start:end], dst_keys[start:end])
 
-
-def separate_graph(file_name, graph_id):
-    """If file @file_name has many graphs, filter out
-    other graphs except the one with ID @graph_id, and
-    write to a temporary file."""
-    df = pd.read_csv(file_name, sep='\t', dtype=str, header=None)
-    filtered_df = df[df[5] == graph_id]
-    filtered_df.to_csv("tmp.csv", sep='\t', header=False, index=False)
-
-
-def graph_size(file_name):
-    """Total size of a graph located at @file_name. """
-    df = pd.read_csv(file_name, sep='\t', dtype=str, header=None)
-    rows = df.shape[0]
-    return rows
-
-
-def read_single_graph(file_name, b_size, b_fh, s_fh):
-    """Read a single graph from the file @file_name
-    Write @b_size number of edges to @b_fh and the
-    rest of the edges in the graph to @s_fh."""
-    node_id_seen = set()                                        # set of the node id that we have seen already
-    cnt = 1                                                     # logical timestamps of edges
-    if CONSOLE_ARGUMENTS.arrange:
-        next_id = 0
-        node_map = dict()                                       # maps original node IDs to new IDs, which always start from 0
-
-    # read edges for the base graph only
-    df = pd.read_csv(file_name, sep='\t', dtype=str, header=None, nrows=b_size)
-    # process those edges
-    for edge in df.itertuples():
-        src_id = df.at[edge.Index, 0]
-        dst_id = df.at[edge.Index, 2]
         if CONSOLE_ARGUMENTS.arrange:
-            if src_id in node_map:
-                src_id = node_map[src_id]
-            else:
-                node_map[src_id] = str(next_id)
-                src_id = str(next_id)
-                next_id += 1
-            if dst_id in node_map:
-                dst_id = node_map[dst_id]
-            else:
-                node_map[dst_id] = str(next_id)
-                dst_id = str(next_id)
-                next_id += 1
-        src_type = df.at[edge.Index, 1]
-        dst_type = df.at[edge.Index, 3]
-        edge_type = df.at[edge.Index, 4]
-        if not src_id in node_id_seen:
-            node_id_seen.add(src_id)
-        if not dst_id in node_id_seen:
-            node_id_seen.add(dst_id) 
-        info = "{}:{}:{}:{}".format(src_type, dst_type, edge_type, cnt)
-        # replace the fourth column to the @info str
-        df.at[edge.Index, 3] = info
-        # replace the src and dst ids
-        if CONSOLE_ARGUMENTS.arrange:
-            df.at[edge.Index, 0] = src_id
-            df.at[edge.Index, 2] = dst_id
-        cnt += 1
-    cols = [1, 4, 5]
-    # drops column in the original data frame
-    df.drop(df.columns[cols], axis=1, inplace=True)
-    # write the data frame to the base graph file
-    df.to_csv(b_fh, sep=' ', header=False, index=False)
-
-    # read edges for the stream graph
-    for df in pd.read_csv(file_name, sep='\t', dtype=str, header=None, skiprows=b_size, chunksize=b_size):
-        for edge in df.itertuples():
-            src_id = df.at[edge.Index, 0]
-            dst_id = df.at[edge.Index, 2]
-            if CONSOLE_ARGUMENTS.arrange:
-                if src_id in node_map:
-                    src_id = node_map[src_id]
-                else:
-                    node_map[src_id] = str(next_id)
-                    src_id = str(next_id)
-                    next_id += 1
-                if dst_id in node_map:
-                    dst_id = node_map[dst_id]
-                else:
-                    node_map[dst_id] = str(next_id)
-                    dst_id = str(next_id)
-                    next_id += 1
-            src_type = df.at[edge.Index, 1]
-            dst_type = df.at[edge.Index, 3]
-            edge_type = df.at[edge.Index, 4]
-            new_src = 0
-            if not src_id in node_id_seen:
-                new_src = 1
-                node_id_seen.add(src_id)
-            new_dst = 0
-            if not dst_id in node_id_seen:
-                new_dst = 1
-                node_id_seen.add(dst_id)
-            info = "{}:{}:{}:{}:{}:{}".format(src_type, dst_type, edge_type, new_src, new_dst, cnt)
-            df.at[edge.Index, 3] = info
-            if CONSOLE_ARGUMENTS.arrange:
-                df.at[edge.Index, 0] = src_id
-                df.at[edge.Index, 2] = dst_id
-            cnt += 1
-        df.drop(df.columns[cols], axis=1, inplace=True)
-        df.to_csv(s_fh, sep=' ', mode='a', header=False, index=False)
+            src_id = pd.Series(src_codes).astype(str)
+            dst_id = pd.Series(dst_codes).astype(str)
+        else:
+            src_id = chunk[0]
+            dst_id = chunk[2]
+        types = chunk[1] + ':' + chunk[3] + ':' + chunk[4]
+        new_src = pd.Series(src_seen).astype(str)
+        new_dst = pd.Series(dst_seen).astype(str)
+        cnt = pd.Series(np.arange(start + 1, end + 1)).astype(str)     # logical timestamps of edges
+
+        split = min(max(b_size - start, 0), end - start)
+        base = slice(0, split)
+        stream = slice(split, end - start)
+        if split > 0:
+            pd.DataFrame({0: src_id[base], 2: dst_id[base],
+                          3: types[base] + ':' + cnt[base]}).to_csv(b_fh, sep=' ', header=False, index=False)
+        if split < end - start:
+            pd.DataFrame({0: src_id[stream], 2: dst_id[stream],
+                          3: types[stream] + ':' + new_src[stream] + ':' + new_dst[stream] + ':' + cnt[stream]}).to_csv(s_fh, sep=' ', mode='a', header=False, index=False)
 
 
 if __name__ == "__main__":
@@ -123,18 +103,27 @@ if __name__ == "__main__":
     parser.add_argument('-b', '--base', help='output file path of the base graph', required=True)
     parser.add_argument('-S', '--stream', help='output file path of the stream graph', required=True)
     parser.add_argument('-a', '--arrange', help='rearrange node IDs of a graph to be Unicorn compliant', action='store_true')
+    parser.add_argument('-x', '--index', help='use (and build if missing or out of date) a graph index next to the input file to read only the lines of the graph (requires -g)', action='store_true')
+    parser.add_argument('-c', '--cache', help='use (and build if missing or out of date) a binary columnar cache next to the input file instead of parsing its text', action='store_true')
     args = parser.parse_args()
 
     print("\x1b[6;30;42m[INFO]\x1b[0m Graph Node IDs are rearranged: {}".format(args.arrange))
 
     CONSOLE_ARGUMENTS = args
 
-    in_file = args.input
-    if args.graph:
-        separate_graph(args.input, args.graph)
-        in_file = "tmp.csv"
+    if args.cache:
+        try:
+            graph = graph_cache.cached_graph(graph_cache.load_cache(args.input), args.graph)
+        except ValueError as e:
+            print("\x1b[6;30;41m[ERROR]\x1b[0m Cannot cache {}: {}".format(args.input, e))
+            sys.exit(1)
+    else:
+        index = None
+        if args.graph and args.index:
+            index = graph_index.load_index(args.input)
+        graph = read_graph(args.input, args.graph, index)
 
-    graph_size = graph_size(in_file)
+    graph_size = graph.shape[0]
     if not args.size:
         base_graph_size = int(math.ceil(graph_size * 0.1))
     else:
@@ -143,7 +132,7 @@ if __name__ == "__main__":
     base_file = open(args.base, "w")
     stream_file = open(args.stream, "w")
 
-    read_single_graph(in_file, base_graph_size, base_file, stream_file)
+    write_graph(graph, base_graph_size, base_file, stream_file)
 
     print("\x1b[6;30;42m[SUCCESS]\x1b[0m Graph is processed:")
     print("\x1b[6;30;42m[SUCCESS]\x1b[0m Base graph of size {} is located at {}".format(base_graph_size, args.base))